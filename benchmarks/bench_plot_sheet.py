@@ -0,0 +1,79 @@
+"""
+Benchmark of plot_sheet: render time against the number of mesh edges, for the collection-based
+implementation and the former one that created one Matplotlib artist per edge and face.
+
+The benchmark uses synthetic triangulations of a square unit cell, so it does not need a Julia session.
+The former implementation is only timed for the smaller meshes.
+
+Usage:
+
+    python benchmarks/bench_plot_sheet.py
+"""
+import time
+from types import SimpleNamespace
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+from pypssfss.sheets import plot_sheet
+
+
+def grid_sheet(k: int) -> SimpleNamespace:
+    """A sheet-like object holding a k-by-k grid of squares, each split into two triangles (1-based indices)."""
+    x = np.linspace(0, 10, k + 1)
+    rho = np.stack(np.meshgrid(x, x, indexing='ij'), axis=-1).reshape(-1, 2)
+    node = np.arange((k + 1)**2).reshape(k + 1, k + 1) + 1
+    a, b, c, d = node[:-1, :-1].ravel(), node[1:, :-1].ravel(), node[1:, 1:].ravel(), node[:-1, 1:].ravel()
+    fv = np.concatenate([np.stack([a, b, c]), np.stack([a, c, d])], axis=1)
+    edges = np.concatenate([np.stack([a, b]), np.stack([b, c]), np.stack([a, c]),
+                            np.stack([node[-1, :-1], node[-1, 1:]]), np.stack([node[:-1, -1], node[1:, -1]]),
+                            np.stack([node[0, :-1], node[0, 1:]]), np.stack([node[:-1, 0], node[1:, 0]])], axis=1)
+    edges = np.unique(np.sort(edges, axis=0), axis=1)
+    return SimpleNamespace(rho=rho, e1=edges[0], e2=edges[1], fv=fv, s1=np.array([10.0, 0.0]),
+                           s2=np.array([0.0, 10.0]), units='mm')
+
+
+def legacy_plot_sheet(sheet, rep=(1, 1), edgecolor='red', facecolor='red', linewidth=1.5):
+    """The former implementation, restricted to edges and faces."""
+    fig, ax = plt.subplots()
+    ax.set_aspect('equal')
+    for m in range(1, rep[0] + 1):
+        for n in range(1, rep[1] + 1):
+            x0, y0 = (m - 1) * sheet.s1 + (n - 1) * sheet.s2
+            for i in range(sheet.fv.shape[1]):
+                points = sheet.rho[sheet.fv[:, i] - 1]
+                x = x0 + np.array([p[0] for p in points] + [points[0][0]])
+                y = y0 + np.array([p[1] for p in points] + [points[0][1]])
+                ax.fill(x, y, color=facecolor, alpha=0.8)
+            for i in range(len(sheet.e1)):
+                points = sheet.rho[[sheet.e1[i] - 1, sheet.e2[i] - 1]]
+                x = x0 + np.array([p[0] for p in points])
+                y = y0 + np.array([p[1] for p in points])
+                ax.plot(x, y, linestyle='solid', color=edgecolor, lw=linewidth)
+
+
+def render_time(plot, sheet, rep) -> float:
+    t0 = time.perf_counter()
+    plot(sheet, rep=rep, faces=True) if plot is plot_sheet else plot(sheet, rep=rep)
+    plt.gcf().canvas.draw()
+    t = time.perf_counter() - t0
+    plt.close('all')
+    return t
+
+
+def main():
+    rep = (3, 3)
+    print(f"rep={rep}")
+    print(f"{'edges':>8} {'faces':>8} {'collections (s)':>16} {'legacy (s)':>12}")
+    for k in (5, 10, 20, 50, 100, 200):
+        sheet = grid_sheet(k)
+        nedges = len(sheet.e1)
+        t_new = render_time(plot_sheet, sheet, rep)
+        t_old = render_time(legacy_plot_sheet, sheet, rep) if nedges <= 2000 else float('nan')
+        print(f"{nedges:>8} {sheet.fv.shape[1]:>8} {t_new:>16.3f} {t_old:>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
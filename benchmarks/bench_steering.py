@@ -0,0 +1,44 @@
+"""
+Benchmark of the conversion of steering namedtuples to Julia NamedTuples: the direct conversion used by
+`analyze` (pypssfss.steering.to_julia) versus the former approach of formatting the vectors into Julia
+source text and evaluating it with seval.
+
+Usage:
+
+    python benchmarks/bench_steering.py
+"""
+import timeit
+
+import numpy as np
+
+import pypssfss as pf
+from pypssfss.session import convert, jl
+from pypssfss.steering import to_julia
+
+
+def seval_steering(steering):
+    """The conversion formerly used by analyze."""
+    f1, f2 = steering._fields
+    v1 = steering[0] if isinstance(steering[0], int | float) else convert(jl.Vector, np.array(steering[0]))
+    v2 = steering[1] if isinstance(steering[1], int | float) else convert(jl.Vector, np.array(steering[1]))
+    return jl.seval(f'({f1}={v1}, {f2}={v2})')
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'points':>8} {'seval (ms)':>12} {'direct (ms)':>12} {'speedup':>8}  exact (seval, direct)")
+    for n in (10, 100, 1000, 10000):
+        theta = rng.uniform(0, 80, n)
+        phi = rng.uniform(0, 360, n)
+        steering = pf.ThetaPhi(theta, phi)
+        seval_steering(steering), to_julia(steering)  # Compile both paths
+        reps = max(3, 2000 // n)
+        t_seval = min(timeit.repeat(lambda: seval_steering(steering), number=reps, repeat=3)) / reps
+        t_direct = min(timeit.repeat(lambda: to_julia(steering), number=reps, repeat=3)) / reps
+        exact = (np.array_equal(np.asarray(seval_steering(steering).theta), theta),
+                 np.array_equal(np.asarray(to_julia(steering).theta), theta))
+        print(f"{n:>8} {1e3 * t_seval:>12.3f} {1e3 * t_direct:>12.3f} {t_seval / t_direct:>8.1f}  {exact}")
+
+
+if __name__ == '__main__':
+    main()
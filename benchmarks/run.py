@@ -0,0 +1,167 @@
+"""
+Run the pypssfss benchmark suite (benchmarks/suite.py), store the timings and compare them with earlier runs.
+
+Usage:
+
+    python benchmarks/run.py                      # run everything, save results/<version>.json
+    python benchmarks/run.py -k analyze -k sheet  # only benchmarks whose names contain 'analyze' or 'sheet'
+    python benchmarks/run.py --compare benchmarks/results/0.1.0.json
+    python benchmarks/run.py --compare old.json --against new.json   # compare stored results only
+
+Results are stored per package version (plus machine, Python, Julia and git details) as JSON.  Comparison
+lists the ratio of the minimum times of every benchmark present in both runs and exits with status 1 if any
+ratio exceeds the threshold (default 1.2).
+"""
+import argparse
+import datetime
+import importlib.metadata
+import inspect
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), 'src'))
+
+import suite  # noqa: E402
+
+
+def _version() -> str:
+    try:
+        return importlib.metadata.version('pypssfss')
+    except importlib.metadata.PackageNotFoundError:
+        import tomllib
+        with open(os.path.join(os.path.dirname(HERE), 'pyproject.toml'), 'rb') as f:
+            return tomllib.load(f)['project']['version']
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _environment() -> dict:
+    env = {'version': _version(), 'commit': _git_commit(), 'machine': platform.node(),
+           'platform': platform.platform(), 'python': platform.python_version(),
+           'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')}
+    from pypssfss import session
+    if session.is_started():
+        env['julia'] = str(session.jl.seval('string(VERSION, ", PSSFSS ", pkgversion(PSSFSS))'))
+    return env
+
+
+def benchmarks(patterns=()) -> list:
+    """Return (name, function, parameter) triples of the selected benchmarks."""
+    selected = []
+    for name, f in inspect.getmembers(suite, inspect.isfunction):
+        if not name.startswith('time_'):
+            continue
+        for param in getattr(f, 'params', (None,)):
+            full = name[5:] if param is None else f"{name[5:]}{list(param) if isinstance(param, tuple) else [param]}"
+            if not patterns or any(p in full for p in patterns):
+                selected.append((full, f, param))
+    return selected
+
+
+def measure(f, param, repeat: int, min_time: float) -> dict:
+    """Time `f`, repeating it at least `repeat` times and for at least `min_time` seconds, then tear it down."""
+    arg = f.setup(param) if hasattr(f, 'setup') else param
+    args = () if param is None and not hasattr(f, 'setup') else (arg,)
+    times = []
+    start = time.perf_counter()
+    try:
+        while len(times) < repeat or time.perf_counter() - start < min_time:
+            t0 = time.perf_counter()
+            f(*args)
+            times.append(time.perf_counter() - t0)
+            if len(times) >= 100:
+                break
+    finally:
+        if hasattr(f, 'teardown'):
+            f.teardown(arg)
+    return {'min': min(times), 'median': statistics.median(times), 'repeat': len(times)}
+
+
+def run(patterns=(), repeat: int = 3, min_time: float = 0.5) -> dict:
+    results = {}
+    for name, f, param in benchmarks(patterns):
+        try:
+            results[name] = measure(f, param, repeat, min_time)
+            print(f"{name:<45} {results[name]['min']:>10.4f} s", flush=True)
+        except Exception as err:  # Record the failure and go on with the other benchmarks
+            results[name] = {'error': f"{type(err).__name__}: {err}"}
+            print(f"{name:<45} failed: {err}", flush=True)
+    return {'environment': _environment(), 'results': results}
+
+
+def compare(old: dict, new: dict, threshold: float) -> bool:
+    """Print the timing ratios new/old; return True if any benchmark regressed beyond `threshold`."""
+    print(f"{'benchmark':<45} {'old (s)':>10} {'new (s)':>10} {'ratio':>7}")
+    print(f"{'':<45} {old['environment']['version']:>10} {new['environment']['version']:>10}")
+    regressed = False
+    for name in sorted(set(old['results']) & set(new['results'])):
+        a, b = old['results'][name].get('min'), new['results'][name].get('min')
+        if a is None or b is None:
+            print(f"{name:<45} {'-':>10} {'-':>10} {'failed':>7}")
+            continue
+        ratio = b / a
+        flag = '  <-- regression' if ratio > threshold else ''
+        regressed |= ratio > threshold
+        print(f"{name:<45} {a:>10.4f} {b:>10.4f} {ratio:>7.2f}{flag}")
+    return regressed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-k', dest='patterns', action='append', default=[],
+                        help='only run benchmarks whose names contain this string (may be repeated)')
+    parser.add_argument('--repeat', type=int, default=3, help='minimum number of timed calls (default 3)')
+    parser.add_argument('--min-time', type=float, default=0.5, help='minimum total time per benchmark (s)')
+    parser.add_argument('-o', '--output', help='results file (default benchmarks/results/<version>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare with')
+    parser.add_argument('--against', help='compare with this stored results file instead of running')
+    parser.add_argument('--threshold', type=float, default=1.2, help='regression ratio threshold (default 1.2)')
+    parser.add_argument('--list', action='store_true', help='list the benchmarks and exit')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, _, _ in benchmarks(args.patterns):
+            print(name)
+        return 0
+
+    if args.against:
+        with open(args.against) as f:
+            new = json.load(f)
+    else:
+        new = run(args.patterns, args.repeat, args.min_time)
+        output = args.output or os.path.join(HERE, 'results', new['environment']['version'] + '.json')
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        if os.path.exists(output) and args.patterns:
+            # Merge a partial run into the stored results:
+            with open(output) as f:
+                stored = json.load(f)
+            stored['results'].update(new['results'])
+            stored['environment'] = new['environment']
+            new = stored
+        with open(output, 'w') as f:
+            json.dump(new, f, indent=1)
+        print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        return int(compare(old, new, args.threshold))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
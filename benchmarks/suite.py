@@ -0,0 +1,218 @@
+"""
+Benchmarks of the hot paths of pypssfss, run by `benchmarks/run.py`.
+
+Each benchmark is a function named `time_*`, optionally with a `params` attribute listing the parameter values
+it is run with and a `setup` attribute, called with the same parameter, whose return value is passed to the
+benchmark in place of the parameter.  A `teardown` attribute, if any, is called with that value once the
+benchmark has been timed (also if it failed).  Only the benchmark call itself is timed.
+"""
+import contextlib
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _params(*values):
+    def decorate(f):
+        f.params = values
+        return f
+    return decorate
+
+
+def _setup(setup):
+    def decorate(f):
+        f.setup = setup
+        return f
+    return decorate
+
+
+def _teardown(teardown):
+    def decorate(f):
+        f.teardown = teardown
+        return f
+    return decorate
+
+
+def _disable_sheet_cache() -> tuple:
+    """Turn off sheet memoization; return the previous state for `_restore_sheet_cache`."""
+    from pypssfss import sheets
+    saved = (sheets._sheet_cache, dict(sheets._sheet_cache_config))
+    sheets.configure_sheet_cache(memory=0, disk=0)
+    return saved
+
+
+def _restore_sheet_cache(saved: tuple) -> None:
+    from pypssfss import sheets
+    sheets._sheet_cache = saved[0]
+    sheets._sheet_cache_config.clear()
+    sheets._sheet_cache_config.update(saved[1])
+
+
+@contextlib.contextmanager
+def _no_sheet_cache():
+    saved = _disable_sheet_cache()
+    try:
+        yield
+    finally:
+        _restore_sheet_cache(saved)
+
+
+def _python(code: str, **env) -> None:
+    path = os.pathsep.join(p for p in sys.path if p)
+    subprocess.run([sys.executable, '-c', code], check=True, env=dict(os.environ, PYTHONPATH=path, **env))
+
+
+# Import and start-up.  These run in fresh processes, so they include the interpreter start-up time.
+def time_import():
+    """Import of pypssfss, without starting Julia."""
+    _python('import pypssfss')
+
+
+def time_start_cold():
+    """Import and Julia session start with package resolution forced and no custom sysimage."""
+    _python('import pypssfss; pypssfss.session.start()', PYPSSFSS_RESOLVE='always', PYPSSFSS_SYSIMAGE='no')
+
+
+def time_start_warm():
+    """Import and Julia session start as normally seen by users (resolution skipped, sysimage if built)."""
+    _python('import pypssfss; pypssfss.session.start()')
+
+
+# Sheet construction, with memoization disabled while the benchmark runs.  Not included: pixels and sympixels,
+# whose meshes are set by the pixel pattern rather than by `ntri` (see pixels_batch for building them in bulk),
+# and manji and sinuous, for which this package has no validated reference geometry to time.
+def _sheet_constructors():
+    import pypssfss as pf
+    return {
+        'rectstrip': lambda n: pf.rectstrip(Nx=max(2, int((n / 2)**0.5)), Ny=max(2, int((n / 2)**0.5)),
+                                            Px=10, Py=10, Lx=5, Ly=5, units=pf.mm),
+        'diagstrip': lambda n: pf.diagstrip(P=10, w=1, Nl=max(2, n // 4), Nw=2, units=pf.mm),
+        'polyring': lambda n: pf.polyring(s1=[10, 0], s2=[0, 10], a=[3], b=[4], sides=12, ntri=n, units=pf.mm),
+        'splitring': lambda n: pf.splitring(s1=[10, 0], s2=[0, 10], a=[3], b=[4], sides=12, ntri=n,
+                                            gapwidth=0.5, gapcenter=0, units=pf.mm),
+        'meander': lambda n: pf.meander(a=200, b=200, w1=10, w2=10, h=100, ntri=n, units=pf.mil),
+        'jerusalemcross': lambda n: pf.jerusalemcross(P=10, L1=8, L2=4, A=2, B=1, w=0.5, ntri=n, units=pf.mm),
+        'loadedcross': lambda n: pf.loadedcross(s1=[10, 0], s2=[0, 10], L1=8, L2=2, w=0.5, ntri=n, units=pf.mm),
+    }
+
+
+SHEETS = ('rectstrip', 'diagstrip', 'polyring', 'splitring', 'meander', 'jerusalemcross', 'loadedcross')
+
+
+def _sheet_setup(param):
+    name, ntri = param
+    saved = _disable_sheet_cache()
+    try:
+        construct = _sheet_constructors()[name]
+        construct(200)  # Compile
+    except BaseException:
+        _restore_sheet_cache(saved)
+        raise
+    return construct, ntri, saved
+
+
+def _sheet_teardown(arg):
+    _restore_sheet_cache(arg[2])
+
+
+@_teardown(_sheet_teardown)
+@_setup(_sheet_setup)
+@_params(*((name, ntri) for name in SHEETS for ntri in (200, 1000, 4000)))
+def time_sheet(arg):
+    construct, ntri, _ = arg
+    construct(ntri)
+
+
+# Analysis of canonical stacks:
+def _stacks():
+    import pypssfss as pf
+    with _no_sheet_cache():  # Build distinct sheets, as users designing a stack would
+        ring = pf.polyring(s1=[10, 0], s2=[0, 10], a=[3], b=[4], sides=12, ntri=800, units=pf.mm)
+        sheets = [pf.meander(a=200, b=200, w1=10, w2=10, h=100, ntri=600, units=pf.mil, rot=45) for _ in range(4)]
+    slab = [pf.Layer(), pf.Layer(epsr=2.2, tandel=0.001, width=1 * pf.mm), pf.Layer()]
+    fss = [pf.Layer(), ring, pf.Layer(epsr=2.2, width=1 * pf.mm), pf.Layer()]
+    polarizer = [pf.Layer()]
+    for i, sheet in enumerate(sheets):
+        polarizer.append(sheet)
+        polarizer.append(pf.Layer(epsr=1.05, width=250 * pf.mil) if i < 3 else pf.Layer())
+    return {'slab': slab, 'fss': fss, 'polarizer': polarizer}
+
+
+def _analyze_setup(param):
+    import pypssfss as pf
+    from pypssfss.session import jl
+    name, incidence = param
+    strata = _stacks()[name]
+    steering = pf.ThetaPhi(0, 0) if incidence == 'normal' else pf.ThetaPhi(40, [0, 45, 90])
+    flist = np.linspace(8, 12, 5)
+    quiet = dict(logfile=jl.devnull, resultfile=jl.devnull, showprogress=False)
+    pf.analyze(strata, flist[:1], steering, **quiet)  # Compile
+    return lambda: pf.analyze(strata, flist, steering, **quiet)
+
+
+@_setup(_analyze_setup)
+@_params(*((name, incidence) for name in ('slab', 'fss', 'polarizer') for incidence in ('normal', 'oblique')))
+def time_analyze(run):
+    run()
+
+
+# Steering conversion:
+def _steering_setup(n):
+    import pypssfss as pf
+    from pypssfss.steering import to_julia
+    rng = np.random.default_rng(0)
+    steering = pf.ThetaPhi(rng.uniform(0, 80, n), rng.uniform(0, 360, n))
+    to_julia(steering)
+    return lambda: to_julia(steering)
+
+
+@_setup(_steering_setup)
+@_params(10, 1000, 100000)
+def time_steering(run):
+    run()
+
+
+# Result extraction:
+def _extract_setup(param):
+    import pypssfss as pf
+    from pypssfss.session import jl
+    npoints, columnar = param
+    slab = [pf.Layer(), pf.Layer(epsr=2.2, width=1 * pf.mm), pf.Layer()]
+    results = pf.analyze(slab, np.linspace(1, 20, npoints), pf.ThetaPhi(0, 0), logfile=jl.devnull,
+                         resultfile=jl.devnull, showprogress=False)
+    outreq = 'FGHz s11dB(te,te) s11ang(te,te) s21dB(tm,tm) s21ang(tm,tm)'
+    pf.extract_result(results, outreq, columnar=columnar)
+    return lambda: pf.extract_result(results, outreq, columnar=columnar)
+
+
+@_setup(_extract_setup)
+@_params((1000, False), (1000, True), (20000, False), (20000, True))
+def time_extract_result(run):
+    run()
+
+
+# Sheet plotting (on synthetic meshes, without Julia):
+def _plot_setup(k):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    sys.path.insert(0, HERE)
+    from bench_plot_sheet import grid_sheet
+    from pypssfss.sheets import plot_sheet
+    sheet = grid_sheet(k)
+
+    def run():
+        plot_sheet(sheet, faces=True, rep=(3, 3))
+        plt.gcf().canvas.draw()
+        plt.close('all')
+    return run
+
+
+@_setup(_plot_setup)
+@_params(10, 50, 100)
+def time_plot_sheet(run):
+    run()
@@ -8,6 +8,7 @@ structures.
 It is not necessary to install Julia prior to using this package.  If Julia is not in the user's path
 then it will be installed automatically.  If pypssfss is installed in a Python virtual environment, then the Julia
 installation will also be private to that environment. Similarly, PSSFSS will be automatically installed, if required.
+Julia and PSSFSS are loaded on first use of a wrapped function rather than when pypssfss is imported.
 
 **The extensive documentation of PSSFSS at https://simonp0420.github.io/PSSFSS.jl/stable is required reading 
 in order to use this package effectively.**
@@ -28,17 +29,44 @@ Modules:
 - pypssfss: Core functionality and wrappers
 - sheets: Sheet definitions and plotting
 - steering: Steering definitions
+- session: Lazy start-up of the embedded Julia session
+- cache: Persistent cache of analysis results
+- parallel: Parallel analysis of many designs on worker processes
+- aio: Asyncio-friendly versions of analyze, extract_result and the sheet constructors
+- store: Compact, memory-mappable binary store of analysis results
+- profiling: Per-phase timing and allocation profiles of analyze and extract_result
+- cascade: Fast dielectric-layer sweeps reusing cached sheet GSMs
+- sweep: Sharded sweeps analyzed by workers on one or many machines
+- checkpoint: Checkpoint files letting interrupted analyses resume
+- threads: Sharing of the cores between Julia threads, BLAS threads and worker processes
+- convergence: Search for the coarsest converged sheet triangulation
+- surrogate: Fast rational/interpolating models of the scattering parameters fitted to analyze results
+- server: Daemon answering analysis requests from warm Julia sessions
+- client: Julia-free client of the server
 
 """
 
 # Quantities to export:
 from .pypssfss import (
     analyze,
+    analyze_async,
+    analyze_cascade,
+    analyze_iter,
+    analyze_many,
     atoutputs,
+    autotune_threads,
     cm,
+    collect_sweep,
+    configure_sheet_cache,
+    configure_threads,
+    converge_mesh,
+    Design,
     diagstrip,
     doc,
     extract_result,
+    extract_result_async,
+    fit_surrogate,
+    GSMCache,
     inch,
     jerusalemcross,
     Layer,
@@ -50,22 +78,39 @@ from .pypssfss import (
     pecsheet,
     PhiTheta,
     pixels,
+    pixels_batch,
     plot_sheet,
     pmcsheet, 
+    profiling,
     polyring,
     Psi1Psi2,
     Psi2Psi1,
     rectstrip,
     res2fresnel,
+    res2fresnel_many,
     res2tep,
+    res2tep_many,
+    ResultCache,
+    ResultStore,
+    serve,
+    SheetBatch,
     sinuous,
     splitring,
+    SQLiteQueue,
+    submit_sweep,
+    Surrogate,
+    sweep,
     sympixels,
+    sympixels_batch,
     ThetaPhi,
 )
 
-__all__ = ['analyze', 'atoutputs', 'cm', 'diagstrip', 'doc', 'extract_result', 
-           'inch', 'jerusalemcross', 'Layer', 'loadedcross', 'manji',
-           'meander', 'mil', 'mm', 'pecsheet', 'PhiTheta', 'pixels', 
-           'plot_sheet', 'pmcsheet', 'polyring',  'Psi1Psi2', 'Psi2Psi1', 'rectstrip',
-           'res2fresnel', 'res2tep', 'sinuous', 'splitring', 'sympixels', 'ThetaPhi']
+__all__ = ['analyze', 'analyze_async', 'analyze_cascade', 'analyze_iter', 'analyze_many', 'atoutputs',
+           'autotune_threads', 'cm', 'collect_sweep', 'configure_sheet_cache', 'configure_threads',
+           'converge_mesh', 'Design', 'diagstrip', 'doc', 'extract_result', 'extract_result_async',
+           'fit_surrogate', 'GSMCache', 'inch', 'jerusalemcross', 'Layer', 'loadedcross', 'manji',
+           'meander', 'mil', 'mm', 'pecsheet', 'PhiTheta', 'pixels', 'pixels_batch',
+           'plot_sheet', 'pmcsheet', 'polyring', 'profiling',  'Psi1Psi2', 'Psi2Psi1', 'rectstrip',
+           'res2fresnel', 'res2fresnel_many', 'res2tep', 'res2tep_many', 'ResultCache', 'ResultStore',
+           'serve', 'SheetBatch', 'sinuous', 'splitring', 'SQLiteQueue', 'submit_sweep', 'Surrogate', 'sweep',
+           'sympixels', 'sympixels_batch', 'ThetaPhi']
@@ -0,0 +1,53 @@
+"""
+Command line interface of pypssfss.  Usage:
+
+    python -m pypssfss build-sysimage
+    python -m pypssfss worker QUEUE [--sweep ID] [--lease SECONDS] [--idle-timeout SECONDS]
+    python -m pypssfss serve [--address PATH|HOST:PORT] [--workers N] [--julia-threads N] [--no-warmup]
+"""
+import argparse
+import sys
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pypssfss', description=__doc__.split('Usage')[0].strip())
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build-sysimage',
+                                help='build a custom Julia sysimage to remove first-call compilation latency')
+    build.add_argument('-q', '--quiet', action='store_true', help='suppress progress messages')
+
+    worker = commands.add_parser('worker', help='analyze the shards of sweeps queued in an SQLite work queue')
+    worker.add_argument('queue', help='the SQLite queue file')
+    worker.add_argument('--sweep', help='only take shards of this sweep')
+    worker.add_argument('--lease', type=float, default=3600.0,
+                        help='seconds after which an unfinished shard may be given to another worker (default 3600)')
+    worker.add_argument('--idle-timeout', type=float, default=None,
+                        help='exit after this many seconds without available shards (default: never)')
+    worker.add_argument('--max-tasks', type=int, default=None, help='exit after completing this many shards')
+
+    serve = commands.add_parser('serve', help='answer analysis requests of pypssfss.client from warm Julia sessions')
+    serve.add_argument('--address', help='Unix socket path or loopback HOST:PORT (default: $PYPSSFSS_SERVER or '
+                                         'a socket in the pypssfss cache directory)')
+    serve.add_argument('--workers', type=int, default=1,
+                       help='worker processes running analyses concurrently; 0 runs them in the server (default 1)')
+    serve.add_argument('--julia-threads', type=int, default=None, help='Julia threads of each worker')
+    serve.add_argument('--no-warmup', action='store_true', help='skip the warm-up analysis before serving')
+
+    args = parser.parse_args(argv)
+    if args.command == 'build-sysimage':
+        from .sysimage import build_sysimage
+        build_sysimage(verbose=not args.quiet)
+    elif args.command == 'worker':
+        from .sweep import run_worker, SQLiteQueue
+        done = run_worker(SQLiteQueue(args.queue), args.sweep, lease=args.lease, max_tasks=args.max_tasks,
+                          idle_timeout=args.idle_timeout)
+        print(f"{done} shard(s) completed")
+    elif args.command == 'serve':
+        from .server import serve
+        serve(args.address, args.workers, args.julia_threads, warmup=not args.no_warmup)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+This is the aio module.
+
+It provides asyncio-friendly versions of `analyze`, `extract_result` and the sheet constructors.  The Julia
+work runs on a dedicated executor thread with the Python GIL released while Julia computes, so the event
+loop stays responsive during long solves.
+
+Each AsyncAnalyzer accepts at most `max_pending` jobs (queued or running) at a time; further submissions wait
+until a slot frees up, which applies backpressure to producers.  Cancelling an awaiting task removes its job
+if it has not started yet.  A job that is already running cannot be interrupted: it runs to completion in
+the background, its result is discarded, and its slot is released when it finishes.  Slots belong to the
+event loop using the analyzer: when a later loop (e.g. another `asyncio.run`) uses it, it starts with all
+slots free, and jobs left over from the earlier loop are no longer counted.
+
+While asynchronous jobs are running, avoid calling Julia from other threads (including synchronous calls of
+the wrapped functions on the event loop thread).  Jobs run in a copy of the submitting task's context, so an
+active `profiling` profile records them.  Calling Julia off the main thread requires Julia signal handling,
+which creating an AsyncAnalyzer before Julia starts enables (see the session module); a RuntimeWarning is
+issued if it is off, i.e. if Julia was already started without it or `PYTHON_JULIACALL_HANDLE_SIGNALS=no`.
+
+The asynchronous `analyze` runs a single analysis: the `checkpoint`, `checkpoint_points`, `outputs` and
+`chunk_points` arguments of `analyze` are not supported (pass the results to `extract_result_async` instead).
+
+Available classes and functions:
+
+- AsyncAnalyzer
+- analyze_async
+- extract_result_async
+- diagstrip_async, jerusalemcross_async, loadedcross_async, manji_async, meander_async, pixels_async,
+  polyring_async, rectstrip_async, sinuous_async, splitring_async, sympixels_async
+"""
+import asyncio
+import contextvars
+import os
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import session, sheets
+
+# Arguments of analyze that the asynchronous version does not support:
+_UNSUPPORTED = ('checkpoint', 'checkpoint_points', 'outputs', 'chunk_points')
+
+
+def _analyze_job(strata, flist, steering, cache, kwargs):
+    from .pypssfss import _analyze
+    return _analyze(strata, flist, steering, cache, kwargs, unlocked=True)
+
+
+def _extract_job(results, outreq, columnar):
+    from .pypssfss import _extract
+    return _extract(results, outreq, columnar, unlocked=True)
+
+
+def _sheet_job(constructor: str, kwargs: dict):
+    sheets.fixsheetargs(kwargs)
+    return sheets._memoized(constructor, kwargs, unlocked=True)
+
+
+class AsyncAnalyzer:
+    """
+    Runs Julia work for coroutines on a single dedicated thread.
+
+    Parameters:
+        max_pending: int
+            Maximum number of jobs queued or running at once.  Further submissions wait for a free slot.
+    """
+
+    def __init__(self, max_pending: int = 32) -> None:
+        session._request_signal_handling()
+        if os.environ.get('PYTHON_JULIACALL_HANDLE_SIGNALS', 'yes').lower() == 'no':
+            warnings.warn("AsyncAnalyzer calls Julia off the main thread, which may crash with "
+                          "PYTHON_JULIACALL_HANDLE_SIGNALS=no", RuntimeWarning, stacklevel=2)
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pypssfss-julia')
+        self._loop = None
+        self._slots = None
+        self._pending = 0
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(max_pending={self.max_pending})"
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs currently queued or running."""
+        return self._pending
+
+    def _semaphore(self, loop) -> asyncio.Semaphore:
+        # A semaphore is bound to the loop that first waits on it, so each loop gets its own:
+        if loop is not self._loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._pending = 0
+        return self._slots
+
+    def _release(self, slots: asyncio.Semaphore) -> None:
+        if slots is self._slots:
+            self._pending -= 1
+        slots.release()
+
+    async def run(self, fn, *args):
+        """Run `fn(*args)` on the Julia thread once a slot is available, and return its result."""
+        loop = asyncio.get_running_loop()
+        slots = self._semaphore(loop)
+        await slots.acquire()
+        self._pending += 1
+
+        def release(_):
+            try:
+                loop.call_soon_threadsafe(self._release, slots)
+            except RuntimeError:  # Event loop already closed
+                pass
+
+        try:
+            future = self._executor.submit(contextvars.copy_context().run, fn, *args)
+        except BaseException:
+            self._release(slots)
+            raise
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    async def analyze(self, strata: list, flist, steering, cache=None, **kwargs):
+        """
+        Asynchronous version of `analyze`, taking the same arguments except `checkpoint`, `checkpoint_points`,
+        `outputs` and `chunk_points` (a TypeError is raised if they are given).
+        """
+        unsupported = [k for k in _UNSUPPORTED if k in kwargs]
+        if unsupported:
+            raise TypeError(f"analyze_async does not support the argument(s) {', '.join(unsupported)}")
+        return await self.run(_analyze_job, list(strata), flist, steering, cache, kwargs)
+
+    async def extract_result(self, results, outreq, columnar: bool = False) -> np.ndarray | dict:
+        """Asynchronous version of `extract_result`."""
+        return await self.run(_extract_job, results, outreq, columnar)
+
+    async def sheet(self, constructor: str, **kwargs) -> sheets.RWGSheet:
+        """Asynchronously call the named sheet constructor (e.g. 'polyring') with the given arguments."""
+        return await self.run(_sheet_job, constructor, kwargs)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the Julia thread, cancelling jobs that have not started."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_analyzer() -> AsyncAnalyzer:
+    """Return the AsyncAnalyzer used by the module-level functions."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = AsyncAnalyzer()
+        return _default
+
+
+async def analyze_async(strata: list, flist, steering, cache=None, **kwargs):
+    """
+    Asynchronous version of `analyze`, taking the same arguments except `checkpoint`, `checkpoint_points`,
+    `outputs` and `chunk_points`.  The analysis runs on the default AsyncAnalyzer's Julia thread with the GIL
+    released.  E.g.
+
+        results = await analyze_async(strata, flist, ThetaPhi(0, 0), logfile=devnull)
+    """
+    return await default_analyzer().analyze(strata, flist, steering, cache, **kwargs)
+
+
+async def extract_result_async(results, outreq, columnar: bool = False) -> np.ndarray | dict:
+    """Asynchronous version of `extract_result`, run on the default AsyncAnalyzer's Julia thread."""
+    return await default_analyzer().extract_result(results, outreq, columnar)
+
+
+def _async_constructor(name: str):
+    async def constructor(**kwargs) -> sheets.RWGSheet:
+        return await default_analyzer().sheet(name, **kwargs)
+    constructor.__name__ = constructor.__qualname__ = name + '_async'
+    constructor.__doc__ = (f"Asynchronous version of the `{name}` sheet constructor, taking the same keyword "
+                           "arguments and run on the default AsyncAnalyzer's Julia thread.")
+    return constructor
+
+
+diagstrip_async = _async_constructor('diagstrip')
+jerusalemcross_async = _async_constructor('jerusalemcross')
+loadedcross_async = _async_constructor('loadedcross')
+manji_async = _async_constructor('manji')
+meander_async = _async_constructor('meander')
+pixels_async = _async_constructor('pixels')
+polyring_async = _async_constructor('polyring')
+rectstrip_async = _async_constructor('rectstrip')
+sinuous_async = _async_constructor('sinuous')
+splitring_async = _async_constructor('splitring')
+sympixels_async = _async_constructor('sympixels')
@@ -0,0 +1,375 @@
+"""
+This is the cache module.
+
+It provides an opt-in, persistent, content-addressed cache of `analyze` results, and the two-level
+(memory and disk) cache used to memoize the sheet constructors.  Cache keys are SHA-256
+digests of the contents of the strata (every field of each `Layer` and `RWGSheet`, including the sheet mesh),
+the frequency list, the steering, and the keyword arguments that affect the results.  They do not depend on
+the identity of any Julia object, so the same design analyzed in another process, or by another script,
+hits the same entry.  Results are stored in the portable binary format of Julia's Serialization standard
+library.
+
+Available classes and functions:
+
+- DiskCache
+- MemoryCache
+- ResultCache
+- SheetCache
+- content_key
+"""
+import hashlib
+import numbers
+import os
+import tempfile
+import threading
+from collections import namedtuple, OrderedDict
+
+import numpy as np
+
+from .session import cache_dir, is_julia, lazy_seval
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'entries', 'size', 'maxsize'])
+CacheInfo.__doc__ = "A namedtuple with cache statistics, as returned by the cache_info method of a DiskCache"
+
+
+class DiskCache:
+    """
+    A directory of byte strings keyed by hexadecimal digests, limited to `maxsize` bytes in total.  When the
+    limit is exceeded the least recently used entries are evicted.  Access times are tracked through the file
+    modification times, so recency is shared between processes using the same directory.  The total size is
+    kept as a running count, so the directory is only scanned on the first `put` and when evicting.
+    """
+    suffix = '.bin'
+
+    def __init__(self, directory: str, maxsize: int = 2**30) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._size = None  # Total size of the entries, scanned on the first put
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.directory!r}, maxsize={self.maxsize})"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def _entries(self) -> list:
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(self.suffix) and entry.is_file():
+                    st = entry.stat()
+                    entries.append((st.st_mtime_ns, st.st_size, entry.path))
+        return entries
+
+    def get(self, key: str) -> bytes | None:
+        """Return the bytes stored under `key`, or None if there is no such entry."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store `data` under `key`, then evict least recently used entries to respect `maxsize`."""
+        if len(data) > self.maxsize:
+            return
+        path = self._path(key)
+        try:
+            old = os.stat(path).st_size
+        except OSError:
+            old = 0
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += len(data) - old
+            full = self._size > self.maxsize
+        if full:
+            self.evict()
+
+    def evict(self) -> None:
+        """Evict least recently used entries until the total size is at most `maxsize`."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.maxsize:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        with self._lock:
+            self._size = total
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def cache_info(self) -> CacheInfo:
+        """Return hit and miss counts of this instance, and the number and total size of stored entries."""
+        entries = self._entries()
+        return CacheInfo(self.hits, self.misses, len(entries), sum(size for _, size, _ in entries), self.maxsize)
+
+    def cache_clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.hits = self.misses = 0
+        self._size = None
+
+
+class MemoryCache:
+    """
+    An in-memory counterpart of DiskCache: byte strings keyed by hexadecimal digests, limited to `maxsize`
+    bytes in total, with least recently used entries evicted first.
+    """
+
+    def __init__(self, maxsize: int = 2**28) -> None:
+        self.maxsize = maxsize
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(maxsize={self.maxsize})"
+
+    def get(self, key: str) -> bytes | None:
+        """Return the bytes stored under `key`, or None if there is no such entry."""
+        with self._lock:
+            data = self._data.get(key)
+            if data is None:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+            return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store `data` under `key`, evicting least recently used entries to respect `maxsize`."""
+        if len(data) > self.maxsize:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._data[key] = data
+            self.size += len(data)
+            while self.size > self.maxsize:
+                _, evicted = self._data.popitem(last=False)
+                self.size -= len(evicted)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def cache_info(self) -> CacheInfo:
+        """Return hit and miss counts, and the number and total size of stored entries."""
+        return CacheInfo(self.hits, self.misses, len(self._data), self.size, self.maxsize)
+
+    def cache_clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        with self._lock:
+            self._data.clear()
+            self.size = self.hits = self.misses = 0
+
+
+# Julia function returning a canonical byte representation of the contents of a Julia value:
+_keybytes = lazy_seval("""
+    let
+        function keywrite(io, x::Union{Number, AbstractString, Symbol, Char, Nothing, Missing})
+            print(io, typeof(x), ':')
+            show(io, x)
+            write(io, 0x00)
+        end
+        function keywrite(io, x::AbstractArray)
+            print(io, typeof(x), size(x), ':')
+            if isbitstype(eltype(x)) && x isa DenseArray
+                write(io, x)
+            else
+                foreach(y -> keywrite(io, y), x)
+            end
+            write(io, 0x00)
+        end
+        function keywrite(io, x)
+            T = typeof(x)
+            print(io, T, '{')
+            if isstructtype(T) && fieldcount(T) > 0
+                for f in fieldnames(T)
+                    print(io, f, '=')
+                    isdefined(x, f) ? keywrite(io, getfield(x, f)) : print(io, "#undef")
+                end
+            else
+                show(io, x)
+            end
+            print(io, '}')
+        end
+        x -> (io = IOBuffer(); keywrite(io, x); take!(io))
+    end""")
+
+_versions = lazy_seval('string("julia=", VERSION, ",PSSFSS=", pkgversion(PSSFSS))')
+
+
+def _update(h, x) -> None:
+    """Feed a canonical representation of a Python or Julia value to the hash object `h`."""
+    from .sheets import RWGSheet
+    if isinstance(x, RWGSheet):
+        x = x.jRWGSheet
+    if is_julia(x):
+        h.update(b'J')
+        h.update(np.asarray(_keybytes(x)).tobytes())
+    elif isinstance(x, (str, bytes, bool)) or x is None:
+        h.update(repr(x).encode())
+    elif isinstance(x, dict):
+        h.update(b'{')
+        for k in sorted(x):
+            h.update(repr(k).encode())
+            _update(h, x[k])
+        h.update(b'}')
+    elif isinstance(x, tuple) and hasattr(x, '_fields'):
+        h.update(type(x).__name__.encode())
+        for f, v in zip(x._fields, x):
+            h.update(f.encode())
+            _update(h, v)
+    elif isinstance(x, (list, tuple)) and not all(isinstance(v, numbers.Number) for v in x):
+        h.update(b'[')
+        for v in x:
+            _update(h, v)
+        h.update(b']')
+    else:
+        a = np.asarray(x)
+        if a.dtype.kind in 'biuf':
+            a = a.astype(np.float64)
+        elif a.dtype.kind == 'c':
+            a = a.astype(np.complex128)
+        else:
+            h.update(repr(x).encode())
+            return
+        h.update(f'{a.dtype.str}{a.shape}'.encode())
+        h.update(np.ascontiguousarray(a).tobytes())
+    h.update(b'\x00')
+
+
+def content_key(*items) -> str:
+    """
+    Return a hexadecimal SHA-256 digest of the contents of `items`, which may be Julia values (hashed field
+    by field), RWGSheets, numbers, strings, arrays or other iterables of numbers, dicts and namedtuples.
+    The digest also covers the Julia and PSSFSS versions in use.
+    """
+    h = hashlib.sha256()
+    h.update(str(_versions.value).encode())
+    for x in items:
+        _update(h, x)
+    return h.hexdigest()
+
+
+class ResultCache(DiskCache):
+    """
+    Persistent cache of `analyze` results.  Pass an instance (or `True`, for a default instance) as the
+    `cache` keyword argument of `analyze`:
+
+        cache = ResultCache(maxsize=10*2**30)
+        results = analyze(strata, flist, steering, cache=cache)
+        cache.cache_info()
+
+    Parameters:
+        directory: str
+            Cache directory.  Defaults to the `results` subdirectory of the pypssfss cache directory
+            (see `session.cache_dir`).
+        maxsize: int
+            Maximum total size of the cached results in bytes.  Least recently used results are evicted
+            beyond this size.
+    """
+    suffix = '.jls'
+
+    # Keyword arguments of analyze that do not affect the results:
+    ignored_kwargs = frozenset(('logfile', 'resultfile', 'showprogress'))
+
+    def __init__(self, directory: str | None = None, maxsize: int = 2**30) -> None:
+        super().__init__(directory or cache_dir('results'), maxsize)
+
+    def key(self, strata: list, flist, steering, kwargs: dict) -> str:
+        """Return the cache key of an analysis."""
+        relevant = {k: v for (k, v) in kwargs.items() if k not in self.ignored_kwargs}
+        return content_key(list(strata), flist, steering, relevant)
+
+
+_default_cache = None
+
+
+def default_cache() -> ResultCache:
+    """Return the ResultCache used when `analyze` is called with `cache=True`."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
+
+
+class SheetCache:
+    """
+    Cache of serialized Julia RWGSheets used to memoize the sheet constructors.  Lookups try a MemoryCache
+    first and then, if `disk` is nonzero, a DiskCache; sheets found on disk are promoted to memory.  The disk
+    level is off by default.
+
+    Parameters:
+        memory: int
+            Maximum total size in bytes of the sheets held in memory (0 disables the memory level).
+        disk: int
+            Maximum total size in bytes of the sheets stored on disk (0 disables the disk level).
+        directory: str
+            Directory of the disk level.  Defaults to the `sheets` subdirectory of the pypssfss cache
+            directory (see `session.cache_dir`).
+    """
+
+    def __init__(self, memory: int = 2**28, disk: int = 0, directory: str | None = None) -> None:
+        self.memory = MemoryCache(memory) if memory > 0 else None
+        self.disk = DiskCache(directory or cache_dir('sheets'), disk) if disk > 0 else None
+        if self.disk is not None:
+            self.disk.suffix = '.jls'
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(memory={self.memory!r}, disk={self.disk!r})"
+
+    def get(self, key: str) -> bytes | None:
+        """Return the serialized sheet stored under `key`, or None if there is no such entry."""
+        data = None if self.memory is None else self.memory.get(key)
+        if data is None and self.disk is not None:
+            data = self.disk.get(key)
+            if data is not None and self.memory is not None:
+                self.memory.put(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store a serialized sheet under `key` at all enabled levels."""
+        for level in (self.memory, self.disk):
+            if level is not None:
+                level.put(key, data)
+
+    def cache_info(self) -> dict:
+        """Return a dict with the CacheInfo of the 'memory' and 'disk' levels (None for disabled levels)."""
+        return {'memory': None if self.memory is None else self.memory.cache_info(),
+                'disk': None if self.disk is None else self.disk.cache_info()}
+
+    def cache_clear(self) -> None:
+        """Remove all entries from all levels and reset the statistics."""
+        for level in (self.memory, self.disk):
+            if level is not None:
+                level.cache_clear()
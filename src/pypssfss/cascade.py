@@ -0,0 +1,272 @@
+"""
+This is the cascade module.
+
+It provides `analyze_cascade`, a fast alternative to `analyze` for sweeps in which only the dielectric layers
+change while the sheet geometries stay fixed, as in radome and polarizer design.  The generalized scattering
+matrix (GSM) of each sheet, embedded between the media of its two neighbouring layers, is computed by PSSFSS
+and cached, keyed on the sheet, those two media, the frequency and the incidence.  The stack is then
+assembled in NumPy by cascading the sheet GSMs with the GSMs of the dielectric interfaces and of the
+propagation through each layer.  Changing layer widths, or the properties of layers that do not touch a
+sheet, therefore costs only the cascade, and changing a layer next to a sheet re-solves only that sheet.
+
+The cascade keeps only the dominant TE and TM Floquet modes between blocks.  It agrees with `analyze` when
+the layers separating sheets from each other (and from dielectric interfaces) are thick enough for the
+higher-order Floquet modes to decay between them, which `analyze` itself accounts for.  `analyze_cascade`
+checks this: it warns when the least attenuated higher-order mode decays by less than `dbtol` dB across such a
+layer.  The GSMs use the conventions of PSSFSS (power-normalized modes, reference planes at the faces of the
+first and last layers), so e.g. 's11(te,te)' of a dielectric slab equals that computed by `analyze`.
+
+Available classes and functions:
+
+- analyze_cascade
+- GSMCache
+- cascade
+- interface_gsm
+- propagation_gsm
+"""
+import warnings
+
+import numpy as np
+
+from .cache import SheetCache, content_key
+from .session import cache_dir, is_julia, jl, lazy_seval
+from .steering import ThetaPhi, PhiTheta, Psi1Psi2, Psi2Psi1, points as steering_points
+from .store import S_NAMES
+
+C0 = 299792458.0  # Speed of light (m/s)
+
+_UNITS = {'mm': 1e-3, 'cm': 1e-2, 'inch': 0.0254, 'mil': 2.54e-5}
+
+# Julia function returning the complex permittivity and permeability and the width in meters of a Layer:
+_layer_params = lazy_seval("""
+    layer -> (ComplexF64(layer.ϵᵣ), ComplexF64(layer.μᵣ), Float64(layer.width.val))""")
+
+
+class GSMCache(SheetCache):
+    """
+    Cache of sheet GSMs used by `analyze_cascade`, with a memory level and an optional disk level.  The
+    parameters are those of SheetCache; the disk directory defaults to the `gsm` subdirectory of the
+    pypssfss cache directory.
+    """
+
+    def __init__(self, memory: int = 2**28, disk: int = 0, directory: str | None = None) -> None:
+        super().__init__(memory, disk, directory or (cache_dir('gsm') if disk > 0 else None))
+
+
+_default_cache = None
+
+
+def _gsm_cache(cache):
+    global _default_cache
+    if cache is False:
+        return None
+    if cache is None or cache is True:
+        if _default_cache is None:
+            _default_cache = GSMCache()
+        return _default_cache
+    return cache
+
+
+# GSMs with 2 modes (TE, TM) at each of 2 ports, as arrays of shape (points, 4, 4):
+def cascade(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Return the GSM of block `a` followed by block `b` (Redheffer star product), for arrays of GSMs."""
+    a11, a12, a21, a22 = a[:, :2, :2], a[:, :2, 2:], a[:, 2:, :2], a[:, 2:, 2:]
+    b11, b12, b21, b22 = b[:, :2, :2], b[:, :2, 2:], b[:, 2:, :2], b[:, 2:, 2:]
+    eye = np.eye(2)
+    x = np.linalg.inv(eye - b11 @ a22)
+    y = np.linalg.inv(eye - a22 @ b11)
+    top = np.concatenate([a11 + a12 @ x @ b11 @ a21, a12 @ x @ b12], axis=2)
+    bottom = np.concatenate([b21 @ y @ a21, b22 + b21 @ y @ a22 @ b12], axis=2)
+    return np.concatenate([top, bottom], axis=1)
+
+
+def _kz(k0: np.ndarray, kt: np.ndarray, eps: complex, mu: complex) -> np.ndarray:
+    kz = np.sqrt((k0**2 * eps * mu - kt**2).astype(complex))
+    return np.where(kz.imag > 0, -kz, kz)  # Decaying waves for the exp(jωt) time convention
+
+
+def interface_gsm(k0: np.ndarray, kt: np.ndarray, medium1: tuple, medium2: tuple) -> np.ndarray:
+    """
+    GSMs of the planar interface from `medium1` to `medium2` (each a tuple of complex relative permittivity
+    and permeability) for power-normalized TE and TM modes, at free-space wavenumbers `k0` and transverse
+    wavenumbers `kt`.
+    """
+    (e1, m1), (e2, m2) = medium1, medium2
+    kz1, kz2 = _kz(k0, kt, e1, m1), _kz(k0, kt, e2, m2)
+    s = np.zeros((len(k0), 4, 4), dtype=complex)
+    for mode, (z1, z2) in enumerate(((m1 / kz1, m2 / kz2), (kz1 / e1, kz2 / e2))):
+        gamma = (z2 - z1) / (z2 + z1)
+        tau = 2 * np.sqrt(z1 * z2) / (z1 + z2)
+        s[:, mode, mode], s[:, 2 + mode, 2 + mode] = gamma, -gamma
+        s[:, mode, 2 + mode] = s[:, 2 + mode, mode] = tau
+    return s
+
+
+def propagation_gsm(k0: np.ndarray, kt: np.ndarray, medium: tuple, width: float) -> np.ndarray:
+    """GSMs of a homogeneous layer of the given medium and width (m), between reference planes at its faces."""
+    p = np.exp(-1j * _kz(k0, kt, *medium) * width)
+    s = np.zeros((len(k0), 4, 4), dtype=complex)
+    for mode in (0, 1):
+        s[:, mode, 2 + mode] = s[:, 2 + mode, mode] = p
+    return s
+
+
+def _lattice(sheet) -> np.ndarray:
+    scale = _UNITS[str(sheet.units)]
+    return scale * np.array([sheet.s1, sheet.s2], dtype=np.float64)
+
+
+def _transverse(point, k0: np.ndarray, medium1: tuple, lattice: np.ndarray | None) -> tuple:
+    """Return the transverse wavenumbers and the incidence angles (theta, phi) in the first layer."""
+    n1 = np.sqrt((medium1[0] * medium1[1]).real)
+    if isinstance(point, (ThetaPhi, PhiTheta)):
+        return k0 * n1 * np.sin(np.radians(point.theta)), np.full_like(k0, point.theta), np.full_like(k0, point.phi)
+    if lattice is None:
+        raise ValueError("Psi1Psi2 and Psi2Psi1 steering require at least one sheet in the strata")
+    kxy = np.linalg.solve(lattice, np.radians([point.psi1, point.psi2]))
+    kt = np.full_like(k0, np.hypot(*kxy))
+    theta = np.degrees(np.arcsin(np.clip(kt / (k0 * n1), -1, 1)))
+    return kt, theta, np.full_like(k0, np.degrees(np.arctan2(kxy[1], kxy[0])))
+
+
+def _floquet_attenuation(k0: np.ndarray, kt: np.ndarray, phi: np.ndarray, lattice: np.ndarray, medium: tuple,
+                         width: float, orders: int = 2) -> np.ndarray:
+    """
+    Attenuation in dB across a layer of the given medium and width (m) of the least attenuated higher-order
+    Floquet mode of a lattice (rows: the lattice vectors in m), at each frequency.  Propagating higher-order
+    modes (grating lobes) give 0.
+    """
+    reciprocal = 2 * np.pi * np.linalg.inv(lattice).T
+    k2 = (k0**2 * medium[0] * medium[1]).real
+    kx, ky = kt * np.cos(np.radians(phi)), kt * np.sin(np.radians(phi))
+    alpha = np.full_like(k0, np.inf)
+    for m in range(-orders, orders + 1):
+        for n in range(-orders, orders + 1):
+            if m or n:
+                bx, by = m * reciprocal[0] + n * reciprocal[1]
+                alpha = np.minimum(alpha, np.sqrt(np.maximum((kx + bx)**2 + (ky + by)**2 - k2, 0.0)))
+    return 20 * np.log10(np.e) * alpha * width
+
+
+def _local_steering(point, medium1: tuple, medium: tuple):
+    """Steering of a sheet block whose first medium is `medium`, with the same transverse wavenumber."""
+    if isinstance(point, (Psi1Psi2, Psi2Psi1)):
+        return point
+    ratio = np.sqrt((medium1[0] * medium1[1]).real / (medium[0] * medium[1]).real)
+    s = ratio * np.sin(np.radians(point.theta))
+    if s > 1:
+        raise ValueError(f"incidence at theta = {point.theta} cannot be represented in a sheet's first medium")
+    return ThetaPhi(float(np.degrees(np.arcsin(s))), float(point.phi))
+
+
+def _medium_layer(medium: tuple):
+    eps, mu = medium
+    return jl.Layer(epsr=eps.real, tandel=-eps.imag / eps.real, mur=mu.real, mtandel=-mu.imag / mu.real)
+
+
+def _sheet_gsm(sheet, sheet_key: str, left: tuple, right: tuple, freqs: np.ndarray, steering,
+               cache) -> np.ndarray:
+    """GSMs of a sheet between two half-spaces, computed by PSSFSS for the frequencies missing from the cache."""
+    from .pypssfss import _analyze, _extract
+    keys = [content_key(sheet_key, left, right, float(f), steering) for f in freqs]
+    gsm = np.empty((len(freqs), 4, 4), dtype=complex)
+    missing = []
+    for i, key in enumerate(keys):
+        data = None if cache is None else cache.get(key)
+        if data is None:
+            missing.append(i)
+        else:
+            gsm[i] = np.frombuffer(data, dtype=np.complex128).reshape(4, 4)
+    if missing:
+        strata = [_medium_layer(left), sheet, _medium_layer(right)]
+        quiet = {'logfile': jl.devnull, 'resultfile': jl.devnull, 'showprogress': False}
+        results = _analyze(strata, freqs[missing], steering, None, quiet)
+        columns = _extract(results, ' '.join(S_NAMES), columnar=True)
+        S = np.stack([columns[name] for name in S_NAMES], axis=1).reshape(-1, 4, 2, 2)
+        for i, s in zip(missing, S):
+            gsm[i] = np.block([[s[0], s[1]], [s[2], s[3]]])
+            if cache is not None:
+                cache.put(keys[i], gsm[i].tobytes())
+    return gsm
+
+
+def analyze_cascade(strata: list, flist, steering, cache: GSMCache | bool | None = None,
+                    dbtol: float = 60.0) -> dict:
+    """
+    Analyze a stack like `analyze`, reusing cached sheet GSMs so that sweeps over dielectric layers need only
+    the cheap cascade step (see the module documentation for the approximation made).  E.g.
+
+        for w in widths:
+            strata = [Layer(), sheet, Layer(epsr=2.2, width=w*mm), sheet, Layer()]
+            data = analyze_cascade(strata, flist, ThetaPhi(30, 0))
+            s21 = data['s21(te,te)']
+
+    Parameters:
+        strata, flist, steering:
+            As for `analyze`.  Each sheet must lie between two Layers.
+        cache: GSMCache | bool
+            Cache of sheet GSMs.  Defaults to a module-wide in-memory GSMCache; pass a GSMCache with `disk`
+            nonzero to keep sheet GSMs between sessions, or False to disable caching.
+        dbtol: float
+            Minimum attenuation in dB, across each inner layer next to a sheet, of the higher-order Floquet
+            modes that the cascade neglects.  A warning is issued where it is not reached, since the results
+            may then differ from those of `analyze`.
+
+    Returns a dict of NumPy arrays with one entry per frequency/steering point, in the same order as
+    `analyze`: 'FGHz', 'theta' and 'phi' (the incidence angles in the first layer) and the complex scattering
+    parameters named in `store.S_NAMES` (e.g. 's21(te,te)'), where port 1 is the first layer and port 2 the last.
+    """
+    from .sheets import RWGSheet
+    cache = _gsm_cache(cache)
+    strata = [RWGSheet(s) if is_julia(s) and str(jl.nameof(jl.typeof(s))) == 'RWGSheet' else s for s in strata]
+    sheets = [i for i, s in enumerate(strata) if isinstance(s, RWGSheet)]
+    if (len(strata) < 2 or 0 in sheets or len(strata) - 1 in sheets
+            or any(j - i == 1 for i, j in zip(sheets, sheets[1:]))):
+        raise ValueError("the strata must begin and end with Layers, and each sheet must lie between two Layers")
+    params = {i: tuple(complex(v) if k < 2 else float(v) for k, v in enumerate(_layer_params(s)))
+              for i, s in enumerate(strata) if i not in sheets}
+    sheet_keys = {i: content_key(strata[i]) for i in sheets}
+    lattice = _lattice(strata[sheets[0]]) if sheets else None
+    medium1 = params[0][:2]
+
+    freqs = np.atleast_1d(np.asarray(flist, dtype=np.float64)).reshape(-1)
+    k0 = 2e9 * np.pi * freqs / C0
+    # Inner layers next to a sheet, across which the sheet's higher-order modes must decay:
+    gaps = [(j, i) for i in sheets for j in (i - 1, i + 1) if 0 < j < len(strata) - 1]
+    out = {'FGHz': [], 'theta': [], 'phi': [], 'S': []}
+    for point in steering_points(steering):
+        kt, theta, phi = _transverse(point, k0, medium1, lattice)
+        for j, i in gaps:
+            db = _floquet_attenuation(k0, kt, phi, _lattice(strata[i]), params[j][:2], params[j][2])
+            if np.min(db) < dbtol:
+                warnings.warn(f"analyze_cascade: higher-order Floquet modes of the sheet at strata[{i}] decay by "
+                              f"only {np.min(db):.1f} dB across strata[{j}] (dbtol={dbtol}); the neglected "
+                              "mode coupling may make the results differ from those of analyze", stacklevel=2)
+        total = None
+        for i in range(1, len(strata)):
+            if i in sheets:
+                left, right = params[i - 1][:2], params[i + 1][:2]
+                block = _sheet_gsm(strata[i], sheet_keys[i], left, right, freqs,
+                                   _local_steering(point, medium1, left), cache)
+            elif i - 1 in params:
+                block = interface_gsm(k0, kt, params[i - 1][:2], params[i][:2])
+            else:
+                block = None
+            if block is not None:
+                total = block if total is None else cascade(total, block)
+            if i in params and i < len(strata) - 1:
+                block = propagation_gsm(k0, kt, params[i][:2], params[i][2])
+                total = block if total is None else cascade(total, block)
+        out['FGHz'].append(freqs)
+        out['theta'].append(theta)
+        out['phi'].append(phi)
+        out['S'].append(total)
+    S = np.concatenate(out['S'])
+    data = {k: np.concatenate(out[k]) for k in ('FGHz', 'theta', 'phi')}
+    blocks = {'11': (0, 0), '12': (0, 2), '21': (2, 0), '22': (2, 2)}
+    modes = {'te': 0, 'tm': 1}
+    for name in S_NAMES:
+        r, c = blocks[name[1:3]]
+        a, b = name[4:-1].split(',')
+        data[name] = S[:, r + modes[a], c + modes[b]]
+    return data
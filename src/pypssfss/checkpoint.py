@@ -0,0 +1,114 @@
+"""
+This is the checkpoint module.
+
+It lets long `analyze` sweeps survive being killed.  With `analyze(..., checkpoint='sweep.ckpt')` the sweep is
+analyzed a chunk of points at a time and each completed chunk is appended to the checkpoint file.  Running the
+same call again (same strata, frequencies, steering and keyword arguments, identified by a content hash) loads
+the chunks already done and analyzes only the rest, returning the same result vector as an uninterrupted run.
+
+Available classes and functions:
+
+- Checkpoint
+- analyze_checkpointed
+"""
+import os
+import struct
+import warnings
+
+from .cache import content_key, ResultCache
+from .session import convert, jl
+from .sweep import shards, _vcat
+
+_MAGIC = b'PYPSSFSS-CHECKPOINT 1 '
+_LENGTH = struct.Struct('<Q')
+
+
+class Checkpoint:
+    """
+    An append-only checkpoint file holding the serialized results of the completed chunks of one analysis,
+    identified by `key`.  An existing file written for another key is discarded (with a warning), and a chunk
+    left incomplete by an interrupted write is dropped.
+    """
+
+    def __init__(self, path: str, key: str) -> None:
+        self.path = os.fspath(path)
+        self.key = key
+        self.chunks = []
+        header = _MAGIC + key.encode() + b'\n'
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            if data.startswith(header):
+                end = self._read_chunks(data, len(header))
+                if end < len(data):
+                    with open(self.path, 'r+b') as f:
+                        f.truncate(end)
+                return
+            warnings.warn(f"Discarding checkpoint {self.path}, which was written for a different analysis")
+        with open(self.path, 'wb') as f:
+            f.write(header)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.path!r} with {len(self.chunks)} chunks>"
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def _read_chunks(self, data: bytes, pos: int) -> int:
+        while pos + _LENGTH.size <= len(data):
+            n, = _LENGTH.unpack_from(data, pos)
+            if pos + _LENGTH.size + n > len(data):
+                break
+            self.chunks.append(data[pos + _LENGTH.size:pos + _LENGTH.size + n])
+            pos += _LENGTH.size + n
+        return pos
+
+    def append(self, data: bytes) -> None:
+        """Durably add the serialized results of the next chunk."""
+        with open(self.path, 'ab') as f:
+            f.write(_LENGTH.pack(len(data)) + data)
+            f.flush()
+            os.fsync(f.fileno())
+        self.chunks.append(data)
+
+
+def analyze_checkpointed(strata: list, flist, steering, checkpoint: str, checkpoint_points: int = 100,
+                         cache=None, **kwargs):
+    """
+    Implementation of `analyze` with a `checkpoint` file.  The sweep is split into chunks of at most
+    `checkpoint_points` frequencies at one steering point, analyzed in the order of `analyze`.  `cache`, if
+    given, applies to each chunk.  `logfile`, if a file name, receives the logs of the chunks analyzed by this
+    call, and `resultfile` is written once all chunks are done.
+    """
+    from .pypssfss import _analyze, _write_result
+    from .session import deserialize, serialize
+    relevant = {k: v for (k, v) in kwargs.items() if k not in ResultCache.ignored_kwargs}
+    key = content_key(list(strata), flist, steering, relevant, checkpoint_points)
+    ckpt = Checkpoint(checkpoint, key)
+    parts = [deserialize(data) for data in ckpt.chunks]
+    todo = shards(flist, steering, checkpoint_points)[len(parts):]
+
+    resultfile = kwargs.pop('resultfile', 'pssfss.res')
+    logfile = kwargs.pop('logfile', 'pssfss.log')
+    logio = jl.open(logfile, "a") if isinstance(logfile, str) else logfile
+    try:
+        for shard in todo:
+            results = _analyze(strata, shard.flist, shard.steering, cache,
+                               dict(kwargs, logfile=logio, resultfile=jl.devnull))
+            ckpt.append(serialize(results))
+            parts.append(results)
+    finally:
+        if isinstance(logfile, str):
+            jl.close(logio)
+
+    results = _vcat(convert(jl.Vector, parts))
+    resultio = jl.open(resultfile, "w") if isinstance(resultfile, str) else resultfile
+    try:
+        for result in results:
+            _write_result(resultio, result)
+    finally:
+        if isinstance(resultfile, str):
+            jl.close(resultio)
+    return results
@@ -0,0 +1,229 @@
+"""
+This is the client module.
+
+It is a thin client of the pypssfss server (`python -m pypssfss serve`, see the server module), which keeps warm
+Julia sessions with PSSFSS loaded.  The client never imports juliacall or starts Julia, so short scripts get
+results of small analyses without paying for Julia start-up and compilation:
+
+    from pypssfss import client as pc
+
+    strata = [pc.Layer(), pc.polyring(s1=[10, 0], s2=[0, 10], a=[3], b=[4], sides=12, ntri=600, units=pc.mm),
+              pc.Layer(epsr=2.2, width=1*pc.mm), pc.Layer()]
+    data = pc.analyze(strata, np.linspace(8, 12, 21), pc.ThetaPhi(0, 0), 'FGHz s21db(te,te)')
+    data['s21db(te,te)']     # NumPy array
+
+`Layer` and the sheet functions of this module only describe layers and sheets, which are built by the server.
+Lengths are given with the units of this module (`3*pc.mm`).  Messages are a length-prefixed JSON header
+followed by the raw bytes of any NumPy arrays, sent over a Unix socket or a localhost TCP port.
+
+Available classes and functions:
+
+- Client
+- connect
+- analyze
+- default_address
+- Layer, diagstrip, jerusalemcross, loadedcross, manji, meander, pecsheet, pixels, pmcsheet, polyring,
+  rectstrip, sinuous, splitring, sympixels
+- mm, cm, inch, mil
+"""
+import json
+import os
+import re
+import socket
+import struct
+
+import numpy as np
+
+from .steering import ThetaPhi, PhiTheta, Psi1Psi2, Psi2Psi1  # noqa: F401 (re-exported for clients)
+
+_LENGTH = struct.Struct('<Q')
+
+SHEETS = ('diagstrip', 'jerusalemcross', 'loadedcross', 'manji', 'meander', 'pecsheet', 'pixels', 'pmcsheet',
+          'polyring', 'rectstrip', 'sinuous', 'splitring', 'sympixels')
+UNITS = ('mm', 'cm', 'inch', 'mil')
+
+
+def default_address() -> str:
+    """
+    Return the address used when none is given: the `PYPSSFSS_SERVER` environment variable if set, otherwise a
+    Unix socket in the pypssfss cache directory (or `localhost:8765` where Unix sockets are unavailable).
+    """
+    if os.environ.get('PYPSSFSS_SERVER'):
+        return os.environ['PYPSSFSS_SERVER']
+    if hasattr(socket, 'AF_UNIX'):
+        from .session import cache_dir
+        return os.path.join(cache_dir('server'), 'pypssfss.sock')
+    return 'localhost:8765'
+
+
+def tcp_address(address: str) -> tuple | None:
+    """Return `(host, port)` if `address` has the form `host:port`, or None for a Unix socket path."""
+    match = re.fullmatch(r'([\w.\-]+|\[[0-9a-fA-F:]+\]):(\d+)', address)
+    return (match.group(1).strip('[]'), int(match.group(2))) if match else None
+
+
+# Messages:
+def send_message(f, header: dict, arrays: dict | None = None) -> None:
+    """Write a message (a JSON-serializable dict and optional NumPy arrays) to the binary file `f`."""
+    arrays = {k: np.ascontiguousarray(v) for (k, v) in (arrays or {}).items()}
+    header = dict(header, arrays=[[k, v.dtype.str, list(v.shape)] for (k, v) in arrays.items()])
+    data = json.dumps(header).encode()
+    f.write(_LENGTH.pack(len(data)) + data)
+    for v in arrays.values():
+        f.write(v.tobytes())
+    f.flush()
+
+
+def _read(f, n: int) -> bytes:
+    data = f.read(n)
+    if len(data) < n:
+        raise EOFError("connection closed")
+    return data
+
+
+def recv_message(f) -> tuple:
+    """Read a message written by `send_message`; return the header dict and a dict of NumPy arrays."""
+    n, = _LENGTH.unpack(_read(f, _LENGTH.size))
+    header = json.loads(_read(f, n))
+    arrays = {}
+    for name, dtype, shape in header.pop('arrays', []):
+        dt = np.dtype(dtype)
+        if dt.hasobject:
+            raise ValueError(f"unsupported array dtype {dtype}")
+        count = int(np.prod(shape, dtype=np.int64))
+        arrays[name] = np.frombuffer(_read(f, count * dt.itemsize), dtype=dt).reshape(shape)
+    return header, arrays
+
+
+# Descriptions of layers and sheets:
+class Unit:
+    """A length unit of the client.  Multiplying a number, list or array by it gives a length description."""
+    # Make NumPy defer to __rmul__ for `array * unit`:
+    __array_ufunc__ = None
+
+    def __init__(self, label: str) -> None:
+        self.label = label
+
+    def __rmul__(self, value):
+        return {'value': np.asarray(value, dtype=np.float64).tolist(), 'units': self.label}
+
+    __mul__ = __rmul__
+
+    def __repr__(self) -> str:
+        return self.label
+
+
+mm, cm, inch, mil = (Unit(label) for label in UNITS)
+
+
+def _encode(v):
+    if isinstance(v, Unit) or type(v).__name__ == 'pssfss_units':
+        return {'units': v.label}
+    if isinstance(v, np.ndarray):
+        return {'array': v.tolist(), 'dtype': v.dtype.str}
+    if isinstance(v, np.generic):
+        return v.item()
+    if isinstance(v, (list, tuple)):
+        return [_encode(x) for x in v]
+    if isinstance(v, dict):
+        return {k: _encode(x) for (k, x) in v.items()}
+    return v
+
+
+def Layer(**kwargs) -> dict:
+    """Describe a `Layer` (see `pypssfss.Layer`), to be built by the server."""
+    return {'type': 'Layer', 'kwargs': _encode(kwargs)}
+
+
+def _sheet(name: str):
+    def describe(**kwargs) -> dict:
+        return {'type': name, 'kwargs': _encode(kwargs)}
+    describe.__name__ = name
+    describe.__doc__ = f"Describe a `{name}` sheet (see `pypssfss.{name}`), to be built by the server."
+    return describe
+
+
+(diagstrip, jerusalemcross, loadedcross, manji, meander, pecsheet, pixels, pmcsheet, polyring, rectstrip,
+ sinuous, splitring, sympixels) = (_sheet(name) for name in SHEETS)
+
+
+class Client:
+    """
+    A connection to a pypssfss server at `address` (default: `default_address()`), which is either the path
+    of a Unix socket or `host:port`.  Use as a context manager, or call `close`.
+    """
+
+    def __init__(self, address: str | None = None, timeout: float | None = None) -> None:
+        self.address = address or default_address()
+        tcp = tcp_address(self.address)
+        if tcp is None:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(self.address)
+        else:
+            self._sock = socket.create_connection(tcp, timeout=timeout)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._sock.makefile('rwb')
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.address!r})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+        self._sock.close()
+
+    def request(self, header: dict, arrays: dict | None = None) -> tuple:
+        """Send a request and return the reply header and arrays; raise RuntimeError if the server failed."""
+        send_message(self._file, header, arrays)
+        reply, arrays = recv_message(self._file)
+        if not reply.get('ok'):
+            raise RuntimeError(f"pypssfss server: {reply.get('error')}")
+        return reply, arrays
+
+    def ping(self) -> dict:
+        """Return the server's description of itself (version and number of sessions)."""
+        return self.request({'op': 'ping'})[0]
+
+    def analyze(self, strata: list, flist, steering, outputs: str, **kwargs) -> dict:
+        """
+        Analyze on the server and return the requested outputs as a dict of NumPy columns, as
+        `extract_result(analyze(strata, flist, steering, **kwargs), outputs, columnar=True)` would.  `strata`
+        holds descriptions made with `Layer` and the sheet functions of this module.  The server only accepts
+        the keyword arguments `cache` (a bool), `chunk_points` and `showprogress`; logs and result files are
+        not written.
+        """
+        job = {'op': 'analyze', 'strata': _encode(list(strata)), 'outputs': outputs, 'kwargs': _encode(kwargs),
+               'steering': {'type': type(steering).__name__, 'values': _encode(list(steering))}}
+        flist = np.atleast_1d(np.asarray(flist, dtype=np.float64))
+        return self.request(job, {'flist': flist})[1]
+
+    def shutdown(self) -> None:
+        """Ask the server to stop."""
+        self.request({'op': 'shutdown'})
+
+
+_client = None
+
+
+def connect(address: str | None = None, timeout: float | None = None) -> Client:
+    """Return a new Client connected to the server."""
+    return Client(address, timeout)
+
+
+def analyze(strata: list, flist, steering, outputs: str, address: str | None = None, **kwargs) -> dict:
+    """
+    Analyze on the server using a connection kept open between calls; see `Client.analyze`.
+    """
+    global _client
+    address = address or default_address()
+    if _client is None or _client.address != address:
+        if _client is not None:
+            _client.close()
+        _client = Client(address)
+    return _client.analyze(strata, flist, steering, outputs, **kwargs)
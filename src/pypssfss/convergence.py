@@ -0,0 +1,92 @@
+"""
+This is the convergence module.
+
+It finds the coarsest triangulation of a sheet that gives converged results.  The sheet is built at increasing
+`ntri` values and analyzed at a few test frequencies and incidence angles, until the requested outputs change by
+less than a tolerance between consecutive levels:
+
+    build = lambda ntri: polyring(s1=[10, 0], s2=[0, 10], a=[3], b=[4], sides=12, ntri=ntri, units=mm)
+    conv = converge_mesh(build, [Layer(), None, Layer(epsr=2.2, width=1*mm), Layer()],
+                         [8, 12, 16], ThetaPhi([0, 45], 0), 's21db(te,te) s21db(tm,tm)', atol=0.05)
+    sheet = conv.sheet
+
+Available classes and functions:
+
+- MeshConvergence
+- converge_mesh
+"""
+import warnings
+from collections import namedtuple
+
+import numpy as np
+
+MeshConvergence = namedtuple('MeshConvergence', ['sheet', 'ntri', 'converged', 'history'])
+MeshConvergence.__doc__ = """
+A namedtuple returned by `converge_mesh`: the smallest converged `sheet`, the `ntri` it was built with, whether
+convergence was reached (`converged`), and the `history` of the refinement, a list of `(ntri, change)` pairs
+where `change` is the largest change of any output from the previous level as a multiple of the tolerance
+(None for the first level), so that values of at most 1 mean convergence.
+"""
+
+
+def _change(new: dict, old: dict, rtol: float, atol: float) -> float:
+    """Largest change of any output, as a multiple of the tolerance `atol + rtol * |old|`."""
+    tiny = np.finfo(np.float64).tiny
+    return max(float(np.max(np.abs(new[k] - old[k]) / np.maximum(atol + rtol * np.abs(old[k]), tiny)))
+               for k in new)
+
+
+def converge_mesh(build, strata, flist, steering, outputs: str, ntri=(250, 500, 1000, 2000, 4000, 8000),
+                  rtol: float = 0.01, atol: float = 0.0, cache=True, **kwargs) -> MeshConvergence:
+    """
+    Return the sheet built with the smallest `ntri` whose analysis results agree with those of the next
+    refinement level to within the tolerance.
+
+    Parameters:
+        build: callable
+            Function of `ntri` returning the sheet, e.g. a lambda calling `polyring`, `jerusalemcross` or
+            `sinuous` with all other arguments fixed.
+        strata: list | callable
+            The test strata, with `None` at the position(s) of the sheet, or a function of the sheet returning
+            the strata.
+        flist, steering:
+            The test frequencies and incidence angles, passed to `analyze`.  A few points spanning the
+            intended band and scan range suffice.
+        outputs: str
+            The `@outputs` requests whose convergence is checked, as passed to `atoutputs`.
+        ntri: iterable of int
+            The refinement levels, in increasing order.
+        rtol, atol: float
+            Outputs have converged when every value changes between consecutive levels by at most
+            `atol + rtol * |previous value|`, as in `numpy.isclose`.  Use `atol` for outputs near zero and for
+            outputs in dB or degrees.
+        cache:
+            Passed to `analyze` (default True, the default ResultCache), so repeating a convergence study
+            reuses the results of the levels already analyzed.  Sheets are reused through the sheet cache.
+
+    Other keyword arguments are passed to `analyze`; `logfile` and `resultfile` default to `devnull` and
+    `showprogress` to False.  If the largest level is reached without convergence, a warning is issued and the
+    largest sheet is returned with `converged=False`.
+    """
+    from . import pypssfss
+    kwargs.setdefault('logfile', pypssfss.jl.devnull)
+    kwargs.setdefault('resultfile', pypssfss.jl.devnull)
+    kwargs.setdefault('showprogress', False)
+    outreq = pypssfss.atoutputs(outputs)
+    history = []
+    previous = None
+    for n in ntri:
+        sheet = build(n)
+        layers = strata(sheet) if callable(strata) else [sheet if s is None else s for s in strata]
+        results = pypssfss.analyze(layers, flist, steering, cache=cache, **kwargs)
+        values = pypssfss.extract_result(results, outreq, columnar=True)
+        if previous is None:
+            history.append((n, None))
+        else:
+            change = _change(values, previous[2], rtol, atol)
+            history.append((n, change))
+            if change <= 1:
+                return MeshConvergence(previous[1], previous[0], True, history)
+        previous = (n, sheet, values)
+    warnings.warn(f"Outputs {outputs!r} did not converge up to ntri={previous[0]}")
+    return MeshConvergence(previous[1], previous[0], False, history)
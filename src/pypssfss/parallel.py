@@ -0,0 +1,359 @@
+"""
+This is the parallel module.
+
+It runs many independent analyses, and batch conversions of results to TICRA TEP files and HFSS SBR+ Fresnel
+tables, on a pool of worker processes, each with its own warm Julia session.  Pools are kept alive and reused by
+later calls with the same configuration.
+
+Available classes and functions:
+
+- Design
+- Conversion
+- AnalysisPool
+- analyze_many
+- res2tep_many
+- res2fresnel_many
+- portable
+"""
+import glob
+import itertools
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent import futures
+
+import numpy as np
+
+from .session import JuliaBlob, is_julia
+from .threads import thread_budget
+
+Design = namedtuple('Design', ['strata', 'flist', 'steering', 'kwargs'], defaults=(None,))
+Design.__doc__ = """
+A namedtuple describing one analysis for `analyze_many`: the `strata`, `flist` and `steering` arguments of
+`analyze`, plus an optional dict of keyword arguments `kwargs`.  `strata` may also be a picklable callable
+(e.g. a module-level function or a functools.partial of one) returning the strata list, in which case the
+Layers and sheets are built in the worker process.
+"""
+
+
+def portable(x):
+    """
+    Return a picklable version of `x`: Julia values (such as Layers) become JuliaBlobs, recursively through
+    lists, tuples and dict values.  RWGSheets are picklable as they are.
+    """
+    if is_julia(x):
+        return JuliaBlob.from_value(x)
+    if isinstance(x, list):
+        return [portable(v) for v in x]
+    if isinstance(x, tuple) and not hasattr(x, '_fields'):
+        return tuple(portable(v) for v in x)
+    if isinstance(x, dict):
+        return {k: portable(v) for (k, v) in x.items()}
+    return x
+
+
+def _restore(x):
+    """Inverse of `portable`, applied in the worker process."""
+    if isinstance(x, JuliaBlob):
+        return x.load()
+    if isinstance(x, list):
+        return [_restore(v) for v in x]
+    if isinstance(x, tuple) and not hasattr(x, '_fields'):
+        return tuple(_restore(v) for v in x)
+    if isinstance(x, dict):
+        return {k: _restore(v) for (k, v) in x.items()}
+    return x
+
+
+def _as_design(d) -> Design:
+    if isinstance(d, Design):
+        return d
+    if isinstance(d, dict):
+        return Design(**d)
+    return Design(*d)
+
+
+# Worker side:
+def _init_worker(julia_threads: int, blas_threads: int | None) -> None:
+    os.environ["PYTHON_JULIACALL_THREADS"] = str(julia_threads)
+    if blas_threads:
+        os.environ["PYPSSFSS_BLAS_THREADS"] = str(blas_threads)
+    from .session import start
+    start()
+
+
+def _run_design(design: Design, outputs: str | None):
+    from .pypssfss import analyze, atoutputs, extract_result
+    from .session import jl
+    strata = design.strata() if callable(design.strata) else _restore(design.strata)
+    kwargs = {'logfile': jl.devnull, 'resultfile': jl.devnull, 'showprogress': False}
+    kwargs.update(_restore(design.kwargs or {}))
+    results = analyze(strata, design.flist, design.steering, **kwargs)
+    if outputs is None:
+        return JuliaBlob.from_value(results)
+    return np.asarray(extract_result(results, atoutputs(outputs)))
+
+
+class AnalysisPool:
+    """
+    A pool of worker processes for running analyses in parallel.
+
+    Parameters:
+        workers: int
+            Number of worker processes.  Defaults to the number of CPU cores divided by `julia_threads`.
+        julia_threads: int
+            Number of Julia threads in each worker.  Defaults to 1, which is usually the most efficient
+            split when there are at least as many designs as cores.
+        blas_threads: int
+            Number of BLAS threads in each worker.  Defaults to 1, so that the workers' Julia and BLAS threads
+            together do not oversubscribe the cores.
+
+    If a thread budget has been set with `threads.configure_threads`, the defaults are taken from it instead.
+
+    Each worker starts its Julia session (loading PSSFSS) when the worker process starts and keeps it for
+    the lifetime of the pool, so only the first analyses on a pool pay the start-up cost.  Use `shutdown`
+    (or a `with` block) to stop the workers.
+    """
+
+    def __init__(self, workers: int | None = None, julia_threads: int | None = None,
+                 blas_threads: int | None = None) -> None:
+        budget = thread_budget()
+        if budget is not None:
+            self.workers = workers or budget.workers
+            self.julia_threads = julia_threads or max(1, budget.julia_threads // self.workers)
+            self.blas_threads = blas_threads or max(1, budget.blas_threads // self.workers)
+        else:
+            cores = os.cpu_count() or 1
+            self.julia_threads = julia_threads or 1
+            self.workers = workers or max(1, cores // self.julia_threads)
+            self.blas_threads = blas_threads or 1
+        self._executor = futures.ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'),
+                                                     initializer=_init_worker,
+                                                     initargs=(self.julia_threads, self.blas_threads))
+
+    def __repr__(self) -> str:
+        return (f"{type(self).__name__}(workers={self.workers}, julia_threads={self.julia_threads}, "
+                f"blas_threads={self.blas_threads})")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker processes."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def apply(self, fn, *args):
+        """Run the picklable function `fn(*args)` in a worker; return a concurrent.futures.Future."""
+        return self._executor.submit(fn, *args)
+
+    def submit(self, design, outputs: str | None = None):
+        """Submit one design (a Design or equivalent tuple or dict); return a concurrent.futures.Future."""
+        d = _as_design(design)
+        d = d._replace(strata=d.strata if callable(d.strata) else portable(d.strata),
+                       kwargs=portable(d.kwargs))
+        return self._executor.submit(_run_design, d, outputs)
+
+    def imap(self, designs, outputs: str | None = None, ordered: bool = True):
+        """
+        Analyze the designs, yielding `(index, result)` pairs either in submission order (`ordered=True`)
+        or as the analyses complete.  See `analyze_many` for the form of the results.
+        """
+        submitted = {self.submit(d, outputs): i for (i, d) in enumerate(designs)}
+        pending = sorted(submitted, key=submitted.get) if ordered else futures.as_completed(submitted)
+        for future in pending:
+            yield submitted[future], _result(future.result())
+
+
+def _result(value):
+    return value.load() if isinstance(value, JuliaBlob) else value
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(workers: int | None = None, julia_threads: int | None = None) -> AnalysisPool:
+    """Return the shared AnalysisPool with the given configuration, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get((workers, julia_threads))
+        if pool is None:
+            pool = _pools[(workers, julia_threads)] = AnalysisPool(workers, julia_threads)
+        return pool
+
+
+def shutdown_pools() -> None:
+    """Stop the worker processes of all shared pools."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown()
+        _pools.clear()
+
+
+def analyze_many(designs, outputs: str | None = None, workers: int | None = None,
+                 julia_threads: int | None = None, as_completed: bool = False):
+    """
+    Analyze many independent designs in parallel on a pool of worker processes.
+
+    Parameters:
+        designs: iterable
+            The analyses to perform.  Each is a `Design`, or an equivalent tuple
+            `(strata, flist, steering[, kwargs])` or dict.  Layers are sent to the workers in serialized form
+            (see `portable`); alternatively `strata` can be a picklable callable that builds the strata in
+            the worker.  `logfile` and `resultfile` default to `devnull` and `showprogress` to False.
+        outputs: str
+            Optional string of `@outputs` requests, as passed to `atoutputs`.  If given, each result is the
+            NumPy array returned by `extract_result` in the worker, and no Julia session is needed in the
+            calling process.  Otherwise each result is the vector of Julia results returned by `analyze`.
+        workers, julia_threads: int
+            Number of worker processes and number of Julia threads per worker; see `AnalysisPool`.  Pools
+            are shared between calls with the same values.
+        as_completed: bool
+            If False (the default), return a list of results in the order of `designs`.  If True, return
+            an iterator of `(index, result)` pairs in order of completion.
+    """
+    pool = get_pool(workers, julia_threads)
+    if as_completed:
+        return pool.imap(designs, outputs, ordered=False)
+    return [result for _, result in pool.imap(designs, outputs)]
+
+
+Conversion = namedtuple('Conversion', ['source', 'target', 'seconds', 'error'])
+Conversion.__doc__ = """
+A namedtuple reporting one conversion by `res2tep_many` or `res2fresnel_many`: the `source` (file name, or index
+of an in-memory result vector), the `target` file written, the time taken in seconds, and `error`, which is
+None on success or a message describing the failure.
+"""
+
+_extensions = {'res2tep': '.tep', 'res2fresnel': '.rttbl'}
+
+
+def _convert(function: str, source, target: str, kwargs: dict) -> tuple:
+    """Worker side of the batch conversions: write `target` atomically and time the conversion."""
+    from . import pypssfss
+    t0 = time.perf_counter()
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(target)), suffix='.tmp')
+    os.close(fd)
+    try:
+        getattr(pypssfss, function)(_restore(source), tmp, **kwargs)
+        os.replace(tmp, target)
+    except Exception as err:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return time.perf_counter() - t0, f"{type(err).__name__}: {err}"
+    return time.perf_counter() - t0, None
+
+
+# Source of a glob pattern matching no file:
+_UNMATCHED = object()
+
+
+def _sources(sources) -> list:
+    """
+    Expand glob patterns among `sources`; return (label, source) pairs.  A pattern matching no file gives
+    the pair (pattern, _UNMATCHED).
+    """
+    if isinstance(sources, (str, os.PathLike)) or is_julia(sources):
+        sources = [sources]
+    expanded = []
+    for i, source in enumerate(sources):
+        if isinstance(source, (str, os.PathLike)):
+            source = os.fspath(source)
+            matches = sorted(glob.glob(source)) if glob.has_magic(source) else [source]
+            expanded.extend((m, m) for m in matches)
+            if not matches:
+                expanded.append((source, _UNMATCHED))
+        else:
+            expanded.append((i, source))
+    return expanded
+
+
+def _default_target(function: str, label, outdir: str | None) -> str:
+    """Output file of a conversion: next to the source file or store directory (or in `outdir`)."""
+    if isinstance(label, str):
+        path = os.path.normpath(label)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        directory = outdir or os.path.dirname(path)
+    else:
+        stem, directory = f'results{label}', outdir or os.curdir
+    return os.path.join(directory, stem + _extensions[function])
+
+
+def _convert_many(function: str, sources, targets, outdir, workers, julia_threads, as_completed, kwargs):
+    jobs = _sources(sources)
+    found = [i for i, (_, source) in enumerate(jobs) if source is not _UNMATCHED]
+    if targets is None:
+        targets = [_default_target(function, jobs[i][0], outdir) for i in found]
+    elif len(targets) != len(found):
+        raise ValueError(f"{len(targets)} targets given for {len(found)} sources")
+    targets = dict(zip(found, targets))
+    pool = get_pool(workers, julia_threads) if found else None
+    submitted = {pool.apply(_convert, function, portable(jobs[i][1]), targets[i], kwargs): i for i in found}
+    # Patterns matching no file fail like missing files, without a target:
+    unmatched = {i: (0.0, f"FileNotFoundError: no file matches {jobs[i][0]!r}") for i in range(len(jobs))
+                 if i not in targets}
+    futures_by_index = {i: future for future, i in submitted.items()}
+
+    def outcome(i: int) -> tuple:
+        if i in unmatched:
+            return unmatched[i]
+        try:
+            return futures_by_index[i].result()
+        except Exception as err:  # E.g. a worker process that died
+            return float('nan'), f"{type(err).__name__}: {err}"
+
+    def reports():
+        if as_completed:
+            order = itertools.chain(unmatched, (submitted[f] for f in futures.as_completed(submitted)))
+        else:
+            order = range(len(jobs))
+        for i in order:
+            seconds, error = outcome(i)
+            yield Conversion(jobs[i][0], targets.get(i), seconds, error)
+
+    return reports() if as_completed else list(reports())
+
+
+def res2tep_many(sources, targets: list | None = None, outdir: str | None = None, workers: int | None = None,
+                 julia_threads: int | None = None, as_completed: bool = False, name: str = "tep",
+                 clas: str = "res2tep"):
+    """
+    Convert many result files (or in-memory result vectors) to TICRA TEP files in parallel, using the worker
+    pool of `analyze_many`.  Each conversion is written by its worker directly to a temporary file that is
+    renamed to the target on success, so no table passes through the calling process.  A failed conversion
+    is reported and the batch continues.
+
+    Parameters:
+        sources: str | list
+            PSSFSS result file names, glob patterns (e.g. `'runs/*.res'`), result store directories, or vectors
+            of results returned by `analyze`, or a list of these.
+        targets: list
+            Output file names, one per source after glob expansion.  A glob pattern matching no file is
+            reported as a failed conversion with target None, and takes no target.  By default each file source gives a file
+            of the same name with extension `.tep` (in `outdir` if given), and the i-th in-memory result vector
+            gives `results<i>.tep` in `outdir` (default: the current directory).
+        workers, julia_threads: int
+            See `AnalysisPool`.
+        as_completed: bool
+            If False (the default), return a list of `Conversion` reports in the order of the sources.
+            If True, return an iterator of reports in order of completion.
+        name, clas: str
+            Passed to `res2tep` for every conversion.
+    """
+    return _convert_many('res2tep', sources, targets, outdir, workers, julia_threads, as_completed,
+                         {'name': name, 'clas': clas})
+
+
+def res2fresnel_many(sources, targets: list | None = None, outdir: str | None = None, workers: int | None = None,
+                     julia_threads: int | None = None, as_completed: bool = False):
+    """
+    Convert many result files (or in-memory result vectors) to HFSS SBR+ Fresnel tables in parallel.  The
+    arguments are those of `res2tep_many`; default target files have the extension `.rttbl`.
+    """
+    return _convert_many('res2fresnel', sources, targets, outdir, workers, julia_threads, as_completed, {})
@@ -0,0 +1,175 @@
+"""
+This is the profiling module.
+
+It records where the time of `analyze` and `extract_result` calls goes: in the Python wrapper (conversion of
+arguments, cache lookups, conversion of results) and in Julia, where the time of each call is split into JIT
+compilation, garbage collection and the remaining computation, together with the bytes allocated.  Profiling
+is enabled for the calls made inside a `profiling` block, so a whole batch of runs can be profiled at once:
+
+    with profiling() as prof:
+        results = analyze(strata, flist, steering)
+        data = extract_result(results, 'FGHz s21dB(te,te)')
+    print(prof.report())
+    prof.to_chrome_trace('analyze.trace.json')   # open in chrome://tracing or https://ui.perfetto.dev
+
+Available classes and functions:
+
+- Profile
+- profiling
+- phase
+- timed_call
+"""
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+
+from .session import call_unlocked, lazy_seval
+
+_active = contextvars.ContextVar('pypssfss_profile', default=None)
+
+# Julia function calling f, returning its value with the elapsed, compilation and GC times and the bytes allocated.
+# Compile timing is a global switch, so it is reference counted: nested or concurrent timed calls (e.g. on the
+# aio thread and the main thread) keep it on until the last of them returns.
+_timed = lazy_seval("""
+    let guard = ReentrantLock(), active = Ref(0)
+        function (f, args...; kwargs...)
+            lock(guard) do
+                (active[] += 1) == 1 && Base.cumulative_compile_timing(true)
+            end
+            try
+                c0 = Base.cumulative_compile_time_ns()
+                stats = @timed f(args...; kwargs...)
+                c1 = Base.cumulative_compile_time_ns()
+                (stats.value, stats.time, (c1[1] - c0[1]) / 1e9, (c1[2] - c0[2]) / 1e9, stats.gctime, stats.bytes)
+            finally
+                lock(guard) do
+                    (active[] -= 1) == 0 && Base.cumulative_compile_timing(false)
+                end
+            end
+        end
+    end""")
+
+
+class Profile:
+    """
+    The phases recorded inside a `profiling` block.  Each record is a dict with the phase `name`, its `start`
+    time (seconds since the profile started), `duration` (seconds), nesting `depth`, `thread` identifier and,
+    for phases that call Julia, a `julia` dict with the `time_julia`, `compile`, `recompile` and `gc` times
+    (seconds) and the `bytes` allocated.
+    """
+
+    def __init__(self) -> None:
+        self.records = []
+        self.origin = time.perf_counter()
+        self._depth = contextvars.ContextVar('pypssfss_profile_depth', default=0)
+        self._token = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} with {len(self.records)} records>"
+
+    def __enter__(self):
+        self._token = _active.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _active.reset(self._token)
+
+    def summary(self) -> dict:
+        """
+        Return a dict mapping each phase name to its `count`, total `time` (seconds) and, for Julia phases,
+        the totals of the `julia` entries.
+        """
+        totals = {}
+        for r in self.records:
+            t = totals.setdefault(r['name'], {'count': 0, 'time': 0.0})
+            t['count'] += 1
+            t['time'] += r['duration']
+            for k, v in r.get('julia', {}).items():
+                t[k] = t.get(k, 0) + v
+        return totals
+
+    def report(self) -> str:
+        """Return the summary as a text table, with the Julia time split into compilation, GC and the rest."""
+        lines = [f"{'phase':<28} {'count':>6} {'time (s)':>10} {'compile':>9} {'gc':>8} {'run':>9} {'alloc (MB)':>11}"]
+        for name, t in self.summary().items():
+            line = f"{name:<28} {t['count']:>6} {t['time']:>10.4f}"
+            if 'compile' in t:
+                run = t['time_julia'] - t['compile'] - t['gc']
+                line += f" {t['compile']:>9.4f} {t['gc']:>8.4f} {run:>9.4f} {t['bytes'] / 2**20:>11.2f}"
+            lines.append(line)
+        return '\n'.join(lines)
+
+    def to_json(self, path: str | None = None) -> str:
+        """Return the records and summary as a JSON string, also writing it to `path` if given."""
+        text = json.dumps({'records': self.records, 'summary': self.summary()}, indent=1)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def to_chrome_trace(self, path: str | None = None) -> dict:
+        """
+        Return the records in the Chrome trace event format (viewable in chrome://tracing or Perfetto), also
+        writing it to `path` if given.  The Julia statistics of a phase appear as its arguments.
+        """
+        pid = os.getpid()
+        events = [{'name': r['name'], 'cat': 'julia' if 'julia' in r else 'python', 'ph': 'X', 'pid': pid,
+                   'tid': r['thread'], 'ts': 1e6 * r['start'], 'dur': 1e6 * r['duration'],
+                   'args': r.get('julia', {})} for r in self.records]
+        trace = {'traceEvents': events, 'displayTimeUnit': 'ms'}
+        if path is not None:
+            with open(path, 'w') as f:
+                json.dump(trace, f)
+        return trace
+
+
+def profiling() -> Profile:
+    """Return a new Profile, to be used as a context manager: `with profiling() as prof: ...`."""
+    return Profile()
+
+
+@contextlib.contextmanager
+def phase(name: str):
+    """
+    Context manager recording a phase of the active profile, if any.  It yields the record (a dict, to which
+    `timed_call` adds Julia statistics) or None when not profiling.
+    """
+    prof = _active.get()
+    if prof is None:
+        yield None
+        return
+    depth = prof._depth.get()
+    token = prof._depth.set(depth + 1)
+    record = {'name': name, 'depth': depth, 'thread': threading.get_ident()}
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        end = time.perf_counter()
+        prof._depth.reset(token)
+        record.update(start=start - prof.origin, duration=end - start)
+        with prof._lock:
+            prof.records.append(record)
+
+
+def timed_call(record: dict | None, f, *args, unlocked: bool = False, **kwargs):
+    """
+    Call the Julia function `f` (with the GIL released if `unlocked`).  If `record` is a phase record, the
+    Julia time, compilation time, GC time and allocations of the call are added to it.
+    """
+    if record is None:
+        return call_unlocked(f, *args, **kwargs) if unlocked else f(*args, **kwargs)
+    timed = call_unlocked(_timed.value, f, *args, **kwargs) if unlocked else _timed(f, *args, **kwargs)
+    value, elapsed, compile_time, recompile, gc, nbytes = timed
+    julia = record.setdefault('julia', {'time_julia': 0.0, 'compile': 0.0, 'recompile': 0.0, 'gc': 0.0,
+                                        'bytes': 0})
+    julia['time_julia'] += elapsed
+    julia['compile'] += compile_time
+    julia['recompile'] += recompile
+    julia['gc'] += gc
+    julia['bytes'] += int(nbytes)
+    return value
@@ -7,6 +7,7 @@ extracting results, and converting data formats.
 Available functions:
 
 - analyze
+- analyze_iter
 - atoutputs
 - doc
 - extract_result
@@ -14,29 +15,18 @@ Available functions:
 - res2tep
 - res2fresnel
 """
-import juliapkg as jp
-jp.require_julia('1.10')
-jp.add('PSSFSS', '6b20a5d4-3c6c-44cd-883b-1480592d72be')
-jp.resolve()
+from __future__ import annotations
 
-
-import os
-# Invoke julia with the "-t auto" option:
-os.environ["PYTHON_JULIACALL_THREADS"] = "auto"
-os.environ["PYTHON_JULIACALL_HANDLE_SIGNALS"] = "no"
+import types
+from typing import TYPE_CHECKING
 
 import numpy as np
 
-import juliacall
-from juliacall import Main as jl
-
-
-# Set up the Julia Main module:
-jl.seval('using PSSFSS')
-jl.seval('using REPL: REPL')
-
+# The Julia session (and PSSFSS) is started lazily on first use:
+from .session import jl, convert, lazy_seval
 
-from juliacall import convert, VectorValue, ArrayValue
+if TYPE_CHECKING:
+    from juliacall import VectorValue, ArrayValue
 
 # Definitions of Layers
 def Layer(**kwargs):
@@ -59,17 +49,66 @@ def Layer(**kwargs):
     return jl.Layer(**kwargs)
 
 # Definitions of Sheets:
-from .sheets import (diagstrip, jerusalemcross, loadedcross, manji,
+from .sheets import (configure_sheet_cache, diagstrip, jerusalemcross, loadedcross, manji,
                      meander, pecsheet, pixels, plot_sheet, pmcsheet, polyring,
-                     rectstrip, sinuous, splitring, sympixels, mm, cm, inch, mil, RWGSheet)
+                     rectstrip, sinuous, splitring, sympixels, mm, cm, inch, mil, RWGSheet,
+                     pixels_batch, sympixels_batch, SheetBatch)
 
 # Steering definitions:
 from .steering import ThetaPhi, PhiTheta, Psi1Psi2, Psi2Psi1 
+from .steering import to_julia as steering_to_julia
+from .steering import points as steering_points
+
+# Result cache:
+from .cache import ResultCache, default_cache
+from .session import serialize, deserialize
+
+# Parallel analysis of many designs:
+from .parallel import analyze_many, Design, res2fresnel_many, res2tep_many
+
+# Profiling:
+from .profiling import phase, profiling, timed_call
+
+# Binary result store:
+from .store import ResultStore, is_store
+
+
+def _as_store(results) -> ResultStore:
+    return results if isinstance(results, ResultStore) else ResultStore(results, mode='r')
+
+# Sweeps of dielectric layers reusing cached sheet GSMs:
+from .cascade import analyze_cascade, GSMCache
+
+# Sharded sweeps over a work queue:
+from .sweep import collect_sweep, shards, SQLiteQueue, submit_sweep, sweep
+
+# Checkpointing of long analyses:
+from .checkpoint import analyze_checkpointed
+
+# Thread budget of Julia, BLAS and worker processes:
+from .threads import autotune_threads, configure_threads
+
+# Mesh-density convergence:
+from .convergence import converge_mesh
+
+# Surrogate models for fast evaluation at arbitrary frequencies and angles:
+from .surrogate import fit_surrogate, Surrogate
+
+# Warm solver server for the Julia-free client module:
+from .server import serve
+
+# Asyncio-friendly versions:
+from .aio import analyze_async, extract_result_async
 
 # Implementation of the analyze function in Python:
 def analyze(strata: list,
             flist,
             steering: ThetaPhi | PhiTheta | Psi1Psi2 | Psi2Psi1,
+            cache: ResultCache | bool | None = None,
+            checkpoint: str | None = None,
+            checkpoint_points: int = 100,
+            outputs: str | tuple | None = None,
+            chunk_points: int = 100,
             **kwargs):
     """
     Python wrapper for the `analyze` function of the Julia PSSFSS package.
@@ -78,37 +117,169 @@ def analyze(strata: list,
 
     - Named tuples containing the steering parameters must be created using the `ThetaPhi`, `PhiTheta`,
       `Psi1Psi2`, or `Psi2Psi1` functions.
+    - The optional `cache` keyword argument enables the persistent result cache: pass a `ResultCache`
+      instance, or `True` to use a default one.  A cached result is returned without repeating the analysis
+      (in which case `logfile` and `resultfile` are not written).
+    - The optional `checkpoint` keyword argument names a checkpoint file.  The sweep is then analyzed in chunks
+      of at most `checkpoint_points` frequencies at one steering point, each saved to the file as soon as it
+      is done.  Repeating an interrupted call with the same arguments only analyzes the missing chunks.  The
+      file is kept after completion, so it should be deleted once the results have been saved elsewhere.
+    - The optional `outputs` keyword argument (a string of `@outputs` requests, or the value returned by
+      `atoutputs`) makes `analyze` return only the requested outputs, as the dict of NumPy columns that
+      `extract_result(..., columnar=True)` would give.  The sweep is then analyzed in chunks of at most
+      `chunk_points` frequencies at one steering point, and each chunk is reduced to the requested outputs and
+      discarded as soon as it is done, so memory use does not grow with the size of the sweep.  A `resultfile`,
+      if given, is written as the chunks complete (there is no default one), and `cache` applies to each chunk.  It cannot be combined with
+      `checkpoint`.
 
     For detailed documentation from the Julia version, type `doc(analyze)` or see 
     https://simonp0420.github.io/PSSFSS.jl/stable/reference/#PSSFSS.analyze
     """
-
-    # Avoid mutating strata:
-    strata = strata.copy()
-
-    # Need to convert any RWGSheet elements sheet to sheet.jRWGSheet
-    for index, v in enumerate(strata):
-        if isinstance(v, RWGSheet):
-            strata[index] = v.jRWGSheet
-
-    # Convert strata Python vector to a Julia vector:
-    jlstrata = convert(jl.Vector, strata)
-
-    # Convert steering from a Python named tuple to a Julia named tuple:
-    f1, f2 = steering._fields
-    if isinstance(steering[0], int | float):
-        v1 = steering[0]
-    else:
-        v1 = convert(jl.Vector, np.array(steering[0]))
-
-    if isinstance(steering[1], int | float):
-        v2 = steering[1]
-    else:
-        v2 = convert(jl.Vector, np.array(steering[1]))
-
-    jlsteering = jl.seval(f'({f1}={v1}, {f2}={v2})')
-    
-    return jl.analyze(jlstrata, flist, jlsteering, **kwargs)
+    if outputs is not None:
+        if checkpoint is not None:
+            raise ValueError("analyze: the outputs and checkpoint arguments cannot be combined")
+        return _analyze_outputs(strata, flist, steering, outputs, chunk_points, cache, kwargs)
+    if checkpoint is not None:
+        return analyze_checkpointed(strata, flist, steering, checkpoint, checkpoint_points, cache, **kwargs)
+    return _analyze(strata, flist, steering, cache, kwargs)
+
+
+def _analyze(strata: list, flist, steering, cache, kwargs: dict, unlocked: bool = False):
+    """Implementation of `analyze`.  With `unlocked=True` the GIL is released while Julia computes."""
+    with phase('analyze'):
+        return _analyze_phases(strata, flist, steering, cache, kwargs, unlocked)
+
+
+def _analyze_phases(strata: list, flist, steering, cache, kwargs: dict, unlocked: bool):
+    with phase('analyze.prepare'):
+        # Avoid mutating strata:
+        strata = strata.copy()
+
+        # Need to convert any RWGSheet elements sheet to sheet.jRWGSheet
+        for index, v in enumerate(strata):
+            if isinstance(v, RWGSheet):
+                strata[index] = v.jRWGSheet
+
+    if cache is True:
+        cache = default_cache()
+    elif cache is False:
+        cache = None
+    if cache is not None:
+        with phase('analyze.cache_lookup'):
+            key = cache.key(strata, flist, steering, kwargs)
+            data = cache.get(key)
+        if data is not None:
+            with phase('analyze.cache_load'):
+                return deserialize(data)
+
+    with phase('analyze.convert_arguments'):
+        # Convert strata Python vector to a Julia vector:
+        jlstrata = convert(jl.Vector, strata)
+
+        # Convert steering from a Python named tuple to a Julia named tuple (copying if the GIL will be released):
+        jlsteering = steering_to_julia(steering, copy=unlocked)
+
+    with phase('analyze.julia') as record:
+        results = timed_call(record, jl.analyze, jlstrata, flist, jlsteering, unlocked=unlocked, **kwargs)
+    if cache is not None:
+        with phase('analyze.cache_store'):
+            cache.put(key, serialize(results))
+    return results
+
+
+# Julia functions used by analyze_iter:
+_point_outputs = lazy_seval("(result, outreq) -> map(f -> f(result), outreq)")
+_write_result = lazy_seval("""
+    begin
+        import Serialization
+        (io, result) -> (Serialization.serialize(io, result); flush(io))
+    end""")
+
+
+def _analyze_outputs(strata: list, flist, steering, outputs, chunk_points: int, cache, kwargs: dict) -> dict:
+    """Implementation of `analyze` with `outputs`: analyze chunk by chunk, keeping only the requested columns."""
+    names = None
+    if isinstance(outputs, str):
+        names = output_names(outputs)
+        outputs = atoutputs(outputs)
+    todo = shards(flist, steering, chunk_points)
+    total = sum(len(shard.flist) for shard in todo)
+    # Full results are only serialized when a result file was asked for:
+    resultfile = kwargs.pop('resultfile', None)
+    if resultfile is not None and not isinstance(resultfile, str) and resultfile == jl.devnull:
+        resultfile = None
+    logfile = kwargs.pop('logfile', 'pssfss.log')
+    resultio = jl.open(resultfile, "w") if isinstance(resultfile, str) else resultfile
+    logio = jl.open(logfile, "w") if isinstance(logfile, str) else logfile
+    columns = None
+    start = 0
+    try:
+        for shard in todo:
+            results = _analyze(strata, shard.flist, shard.steering, cache,
+                               dict(kwargs, logfile=logio, resultfile=jl.devnull))
+            if resultio is not None:
+                for result in results:
+                    _write_result(resultio, result)
+            values = [v.to_numpy() for v in _columns(results, outputs)]
+            del results
+            if columns is None:
+                columns = [np.empty(total, dtype=np.complex128 if v.dtype.kind == 'c' else np.float64)
+                           for v in values]
+            for column, v in zip(columns, values):
+                column[start:start + len(v)] = v
+            start += len(shard.flist)
+    finally:
+        for name, io in ((resultfile, resultio), (logfile, logio)):
+            if isinstance(name, str):
+                jl.close(io)
+    if columns is None:
+        columns = [np.empty(0) for _ in range(len(outputs))]
+    return dict(zip(names or range(len(columns)), columns))
+
+
+def analyze_iter(strata: list,
+                 flist,
+                 steering: ThetaPhi | PhiTheta | Psi1Psi2 | Psi2Psi1,
+                 outputs: str | tuple | None = None,
+                 cache: ResultCache | bool | None = None,
+                 **kwargs):
+    """
+    Streaming version of `analyze`: a generator yielding the result of each frequency/steering point as soon as
+    it has been computed, in the same order as `analyze` (the first steering parameter varying slowest and
+    frequency fastest).  The sweep can be stopped early by leaving the loop.  E.g.
+
+        for s21 in analyze_iter(strata, flist, steering, outputs='s21dB(te,te)'):
+            print(s21[0])
+
+    Parameters:
+        outputs: str | tuple
+            Optional output requests, as a string of `@outputs` requests or the value returned by `atoutputs`.
+            If given, each yielded value is a tuple of Python numbers (complex for s11, s12, s21 and s22)
+            instead of the Julia result, so that only the requested scalars are transferred to Python.
+        cache:
+            As for `analyze`, but applied to each point separately.
+
+    The other arguments are those of `analyze`.  Each point is analyzed by a separate call of the Julia
+    `analyze` function.  `resultfile` defaults to `devnull`; if a file name is given, the results are appended
+    to it as they are computed, in the format read by `res2tep` and `res2fresnel`.  `logfile` also defaults to
+    `devnull`; if a file name is given, it holds the log of the most recently analyzed point.
+    """
+    if isinstance(outputs, str):
+        outputs = atoutputs(outputs)
+    resultfile = kwargs.pop('resultfile', jl.devnull)
+    kwargs.setdefault('logfile', jl.devnull)
+    kwargs['resultfile'] = jl.devnull
+    resultio = jl.open(resultfile, "w") if isinstance(resultfile, str) else None
+    try:
+        for point in steering_points(steering):
+            for f in np.atleast_1d(np.asarray(flist, dtype=np.float64)).reshape(-1).tolist():
+                result = _analyze(strata, f, point, cache, kwargs)[0]
+                if resultio is not None:
+                    _write_result(resultio, result)
+                yield result if outputs is None else _point_outputs(result, outputs)
+    finally:
+        if resultio is not None:
+            jl.close(resultio)
 
 
 # Simulate the Julia @outputs macro with a Python function:
@@ -124,22 +295,79 @@ def atoutputs(string: str) -> tuple:
 
     All of the `@outputs` parameters listed in the Julia PSSFSS documentation at
     https://simonp0420.github.io/PSSFSS.jl/stable/manual/#Table-of-Valid-@outputs-Parameters
-    are available to use in the atoutputs function except for those that return complex 
-    values: s11, s12, s21, and s22.  Instead, one should request the real and imaginary parts
-    (or the magnitude and phase) separately and combine these to form the desired complex value.
+    are available to use in the atoutputs function.  Those that return complex values (s11, s12,
+    s21, and s22) are only supported by `extract_result` with `columnar=True`; otherwise one should
+    request the real and imaginary parts (or the magnitude and phase) separately and combine these
+    to form the desired complex value.
     """
     return jl.seval('@outputs ' + string)
 
 
-def extract_result(results: VectorValue | ArrayValue, outreq: tuple) -> np.array:
+def output_names(string: str) -> list:
+    """
+    Split a string of `@outputs` requests, as passed to `atoutputs`, into the individual requests, e.g.
+    `'FGHz s21dB(L, v)'` gives `['FGHz', 's21dB(L,v)']`.  Whitespace inside parentheses is removed.
+    """
+    names, depth, current = [], 0, ''
+    for c in string:
+        depth += (c == '(') - (c == ')')
+        if c.isspace():
+            if depth == 0 and current:
+                names.append(current)
+                current = ''
+        else:
+            current += c
+    if current:
+        names.append(current)
+    return names
+
+
+# Julia function applying each output request to all results, giving one concretely typed vector per request:
+_columns = lazy_seval("(results, outreq) -> map(f -> [f(r) for r in results], outreq)")
+
+
+def extract_result(results: VectorValue | ArrayValue, outreq: tuple | str,
+                   columnar: bool = False) -> np.ndarray | dict:
     """
     Wrapper function for the Julia PSSFSS extract_result function.  Returns a numpy array.
     For detailed documentation, type `doc(extract_result)` or see the Julia PSSFSS version 
     documentation at 
     https://simonp0420.github.io/PSSFSS.jl/stable/reference/#PSSFSS.Outputs.extract_result
+
+    Differences from the Julia version:
+
+    - `outreq` may be the string that would be passed to `atoutputs`, instead of the value returned by it.
+    - With `columnar=True` a dict is returned with one contiguous NumPy array (float64, or complex128 for
+      the complex outputs s11, s12, s21 and s22) per requested output, copied in bulk from Julia.  The keys are
+      the individual requests (e.g. `'s21dB(L,v)'`) if `outreq` is a string, or their positions otherwise.
+      E.g.
+
+          data = extract_result(results, 'FGHz s21(te,te)', columnar=True)
+          f, s21 = data['FGHz'], data['s21(te,te)']
+    - `results` may be a `ResultStore` or the path of a result store directory.
     """
-    outputs = np.array(jl.extract_result(results, outreq))
-    return outputs
+    return _extract(results, outreq, columnar)
+
+
+def _extract(results, outreq, columnar: bool, unlocked: bool = False):
+    """Implementation of `extract_result`.  With `unlocked=True` the GIL is released while Julia computes."""
+    if is_store(results):
+        return _as_store(results).extract(outreq, columnar)
+    with phase('extract_result'):
+        names = None
+        if isinstance(outreq, str):
+            with phase('extract_result.atoutputs'):
+                names = output_names(outreq)
+                outreq = atoutputs(outreq)
+        f = _columns.value if columnar else jl.extract_result
+        with phase('extract_result.julia') as record:
+            values = timed_call(record, f, results, outreq, unlocked=unlocked)
+        with phase('extract_result.to_numpy'):
+            if not columnar:
+                return np.array(values)
+            columns = [v.to_numpy() for v in values]
+            columns = [c.astype(np.complex128 if c.dtype.kind == 'c' else np.float64, copy=False) for c in columns]
+            return dict(zip(names or range(len(columns)), columns))
 
 # Python wrapper for res2tep:
 def res2tep(results: VectorValue | str, tepfile: str, name="tep", clas="res2tep") -> None:
@@ -149,8 +377,14 @@ def res2tep(results: VectorValue | str, tepfile: str, name="tep", clas="res2tep"
     analyze function. For detailed documentation, type doc(res2tep) or see the Julia PSSFSS
     version documentation at 
     https://simonp0420.github.io/PSSFSS.jl/stable/reference/#PSSFSS.Outputs.res2tep
+    `results` may also be a `ResultStore` or the path of a result store directory, whose results are read by
+    Julia from the store's files (see `ResultStore.result_file`) rather than loaded through Python.
     """
     kwdict = {"name": name, "class": clas}
+    if is_store(results):
+        with _as_store(results).result_file() as resultfile:
+            jl.res2tep(resultfile, tepfile, **kwdict)
+        return
     jl.res2tep(results, tepfile, **kwdict)
 
 # Python wrapper res2fresnel:
@@ -161,16 +395,16 @@ def res2fresnel(results: VectorValue | str, tepfile: str) -> None:
     analyze function. For detailed documentation, type doc(res2fresnel) or see the Julia PSSFSS
     version documentation at 
     https://simonp0420.github.io/PSSFSS.jl/stable/reference/#PSSFSS.Outputs.res2fresnel
+    `results` may also be a `ResultStore` or the path of a result store directory, whose results are read by
+    Julia from the store's files (see `ResultStore.result_file`) rather than loaded through Python.
     """
+    if is_store(results):
+        with _as_store(results).result_file() as resultfile:
+            jl.res2fresnel(resultfile, tepfile)
+        return
     jl.res2fresnel(results, tepfile)
 
 
-from rich.console import Console
-from rich.markdown import Markdown
-console = Console()
-
-import types
-
 # Documentation function to print markdown formatted Julia docstrings
 def doc(arg):
     """
@@ -192,7 +426,9 @@ def doc(arg):
          name = arg.style
     
     if len(name) > 0:
-         console.print(Markdown(jl.seval(f'repr(REPL.doc({name}))')))
+         from rich.console import Console
+         from rich.markdown import Markdown
+         Console().print(Markdown(jl.seval(f'repr(REPL.doc({name}))')))
     else:
             help(arg)
 
@@ -0,0 +1,262 @@
+"""
+This is the server module.
+
+It runs a daemon keeping warm Julia sessions with PSSFSS loaded (and, after a warm-up analysis, compiled), which
+answers the analysis requests of the client module over a Unix socket or a localhost TCP port.  Short scripts
+and notebooks then get results in the time of the analysis itself instead of paying for Julia start-up and
+compilation on every run.  Start it with
+
+    python -m pypssfss serve [--address PATH|HOST:PORT] [--workers N] [--julia-threads N]
+
+or `serve()`.  With `workers=0` the analyses run in the server process itself; otherwise they run on an
+AnalysisPool of `workers` processes, so that several clients are served concurrently.
+
+Requests only describe layers and sheets (see the client module), and only `Layer` and the sheet constructors
+of pypssfss can be called.  Of the keyword arguments of `analyze`, clients can only set those in
+`ANALYZE_KWARGS`, which do not name files, so clients cannot run arbitrary code or write files; nevertheless
+anyone able to connect can use the server's CPU time.  A Unix socket is only accessible to its owner, and TCP addresses must be loopback.
+
+Available classes and functions:
+
+- Server
+- serve
+"""
+import os
+import queue
+import socket
+import socketserver
+import threading
+from concurrent import futures
+
+import numpy as np
+
+from .client import SHEETS, UNITS, default_address, recv_message, send_message, tcp_address
+
+_LOOPBACK = ('localhost', '127.0.0.1', '::1')
+_STEERING = ('ThetaPhi', 'PhiTheta', 'Psi1Psi2', 'Psi2Psi1')
+
+# The analyze keyword arguments that clients may set, and their types.  Arguments naming files (logfile,
+# resultfile, checkpoint) are never accepted:
+ANALYZE_KWARGS = {'cache': bool, 'chunk_points': int, 'showprogress': bool}
+
+# A small analysis compiling the whole analyze/extract_result path:
+_WARMUP = {'strata': [{'type': 'Layer', 'kwargs': {}},
+                      {'type': 'polyring', 'kwargs': {'s1': [10, 0], 's2': [0, 10], 'a': [3], 'b': [4],
+                                                      'sides': 12, 'ntri': 200, 'units': {'units': 'mm'}}},
+                      {'type': 'Layer', 'kwargs': {'epsr': 2.2, 'width': {'value': 1.0, 'units': 'mm'}}},
+                      {'type': 'Layer', 'kwargs': {}}],
+           'steering': {'type': 'ThetaPhi', 'values': [0, 0]},
+           'outputs': 'FGHz s21db(te,te)', 'kwargs': {}}
+
+
+# Worker side:
+def _decode(v):
+    from . import sheets
+    if isinstance(v, list):
+        return [_decode(x) for x in v]
+    if not isinstance(v, dict):
+        return v
+    if 'units' in v and v['units'] in UNITS and set(v) <= {'units', 'value'}:
+        unit = getattr(sheets, v['units'])
+        return v['value'] * unit if 'value' in v else unit
+    if set(v) == {'array', 'dtype'}:
+        dtype = np.dtype(v['dtype'])
+        if dtype.hasobject:
+            raise ValueError(f"unsupported array dtype {v['dtype']}")
+        return np.asarray(v['array'], dtype=dtype)
+    return {k: _decode(x) for (k, x) in v.items()}
+
+
+def _element(e: dict):
+    from . import sheets
+    from .pypssfss import Layer
+    kind = e.get('type')
+    if kind == 'Layer':
+        return Layer(**_decode(e.get('kwargs', {})))
+    if kind in SHEETS:
+        return getattr(sheets, kind)(**_decode(e.get('kwargs', {})))
+    raise ValueError(f"unknown stratum type {kind!r}")
+
+
+def _run_job(job: dict, flist: np.ndarray) -> dict:
+    """Run an analyze request; return the requested outputs as a dict of NumPy columns."""
+    from . import steering
+    from .pypssfss import analyze
+    from .session import jl
+    for k, v in job.get('kwargs', {}).items():
+        if k not in ANALYZE_KWARGS or type(v) is not ANALYZE_KWARGS[k]:
+            raise ValueError(f"analyze argument {k}={v!r} cannot be set by clients")
+    if job['steering']['type'] not in _STEERING:
+        raise ValueError(f"unknown steering type {job['steering']['type']!r}")
+    strata = [_element(e) for e in job['strata']]
+    steer = getattr(steering, job['steering']['type'])(*_decode(job['steering']['values']))
+    kwargs = {'logfile': jl.devnull, 'showprogress': False}
+    kwargs.update(job.get('kwargs', {}))
+    return analyze(strata, flist, steer, outputs=job['outputs'], **kwargs)
+
+
+def _warmup() -> None:
+    _run_job(_WARMUP, np.array([10.0, 12.0]))
+
+
+# Server side:
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        while True:
+            try:
+                header, arrays = recv_message(self.rfile)
+            except (EOFError, ConnectionError):
+                return
+            try:
+                reply, data = self.server.owner._dispatch(header, arrays)
+                send_message(self.wfile, dict(reply, ok=True), data)
+            except Exception as err:
+                send_message(self.wfile, {'ok': False, 'error': f"{type(err).__name__}: {err}"})
+
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _TCP6Server(_TCPServer):
+    address_family = socket.AF_INET6
+
+
+class Server:
+    """
+    A pypssfss server listening at `address` (default: `client.default_address()`).
+
+    Parameters:
+        address: str
+            Path of a Unix socket, or `host:port` with a loopback host.  An existing socket file at the path is
+            replaced.
+        workers: int
+            Number of worker processes running analyses concurrently (see AnalysisPool).  With 0, analyses
+            run one at a time in the server process.
+        julia_threads: int
+            Number of Julia threads of each worker (with `workers=0`, of the server process, if Julia has not
+            yet been started).
+        warmup: bool
+            Run a small analysis in each session before serving, so the first request does not pay for
+            compilation.
+
+    Use `serve_forever` to handle requests until a client sends a shutdown request or `shutdown` is called.
+    """
+
+    def __init__(self, address: str | None = None, workers: int = 1, julia_threads: int | None = None,
+                 warmup: bool = True) -> None:
+        self.address = address or default_address()
+        self.workers = workers
+        tcp = tcp_address(self.address)
+        if tcp is None:
+            if os.path.exists(self.address):
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                    if probe.connect_ex(self.address) == 0:
+                        raise RuntimeError(f"a server is already listening at {self.address}")
+                os.remove(self.address)
+            # Create the socket owner-only from the start, so no other user can connect before the chmod:
+            umask = os.umask(0o177)
+            try:
+                self._server = _UnixServer(self.address, _Handler)
+            finally:
+                os.umask(umask)
+            os.chmod(self.address, 0o600)
+        else:
+            if tcp[0] not in _LOOPBACK:
+                raise ValueError(f"refusing to listen on non-loopback host {tcp[0]!r}")
+            self._server = (_TCP6Server if ':' in tcp[0] else _TCPServer)(tcp, _Handler)
+        self._server.owner = self
+        self._jobs = queue.Queue()
+        self._stopped = threading.Event()
+        if workers:
+            from .parallel import AnalysisPool
+            self._pool = AnalysisPool(workers, julia_threads)
+        else:
+            if julia_threads:
+                os.environ['PYTHON_JULIACALL_THREADS'] = str(julia_threads)
+            self._pool = None
+        self._warmup = warmup
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.address!r}, workers={self.workers})"
+
+    def _submit(self, fn, *args) -> futures.Future:
+        if self._pool is not None:
+            return self._pool.apply(fn, *args)
+        future = futures.Future()
+        self._jobs.put((future, fn, args))
+        return future
+
+    def _dispatch(self, header: dict, arrays: dict) -> tuple:
+        op = header.get('op')
+        if op == 'analyze':
+            return {}, self._submit(_run_job, header, np.asarray(arrays['flist'], dtype=np.float64)).result()
+        if op == 'ping':
+            from importlib import metadata
+            try:
+                version = metadata.version('pypssfss')
+            except metadata.PackageNotFoundError:
+                version = None
+            return {'version': version, 'workers': self.workers}, None
+        if op == 'shutdown':
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {}, None
+        raise ValueError(f"unknown request {op!r}")
+
+    def serve_forever(self) -> None:
+        """Handle requests until the server is shut down.  Analyses with `workers=0` run in this thread."""
+        if self._warmup:
+            for future in [self._submit(_warmup) for _ in range(max(1, self.workers))]:
+                if self._pool is None:
+                    self._run_pending()
+                future.result()
+        thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            while not self._stopped.is_set():
+                self._run_pending()
+        finally:
+            self._close()
+            thread.join()
+
+    def _run_pending(self) -> None:
+        item = self._jobs.get()
+        if item is None:
+            return
+        future, fn, args = item
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(fn(*args))
+            except Exception as err:
+                future.set_exception(err)
+
+    def shutdown(self) -> None:
+        """Stop serving; `serve_forever` returns once the current requests are answered."""
+        self._stopped.set()
+        self._jobs.put(None)
+
+    def _close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+        while not self._jobs.empty():
+            item = self._jobs.get()
+            if item is not None:
+                item[0].cancel()
+        if tcp_address(self.address) is None and os.path.exists(self.address):
+            os.remove(self.address)
+
+
+def serve(address: str | None = None, workers: int = 1, julia_threads: int | None = None,
+          warmup: bool = True) -> None:
+    """Run a Server (see its parameters) until a client asks it to shut down."""
+    server = Server(address, workers, julia_threads, warmup)
+    print(f"pypssfss server listening at {server.address}", flush=True)
+    server.serve_forever()
@@ -0,0 +1,353 @@
+"""
+This is the session module.
+
+It manages the embedded Julia session used by pypssfss.  Julia and PSSFSS are not loaded when pypssfss
+is imported; they are started on the first call that needs them (e.g. the first `Layer`, sheet constructor,
+or `analyze` call).
+
+Package resolution by juliapkg is skipped on start-up when the Julia executable, project and Manifest.toml
+recorded by the previous successful start are unchanged.  Set the environment variable
+`PYPSSFSS_RESOLVE=always` to force resolution, e.g. after adding other juliapkg dependencies.
+
+Julia is started with one thread per core unless `PYTHON_JULIACALL_THREADS` is set, and the number of BLAS
+threads inside Julia is set from `PYPSSFSS_BLAS_THREADS` if given.  Both are normally set through
+`threads.configure_threads`.  As juliacall requires when Julia is called from several Python threads, Julia
+handles signals (`PYTHON_JULIACALL_HANDLE_SIGNALS=yes`) if several Julia threads have been configured or an
+asynchronous analyzer (see the aio module) has been created before Julia starts; otherwise it does not, and
+Ctrl-C is handled by Python as usual.  An explicitly set `PYTHON_JULIACALL_HANDLE_SIGNALS` always wins.
+
+If a custom sysimage has been built with `python -m pypssfss build-sysimage` (see the sysimage module) and
+is still current, it is used automatically.  Set `PYPSSFSS_SYSIMAGE=no` to start Julia with its default
+sysimage instead.
+
+Available functions:
+
+- start
+- is_started
+- set_blas_threads
+- cache_dir
+- environment_tag
+- serialize
+- deserialize
+- is_julia
+- call_unlocked
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+
+# Invoke julia with the "-t auto" option, unless a thread count has been configured:
+os.environ.setdefault("PYTHON_JULIACALL_THREADS", "auto")
+
+# Julia requirements of pypssfss, as passed to juliapkg:
+JULIA_COMPAT = '1.10'
+PSSFSS_UUID = '6b20a5d4-3c6c-44cd-883b-1480592d72be'
+
+_juliacall = None
+_lock = threading.RLock()
+# Whether Julia must handle signals when it starts (see _request_signal_handling):
+_signal_handling = False
+
+
+def cache_dir(*parts: str) -> str:
+    """
+    Return (creating it if necessary) a pypssfss cache directory.  The base directory is taken from the
+    `PYPSSFSS_CACHE_DIR` environment variable, defaulting to `~/.cache/pypssfss` (or `%LOCALAPPDATA%/pypssfss`
+    on Windows).  Optional `parts` are joined to the base directory.
+    """
+    base = os.environ.get('PYPSSFSS_CACHE_DIR')
+    if not base:
+        if os.name == 'nt':
+            base = os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser('~')), 'pypssfss')
+        else:
+            base = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'pypssfss')
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def environment_tag() -> str:
+    """
+    Return a short tag identifying the current Python environment (and explicitly configured juliapkg
+    project), used to keep per-environment files in the cache directory apart.
+    """
+    envkey = sys.prefix + '|' + os.environ.get('PYTHON_JULIAPKG_PROJECT', '')
+    return hashlib.sha256(envkey.encode()).hexdigest()[:16]
+
+
+def _stamp_file() -> str:
+    return os.path.join(cache_dir('session'), environment_tag() + '.json')
+
+
+def file_signature(path: str) -> dict:
+    """Return the modification time, size and SHA-256 digest of a file."""
+    st = os.stat(path)
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return {'mtime': st.st_mtime, 'size': st.st_size, 'sha256': digest}
+
+
+def file_unchanged(path: str, signature: dict) -> bool:
+    """Return True if a file still matches a signature returned by `file_signature`."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    if st.st_mtime == signature['mtime'] and st.st_size == signature['size']:
+        return True
+    return file_signature(path)['sha256'] == signature['sha256']
+
+
+def _requirements() -> list:
+    return [JULIA_COMPAT, PSSFSS_UUID]
+
+
+def _load_stamp() -> dict | None:
+    """Return the recorded session stamp if it is still valid, otherwise None."""
+    if os.environ.get('PYPSSFSS_RESOLVE', 'auto') == 'always':
+        return None
+    try:
+        with open(_stamp_file()) as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if stamp.get('requirements') != _requirements():
+        return None
+    for key in ('exepath', 'libpath', 'bindir'):
+        if not os.path.exists(stamp.get(key, '')):
+            return None
+    for path, signature in stamp.get('files', {}).items():
+        if not file_unchanged(path, signature):
+            return None
+    return stamp
+
+
+def _save_stamp(juliacall) -> None:
+    config = juliacall.CONFIG
+    project = config['project']
+    files = {}
+    for fname in ('Project.toml', 'Manifest.toml', os.path.join('pyjuliapkg', 'meta.json')):
+        path = os.path.join(project, fname)
+        if os.path.exists(path):
+            files[path] = file_signature(path)
+    stamp = {'requirements': _requirements(),
+             'exepath': config['exepath'],
+             'project': project,
+             'libpath': config['libpath'],
+             'bindir': str(juliacall.Main.Sys.BINDIR),
+             'files': files}
+    try:
+        with open(_stamp_file(), 'w') as f:
+            json.dump(stamp, f)
+    except OSError:
+        pass
+
+
+def _resolve() -> tuple:
+    """Resolve the Julia requirements with juliapkg; return the Julia executable and project paths."""
+    import juliapkg as jp
+    jp.require_julia(JULIA_COMPAT)
+    jp.add('PSSFSS', PSSFSS_UUID)
+    jp.resolve()
+    return jp.executable(), jp.project()
+
+
+def _select_sysimage(exepath: str, project: str) -> None:
+    """Use the sysimage built by `build_sysimage`, if there is one and it is not stale."""
+    if 'PYTHON_JULIACALL_SYSIMAGE' in os.environ or os.environ.get('PYPSSFSS_SYSIMAGE', 'auto') == 'no':
+        return
+    from .sysimage import usable_sysimage
+    path = usable_sysimage(exepath, project)
+    if path is not None:
+        os.environ['PYTHON_JULIACALL_SYSIMAGE'] = path
+
+
+def start():
+    """
+    Start the embedded Julia session and load PSSFSS, if this has not already been done.
+    Returns the juliacall `Main` module.  It is not normally necessary to call this function,
+    since it is called automatically on first use of any wrapped function.
+    """
+    global _juliacall
+    if _juliacall is not None:
+        return _juliacall.Main
+    with _lock:
+        if _juliacall is None:
+            stamp = None if 'juliacall' in sys.modules else _load_stamp()
+            if stamp is None:
+                exepath, project = _resolve()
+            else:
+                # Skip juliapkg entirely by telling juliacall where everything is:
+                os.environ.setdefault('PYTHON_JULIACALL_EXE', stamp['exepath'])
+                os.environ.setdefault('PYTHON_JULIACALL_PROJECT', stamp['project'])
+                os.environ.setdefault('PYTHON_JULIACALL_LIB', stamp['libpath'])
+                os.environ.setdefault('PYTHON_JULIACALL_BINDIR', stamp['bindir'])
+                exepath, project = stamp['exepath'], stamp['project']
+            if 'juliacall' not in sys.modules:
+                _select_sysimage(exepath, project)
+            os.environ.setdefault("PYTHON_JULIACALL_HANDLE_SIGNALS", "yes" if _signal_handling else "no")
+            import juliacall
+            juliacall.Main.seval('using PSSFSS')
+            juliacall.Main.seval('using REPL: REPL')
+            if os.environ.get('PYPSSFSS_BLAS_THREADS'):
+                set_blas_threads(int(os.environ['PYPSSFSS_BLAS_THREADS']), juliacall.Main)
+            if stamp is None:
+                _save_stamp(juliacall)
+            _juliacall = juliacall
+    return _juliacall.Main
+
+
+def set_blas_threads(n: int, main=None) -> None:
+    """Set the number of BLAS threads used by Julia (starting Julia if needed)."""
+    (main or start()).seval(f'import LinearAlgebra; LinearAlgebra.BLAS.set_num_threads({int(n)})')
+
+
+def _request_signal_handling() -> None:
+    """
+    Make Julia handle signals when it starts, as juliacall requires when Julia runs several threads or is
+    called from threads other than Python's main thread.  Has no effect once Julia is running.
+    """
+    global _signal_handling
+    _signal_handling = True
+
+
+def is_started() -> bool:
+    """Return True if the embedded Julia session has been started."""
+    return _juliacall is not None
+
+
+def convert(T, x):
+    """Lazy equivalent of `juliacall.convert`."""
+    start()
+    return _juliacall.convert(T, x)
+
+
+class lazy_seval:
+    """
+    Julia code that is evaluated with `seval` on first use, so that helper functions written in Julia can be
+    defined at module level without starting Julia.  Calling the object calls the evaluated Julia function.
+    """
+    __slots__ = ('code', '_value')
+
+    def __init__(self, code: str) -> None:
+        self.code = code
+        self._value = None
+
+    @property
+    def value(self):
+        if self._value is None:
+            self._value = start().seval(self.code)
+        return self._value
+
+    def __call__(self, *args, **kwargs):
+        return self.value(*args, **kwargs)
+
+
+_serialize = lazy_seval("""
+    begin
+        import Serialization
+        x -> (io = IOBuffer(); Serialization.serialize(io, x); take!(io))
+    end""")
+
+_deserialize = lazy_seval("""
+    begin
+        import Serialization
+        v -> Serialization.deserialize(IOBuffer(Vector{UInt8}(v)))
+    end""")
+
+
+def is_julia(x) -> bool:
+    """Return True if `x` is a juliacall wrapper of a Julia value."""
+    return type(x).__module__.startswith('juliacall')
+
+
+def serialize(x) -> bytes:
+    """Serialize a Julia value to bytes using Julia's Serialization standard library."""
+    import numpy as np
+    return np.asarray(_serialize(x)).tobytes()
+
+
+def deserialize(data: bytes):
+    """Reconstruct a Julia value from bytes produced by `serialize`."""
+    import numpy as np
+    return _deserialize(np.frombuffer(data, dtype=np.uint8))
+
+
+_call_unlocked = lazy_seval("""
+    (f, args, kwargs) -> let kw = (; (Symbol(k) => v for (k, v) in kwargs)...)
+        PythonCall.GIL.unlock(() -> f(args...; kw...))
+    end""")
+
+
+def _native(x):
+    """Convert `x` to a value that is not backed by a Python object when passed to Julia."""
+    import numpy as np
+    if is_julia(x) or x is None or isinstance(x, (bool, int, float, complex, str, range)):
+        return x
+    if isinstance(x, np.generic):
+        return x.item()
+    if isinstance(x, (list, tuple)) and any(is_julia(v) for v in x):
+        return convert(jl.Vector, [_native(v) for v in x])
+    if isinstance(x, (list, tuple, np.ndarray)):
+        a = np.asarray(x)
+        if a.dtype.kind in 'biufc':
+            return convert(jl.Array, np.ascontiguousarray(a))
+    raise TypeError(f"no native Julia equivalent for {type(x).__name__}")
+
+
+def call_unlocked(f, *args, **kwargs):
+    """
+    Call the Julia function `f` with the Python GIL released for the duration of the Julia computation, so
+    that other Python threads (e.g. an asyncio event loop) keep running.  Arguments are first converted to
+    native Julia values; if any argument has no native equivalent the call is made with the GIL held.
+    """
+    try:
+        jlargs = tuple(_native(a) for a in args)
+        jlkwargs = tuple((k, _native(v)) for (k, v) in kwargs.items())
+    except TypeError:
+        return f(*args, **kwargs)
+    return _call_unlocked(f, jlargs, jlkwargs)
+
+
+class JuliaBlob:
+    """
+    Picklable form of a Julia value, holding the bytes produced by `serialize`.  Used to pass Julia values
+    such as Layers and analysis results between processes.
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+
+    def __reduce__(self):
+        return (JuliaBlob, (self.data,))
+
+    def __repr__(self) -> str:
+        return f"JuliaBlob(<{len(self.data)} bytes>)"
+
+    @classmethod
+    def from_value(cls, x) -> 'JuliaBlob':
+        """Serialize the Julia value `x`."""
+        return cls(serialize(x))
+
+    def load(self):
+        """Return the deserialized Julia value."""
+        return deserialize(self.data)
+
+
+class _LazyMain:
+    """
+    Stand-in for `juliacall.Main` that starts the Julia session on first attribute access.
+    """
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        return getattr(start(), name)
+
+    def __repr__(self):
+        return repr(start()) if is_started() else '<Julia Main module (not yet started)>'
+
+
+jl = _LazyMain()
@@ -1,20 +1,50 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
 
 import numpy as np
 
-from juliacall import Main as jl
-import juliacall
-import matplotlib.pyplot as plt
+from .cache import SheetCache, content_key
+from .session import call_unlocked, jl, lazy_seval, serialize, deserialize, JuliaBlob
+
+if TYPE_CHECKING:
+    import juliacall
 
 # Definitions of PSSFSS compatible units:
+_scale = lazy_seval("(x, u) -> x * u")
+_scale_array = lazy_seval("(x, u) -> x .* u")
+
+
 class pssfss_units:
+    """
+    A PSSFSS length unit.  Multiplying a number by it gives the corresponding Julia Unitful quantity, e.g.
+    `3.2*mm`; multiplying a NumPy array (or a list of numbers) gives a Julia array of quantities of the same
+    shape in a single call.  Values are not altered, so floats round-trip exactly.
+    """
+    # Make NumPy defer to __rmul__ for `array * unit`:
+    __array_ufunc__ = None
+
     def __init__(self, label: str) -> None:
-        self.label = label        
+        self.label = label
+        self._unit = lazy_seval(label)
+
+    @property
+    def unit(self):
+        """The Julia Unitful unit, evaluated once per instance."""
+        return self._unit.value
 
     def __mul__(self, other):
-        if isinstance(other, (int, float)):
-            return jl.seval(str(other) + self.label)
-        else:
-            raise TypeError("Cannot multiply pssfss_units with non-numeric type")
+        if isinstance(other, np.generic):
+            other = other.item()
+        if isinstance(other, (int, float)) and not isinstance(other, bool):
+            return _scale(other, self.unit)
+        if isinstance(other, (list, tuple, np.ndarray)):
+            a = np.asarray(other)
+            if a.dtype.kind in 'iuf':
+                if a.dtype.kind == 'f' and a.dtype != np.float64:
+                    a = a.astype(np.float64)
+                return _scale_array(np.ascontiguousarray(a), self.unit)
+        raise TypeError("Cannot multiply pssfss_units with non-numeric type")
         
     def __rmul__(self, other):
             return self * other
@@ -38,32 +68,100 @@ def fixsheetargs(kwargs) -> None:
     for (k, v) in kwargs.items():
         if k == 'units':
              if isinstance(v, pssfss_units):
-                kwargs[k] = jl.seval(v.label)
+                kwargs[k] = v.unit
         if isinstance(v, (list, np.ndarray)):
             kwargs[k] = jl.convert(jl.Vector, v)
     if 'clas' in kwargs:
         classvalue = kwargs.pop('clas')
         kwargs["class"] = classvalue
 
+# Zero-copy views of the fields of a Julia RWGSheet, created on first access:
+_rho_matrix = lazy_seval("sheet -> reinterpret(reshape, Float64, sheet.ρ)")
+
+
+def _view(v) -> np.ndarray:
+    """Read-only NumPy view of a Julia array, falling back to a copy if it cannot be shared."""
+    try:
+        a = np.asarray(v)
+    except (TypeError, ValueError, BufferError):
+        a = None
+    if a is None or a.dtype == object:
+        a = np.array(v.to_numpy())
+    a.flags.writeable = False
+    return a
+
+
+def _rho(jlsheet) -> np.ndarray:
+    """Node coordinates of a Julia sheet as a read-only (N, 2) float array, shared with Julia if possible."""
+    try:
+        a = _view(_rho_matrix(jlsheet)).T
+    except Exception:  # E.g. a juliacall without reinterpret support: copy the points instead
+        a = None
+    if a is None or a.ndim != 2 or a.shape[1] != 2 or a.dtype.kind != 'f':
+        a = _points(_getfield('ρ')(jlsheet))
+        a.flags.writeable = False
+    return a
+
+
+class _field:
+    """Attribute of RWGSheet computed from its Julia sheet on first access, then stored in a slot."""
+
+    def __init__(self, compute) -> None:
+        self.compute = compute
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.slot = '_' + name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        try:
+            return getattr(obj, self.slot)
+        except AttributeError:
+            value = self.compute(obj.jRWGSheet)
+            setattr(obj, self.slot, value)
+            return value
+
+
+def _getfield(name: str):
+    return lambda jlsheet: jl.getfield(jlsheet, jl.Symbol(name))
+
+
 # Define the RWGSheet class:
 class RWGSheet:
+    """
+    Python wrapper of a Julia RWGSheet, as returned by the sheet constructors.  The mesh arrays `rho` (node
+    coordinates, shape (N, 2)), `e1`, `e2`, `fv` and `fe` (1-based indices) are read-only NumPy views of the
+    Julia arrays, created on first access (or copies, where the Julia memory cannot be shared).
+
+    In pypssfss 0.1.0, `rho` was an object array of N Julia points.  Its rows index the same way
+    (`rho[i][0]`, `rho[i][1]`); code needing the Julia points themselves can use `jRWGSheet.ρ`.
+    """
+    __slots__ = ('jRWGSheet', '_units', '_s1', '_s2', '_e1', '_e2', '_fv', '_fe', '_clas', '_info', '_style',
+                 '_rho')
+
+    units = _field(lambda jlsheet: pssfss_units(str(jl.getfield(jlsheet, jl.Symbol('units')))))
+    s1 = _field(lambda jlsheet: _getfield('s₁')(jlsheet).to_numpy())
+    s2 = _field(lambda jlsheet: _getfield('s₂')(jlsheet).to_numpy())
+    e1 = _field(lambda jlsheet: _view(_getfield('e1')(jlsheet)))
+    e2 = _field(lambda jlsheet: _view(_getfield('e2')(jlsheet)))
+    fv = _field(lambda jlsheet: _view(_getfield('fv')(jlsheet)))
+    fe = _field(lambda jlsheet: _view(_getfield('fe')(jlsheet)))
+    clas = _field(_getfield('class'))
+    info = _field(_getfield('info'))
+    style = _field(_getfield('style'))
+    rho = _field(_rho)
+
     def __init__(self, jlsheet: juliacall.AnyValue) -> None:
         self.jRWGSheet = jlsheet
-        self.units = pssfss_units(str(jl.getfield(jlsheet, jl.Symbol('units'))))
-        self.s1 = jl.getfield(jlsheet, jl.Symbol('s₁')).to_numpy()
-        self.s2 = jl.getfield(jlsheet, jl.Symbol('s₂')).to_numpy()
-        self.e1 = jl.getfield(jlsheet, jl.Symbol('e1')).to_numpy()
-        self.e2 = jl.getfield(jlsheet, jl.Symbol('e2')).to_numpy()
-        self.fv = jl.getfield(jlsheet, jl.Symbol('fv')).to_numpy()
-        self.fe = jl.getfield(jlsheet, jl.Symbol('fe')).to_numpy()
-        self.clas = jl.getfield(jlsheet, jl.Symbol('class'))
-        self.info = jl.getfield(jlsheet, jl.Symbol('info'))
-        self.style = jl.getfield(jlsheet, jl.Symbol('style'))
-        self.rho = jl.getfield(jlsheet, jl.Symbol('ρ')).to_numpy()
         
     def __repr__(self) -> str:
          return self.jRWGSheet.__repr__()[7:]    
 
+    def __reduce__(self):
+        # Pickle via Julia serialization, so that sheets can be sent to worker processes:
+        return (_rwgsheet_from_blob, (JuliaBlob.from_value(self.jRWGSheet),))
+
     def edgecount(self) -> int:
         return jl.edgecount(self.jRWGSheet)
 
@@ -77,6 +175,63 @@ class RWGSheet:
         jl.export_sheet(fname, self.jRWGSheet, jl.seval(export_type))        
 
 
+def _rwgsheet_from_blob(blob: JuliaBlob) -> RWGSheet:
+    return RWGSheet(blob.load())
+
+# Memoization of the sheet constructors:
+_sheet_cache = None
+_sheet_cache_config = {}
+
+def configure_sheet_cache(memory: int = 2**28, disk: int = 0, directory: str | None = None) -> SheetCache | None:
+    """
+    Configure the memoization of the sheet constructors (`diagstrip`, `polyring`, `meander`, etc.).
+
+    A constructor called with the same keyword arguments (compared by value, after conversion to their
+    Julia equivalents) as an earlier call returns a new RWGSheet rehydrated from the cached mesh instead of
+    triangulating the geometry again.  By default meshes are only held in memory, for the current process.
+    With `disk` nonzero they are also persisted to disk in the binary format of Julia's Serialization library,
+    so they are shared between processes and sessions.
+
+    Parameters:
+        memory: int
+            Maximum total size in bytes of meshes held in memory.
+        disk: int
+            Maximum total size in bytes of meshes stored on disk (default 0: no disk cache).
+        directory: str
+            Directory for the disk cache.  Defaults to the `sheets` subdirectory of the pypssfss cache directory.
+
+    Setting both `memory` and `disk` to zero disables memoization.  Returns the new SheetCache, or None if
+    memoization is disabled.
+    """
+    global _sheet_cache
+    _sheet_cache_config.update(memory=memory, disk=disk, directory=directory)
+    _sheet_cache = SheetCache(memory, disk, directory) if (memory > 0 or disk > 0) else None
+    return _sheet_cache
+
+def sheet_cache() -> SheetCache | None:
+    """Return the SheetCache memoizing the sheet constructors, or None if memoization is disabled."""
+    if _sheet_cache is None and not _sheet_cache_config:
+        configure_sheet_cache()
+    return _sheet_cache
+
+def _memoized(constructor: str, kwargs: dict, unlocked: bool = False) -> RWGSheet:
+    """
+    Call the named Julia sheet constructor with (already fixed) kwargs, using the sheet cache.
+    With `unlocked=True` the GIL is released while Julia triangulates the geometry.
+    """
+    f = getattr(jl, constructor)
+    cache = sheet_cache()
+    if cache is None:
+        return RWGSheet(call_unlocked(f, **kwargs) if unlocked else f(**kwargs))
+    key = content_key(constructor, kwargs)
+    data = cache.get(key)
+    if data is not None:
+        return RWGSheet(deserialize(data))
+    jlsheet = call_unlocked(f, **kwargs) if unlocked else f(**kwargs)
+    cache.put(key, serialize(jlsheet))
+    return RWGSheet(jlsheet)
+
+
 # Define the Python sheet constructors:
 def diagstrip(**kwargs) -> RWGSheet:
     """
@@ -87,7 +242,7 @@ def diagstrip(**kwargs) -> RWGSheet:
     to avoid infringing on the Python builtin keyword.
     """
     fixsheetargs(kwargs)
-    return RWGSheet(jl.diagstrip(**kwargs))
+    return _memoized('diagstrip', kwargs)
 
 def jerusalemcross(**kwargs) -> RWGSheet:
     """
@@ -99,7 +254,7 @@ def jerusalemcross(**kwargs) -> RWGSheet:
     """
     "See the Julia documentation at https://simonp0420.github.io/PSSFSS.jl/stable/reference/#PSSFSS.Elements.jerusalemcross"
     fixsheetargs(kwargs)
-    return RWGSheet(jl.jerusalemcross(**kwargs))
+    return _memoized('jerusalemcross', kwargs)
 
 def loadedcross(**kwargs) -> RWGSheet:
     """
@@ -110,7 +265,7 @@ def loadedcross(**kwargs) -> RWGSheet:
     to avoid infringing on the Python builtin keyword.
     """
     fixsheetargs(kwargs)
-    return RWGSheet(jl.loadedcross(**kwargs))
+    return _memoized('loadedcross', kwargs)
 
 def manji(**kwargs) -> RWGSheet:
     """
@@ -121,7 +276,7 @@ def manji(**kwargs) -> RWGSheet:
     to avoid infringing on the Python builtin keyword.
     """
     fixsheetargs(kwargs)
-    return RWGSheet(jl.manji(**kwargs))
+    return _memoized('manji', kwargs)
 
 def meander(**kwargs) -> RWGSheet:
     """
@@ -132,7 +287,7 @@ def meander(**kwargs) -> RWGSheet:
     to avoid infringing on the Python builtin keyword.
     """
     fixsheetargs(kwargs)
-    return RWGSheet(jl.meander(**kwargs))
+    return _memoized('meander', kwargs)
 
 def pecsheet() -> RWGSheet:
     """
@@ -147,7 +302,7 @@ def pixels(**kwargs) -> RWGSheet:
     to avoid infringing on the Python builtin keyword.
     """
     fixsheetargs(kwargs)
-    return RWGSheet(jl.pixels(**kwargs))
+    return _memoized('pixels', kwargs)
 
 def pmcsheet() -> RWGSheet:
     """
@@ -164,8 +319,7 @@ def polyring(**kwargs) -> RWGSheet:
     to avoid infringing on the Python builtin keyword.
     """
     fixsheetargs(kwargs)
-    return RWGSheet(jl.polyring(**kwargs))
-polyring.__doc__ = jl.seval('@doc polyring')
+    return _memoized('polyring', kwargs)
 
 def rectstrip(**kwargs) -> RWGSheet:
     """
@@ -176,7 +330,7 @@ def rectstrip(**kwargs) -> RWGSheet:
     to avoid infringing on the Python builtin keyword.
     """
     fixsheetargs(kwargs)
-    return RWGSheet(jl.rectstrip(**kwargs))
+    return _memoized('rectstrip', kwargs)
 
 def sinuous(**kwargs) -> RWGSheet:
     """
@@ -187,7 +341,7 @@ def sinuous(**kwargs) -> RWGSheet:
     to avoid infringing on the Python builtin keyword.
     """
     fixsheetargs(kwargs)
-    return RWGSheet(jl.sinuous(**kwargs))
+    return _memoized('sinuous', kwargs)
 
 def splitring(**kwargs) -> RWGSheet:
     """
@@ -198,7 +352,7 @@ def splitring(**kwargs) -> RWGSheet:
     to avoid infringing on the Python builtin keyword.
     """
     fixsheetargs(kwargs)
-    return RWGSheet(jl.splitring(**kwargs))
+    return _memoized('splitring', kwargs)
 
 def sympixels(**kwargs) -> RWGSheet:
     """
@@ -209,16 +363,110 @@ def sympixels(**kwargs) -> RWGSheet:
     to avoid infringing on the Python builtin keyword.
     """
     fixsheetargs(kwargs)
-    return RWGSheet(jl.sympixels(**kwargs))
+    return _memoized('sympixels', kwargs)
+
+# Batched pixel constructors for optimization populations:
+_build_batch = lazy_seval("""
+    (f, key, patterns; kwargs...) -> [f(; kwargs..., Symbol(key) => Array(p)) for p in eachslice(patterns; dims=1)]""")
+
+
+class SheetBatch:
+    """
+    A sequence of sheets built by `pixels_batch` or `sympixels_batch`, held as one Julia vector.  Indexing
+    gives an RWGSheet (or, for a slice or index array, another SheetBatch) without copying the mesh.  A batch
+    pickles as a single serialized vector, and `designs` turns it into inputs of `analyze_many`.
+    """
+    __slots__ = ('jsheets', 'index')
+
+    def __init__(self, jsheets, index: np.ndarray) -> None:
+        self.jsheets = jsheets
+        self.index = index
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} of {len(self)} sheets ({len(self.jsheets)} distinct)>"
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, i):
+        if isinstance(i, (int, np.integer)):
+            return RWGSheet(self.jsheets[int(self.index[i])])
+        return SheetBatch(self.jsheets, self.index[i])
+
+    def __iter__(self):
+        for i in self.index.tolist():
+            yield RWGSheet(self.jsheets[i])
+
+    def __reduce__(self):
+        return (_sheetbatch_from_blob, (JuliaBlob.from_value(self.jsheets), self.index))
+
+    def designs(self, strata: list, flist, steering, kwargs: dict | None = None) -> list:
+        """
+        Return one `Design` per sheet for `analyze_many`, with the sheet placed in `strata` at the position(s)
+        holding `None`.
+        """
+        from .parallel import Design
+        return [Design([sheet if s is None else s for s in strata], flist, steering, kwargs) for sheet in self]
+
+
+def _sheetbatch_from_blob(blob: JuliaBlob, index: np.ndarray) -> SheetBatch:
+    return SheetBatch(blob.load(), index)
+
+
+def _batch(constructor: str, kwargs: dict) -> SheetBatch:
+    keys = [k for (k, v) in kwargs.items() if isinstance(v, np.ndarray) and v.dtype == np.bool_]
+    if len(keys) != 1:
+        raise ValueError(f"{constructor}_batch needs exactly one boolean NumPy array of patterns, got {len(keys)}")
+    key = keys[0]
+    patterns = kwargs.pop(key)
+    if patterns.ndim < 2:
+        raise ValueError("the patterns array needs a leading batch dimension")
+    # Populations often repeat candidates: build each distinct pattern once.
+    flat = patterns.reshape(len(patterns), -1)
+    distinct, index = np.unique(flat, axis=0, return_inverse=True)
+    distinct = np.ascontiguousarray(distinct.reshape((-1,) + patterns.shape[1:]))
+    fixsheetargs(kwargs)
+    return SheetBatch(_build_batch(getattr(jl, constructor), key, distinct, **kwargs), index.reshape(-1))
+
+
+def pixels_batch(**kwargs) -> SheetBatch:
+    """
+    Build many `pixels` sheets in one Julia call.  The keyword arguments are those of `pixels`, except that the
+    pixel pattern argument is a boolean NumPy array with an extra leading dimension, one pattern per sheet
+    (e.g. of shape (ncandidates, ny, nx)).  The other arguments are converted once and shared by all sheets.
+    Returns a SheetBatch.  Sheets are not memoized by the sheet cache.
+    """
+    return _batch('pixels', kwargs)
+
+
+def sympixels_batch(**kwargs) -> SheetBatch:
+    """
+    Build many `sympixels` sheets in one Julia call.  The pixel pattern argument is a boolean NumPy array with
+    an extra leading dimension, one pattern per sheet; see `pixels_batch`.
+    """
+    return _batch('sympixels', kwargs)
 
 # Plotting
-import matplotlib.pyplot as plt
-import numpy as np
+def _points(rho) -> np.ndarray:
+    """Return the node coordinates of a sheet as an (N, 2) float array."""
+    a = np.asarray(rho)
+    if a.ndim == 2 and a.shape[1] == 2 and a.dtype.kind in 'iuf':
+        return a.astype(np.float64, copy=False)
+    return np.array([(p[0], p[1]) for p in rho], dtype=np.float64).reshape(-1, 2)
+
+
+def _annotate(ax, positions, labels, maxlabels, **kwargs) -> None:
+    """Add text labels at `positions` (R, K, 2), keeping at most about `maxlabels` of them."""
+    step = max(1, -(-positions.shape[0] * positions.shape[1] // maxlabels)) if maxlabels else 1
+    for offset_positions in positions:
+        for (x, y), label in zip(offset_positions[::step], labels[::step]):
+            ax.text(x, y, label, ha='center', va='center', **kwargs)
+
 
 def plot_sheet(sheet, edges=True, faces=False, nodes=False,
                edgenumbers=False, facenumbers=False, nodenumbers=False,
                edgecolor = 'red', facecolor = 'red', nodecolor = 'black', unitcellcolor = 'blue',
-               unitcell=False, rep=(1, 1), fontsize=9, linewidth=1.5):
+               unitcell=False, rep=(1, 1), fontsize=9, linewidth=1.5, maxlabels=2000):
     """
     Plot an RWGSheet object using Matplotlib.  This function must be followed by a call to matplotlib.pyplot.show()
     to make the plot visible.
@@ -238,7 +486,16 @@ def plot_sheet(sheet, edges=True, faces=False, nodes=False,
             A 2-tuple of positive integers giving the number of repetitions to display in the two periodic directions.
         fontsize: int
             Font size for annotations.
+        maxlabels: int
+            Approximate maximum number of annotations of each kind (over all repetitions).  For larger meshes
+            only every k-th edge, face, or node is annotated.  Use 0 to annotate every item.
+
+    Edges, faces, nodes and unit cells of all repetitions are each drawn as a single Matplotlib collection, so
+    large meshes and many repetitions render quickly.
     """
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection, PolyCollection
+
     fig, ax = plt.subplots()
     ax.set_aspect('equal')
     ax.set_xlabel(f"x ({sheet.units})")
@@ -247,56 +504,55 @@ def plot_sheet(sheet, edges=True, faces=False, nodes=False,
     mrange = range(1, rep[0] + 1) if isinstance(rep[0], int) else rep[0]
     nrange = range(1, rep[1] + 1) if isinstance(rep[1], int) else rep[1]
 
-    for m in mrange:
-        for n in nrange:
-            x0, y0 = (m - 1) * sheet.s1 + (n - 1) * sheet.s2
-
-            # Plot faces
-            if faces:
-                for i in range(sheet.fv.shape[1]):
-                    points = sheet.rho[sheet.fv[:, i] - 1]
-                    x = x0 + np.array([p[0] for p in points] + [points[0][0]])
-                    y = y0 + np.array([p[1] for p in points] + [points[0][1]])
-                    ax.fill(x, y, color=facecolor, alpha=0.8)
-
-            # Plot edges
-            if edges:
-                for i in range(len(sheet.e1)):
-                    points = sheet.rho[[sheet.e1[i] - 1, sheet.e2[i] - 1]]
-                    x = x0 + np.array([p[0] for p in points])
-                    y = y0 + np.array([p[1] for p in points])
-                    ax.plot(x, y, linestyle='solid', color=edgecolor, lw=linewidth)
-
-            # Plot unit cell
-            if unitcell:
-                points = [np.zeros(2), sheet.s1, sheet.s1 + sheet.s2, sheet.s2]
-                x = x0 + np.array([p[0] for p in points] + [0])
-                y = y0 + np.array([p[1] for p in points] + [0])
-                ax.plot(x, y, color=unitcellcolor, linestyle='dotted', lw=linewidth)
-
-            # Plot nodes
-            if nodes:
-                x = x0 + np.array([p[0] for p in sheet.rho])
-                y = y0 + np.array([p[1] for p in sheet.rho])
-                ax.scatter(x, y, color='black', s=10)
-
-            # Annotate nodes
-            if nodenumbers:
-                for i, p in enumerate(sheet.rho):
-                    x, y = x0 + p[0], y0 + p[1]
-                    ax.text(x, y, str(i + 1), fontsize=fontsize, color='black', ha='center', va='center')
-
-            # Annotate edges
-            if edgenumbers:
-                for i in range(len(sheet.e1)):
-                    p1, p2 = sheet.rho[sheet.e1[i] - 1], sheet.rho[sheet.e2[i] - 1]
-                    x, y = x0 + (p1[0] + p2[0]) / 2, y0 + (p1[1] + p2[1]) / 2
-                    ax.text(x, y, str(i + 1), fontsize=fontsize, color=edgecolor, ha='center', va='center')
-
-            # Annotate faces
-            if facenumbers:
-                for i in range(sheet.fv.shape[1]):
-                    points = sheet.rho[sheet.fv[:, i]]
-                    x = x0 + np.mean([p[0] for p in points])
-                    y = y0 + np.mean([p[1] for p in points])
-                    ax.text(x, y, str(i + 1), fontsize=fontsize, color=facecolor, ha='center', va='center')
+    # Offsets of all repetitions, shape (R, 2):
+    s1, s2 = np.asarray(sheet.s1, dtype=np.float64), np.asarray(sheet.s2, dtype=np.float64)
+    m = np.asarray(list(mrange), dtype=np.float64) - 1
+    n = np.asarray(list(nrange), dtype=np.float64) - 1
+    offsets = (m[:, None, None] * s1 + n[None, :, None] * s2).reshape(-1, 2)
+
+    rho = _points(sheet.rho)
+    e = np.stack([np.asarray(sheet.e1), np.asarray(sheet.e2)], axis=1) - 1  # (E, 2), zero-based
+    fv = np.asarray(sheet.fv).T - 1  # (F, 3), zero-based
+
+    def tile(p):
+        # Replicate points of shape (..., 2) at every offset, giving shape (R, ..., 2):
+        return offsets.reshape((-1,) + (1,) * (p.ndim - 1) + (2,)) + p
+
+    # Plot faces
+    if faces:
+        polys = tile(rho[fv]).reshape(-1, fv.shape[1], 2)
+        ax.add_collection(PolyCollection(polys, facecolors=facecolor, edgecolors=facecolor, alpha=0.8, zorder=1))
+
+    # Plot edges
+    if edges:
+        segments = tile(rho[e]).reshape(-1, 2, 2)
+        ax.add_collection(LineCollection(segments, colors=edgecolor, linestyles='solid', linewidths=linewidth,
+                                         zorder=2))
+
+    # Plot unit cell
+    if unitcell:
+        cell = np.array([np.zeros(2), s1, s1 + s2, s2, np.zeros(2)])
+        ax.add_collection(LineCollection(tile(cell), colors=unitcellcolor, linestyles='dotted',
+                                         linewidths=linewidth, zorder=2))
+
+    # Plot nodes
+    if nodes:
+        xy = tile(rho).reshape(-1, 2)
+        ax.scatter(xy[:, 0], xy[:, 1], color=nodecolor, s=10, zorder=2)
+
+    ax.autoscale_view()
+
+    # Annotate nodes
+    if nodenumbers:
+        _annotate(ax, tile(rho), [str(i + 1) for i in range(len(rho))], maxlabels,
+                  fontsize=fontsize, color='black')
+
+    # Annotate edges
+    if edgenumbers:
+        _annotate(ax, tile(rho[e].mean(axis=1)), [str(i + 1) for i in range(len(e))], maxlabels,
+                  fontsize=fontsize, color=edgecolor)
+
+    # Annotate faces
+    if facenumbers:
+        _annotate(ax, tile(rho[fv].mean(axis=1)), [str(i + 1) for i in range(len(fv))], maxlabels,
+                  fontsize=fontsize, color=facecolor)
@@ -1,5 +1,11 @@
+import itertools
+import numbers
 from collections import namedtuple
 
+import numpy as np
+
+from .session import jl, lazy_seval
+
 # Definitions for setting up steering
 ThetaPhi = namedtuple('ThetaPhi', ['theta', 'phi'])
 ThetaPhi.__doc__ = "A namedtuple with fields 'theta' and 'phi' used to specify scan angles in pypssfss"
@@ -13,3 +19,43 @@ Psi1Psi2.__doc__ = "A namedtuple with fields 'psi1' and 'psi2' used to specify i
 Psi2Psi1 = namedtuple('Psi2Psi1', ['psi2', 'psi1'])
 Psi2Psi1.__doc__ = "A namedtuple with fields 'psi2' and 'psi1' used to specify incremental phase shifts in pypssfss"
 
+
+
+# Conversion of steering to a Julia NamedTuple:
+_namedtuple = lazy_seval("(f1, f2, v1, v2) -> NamedTuple{(Symbol(f1), Symbol(f2))}((v1, v2))")
+
+
+def _steering_value(v, copy: bool):
+    if isinstance(v, numbers.Integral):
+        return int(v)
+    if isinstance(v, numbers.Real):
+        return float(v)
+    a = np.asarray(v)
+    if a.ndim == 0:
+        return a.item()
+    if a.dtype != np.float64 or not a.flags.c_contiguous:
+        a = np.ascontiguousarray(a, dtype=np.float64)
+    a = a.reshape(-1)
+    return jl.Vector[jl.Float64](a) if copy else a
+
+
+def to_julia(steering: ThetaPhi | PhiTheta | Psi1Psi2 | Psi2Psi1, copy: bool = False):
+    """
+    Convert a steering namedtuple to the equivalent Julia NamedTuple, e.g. `ThetaPhi(0, [0, 90])` to
+    `(theta = 0, phi = [0.0, 90.0])`.  Scalars are passed as numbers; iterables and NumPy arrays of any
+    real dtype become vectors of Float64.  A float64 NumPy array is shared with Julia without copying
+    unless `copy` is True, in which case the vectors are native Julia copies.
+    """
+    f1, f2 = steering._fields
+    v1, v2 = (_steering_value(v, copy) for v in steering)
+    return _namedtuple(f1, f2, v1, v2)
+
+
+def points(steering: ThetaPhi | PhiTheta | Psi1Psi2 | Psi2Psi1) -> list:
+    """
+    Return the individual steering points of `steering` as a list of namedtuples of the same type with
+    scalar fields, in the order in which `analyze` visits them (the first field varying slowest), e.g.
+    `points(ThetaPhi([0, 30], 90))` gives `[ThetaPhi(0.0, 90.0), ThetaPhi(30.0, 90.0)]`.
+    """
+    values = (np.atleast_1d(np.asarray(v, dtype=np.float64)).reshape(-1).tolist() for v in steering)
+    return [type(steering)(*p) for p in itertools.product(*values)]
@@ -0,0 +1,241 @@
+"""
+This is the store module.
+
+It provides a compact binary store for `analyze` results, which can be appended to and read through memory
+mapping.  A store is a directory holding:
+
+- `meta.json`: format version, number of points and column layout.
+- `FGHz.f64`, `theta.f64`, `phi.f64`: the frequency (GHz) and incidence angles (degrees) of each point, as
+  contiguous little-endian float64 arrays.
+- `S.c128`: the generalized scattering matrix of each point in the TE/TM basis, as a contiguous complex128
+  array of shape (points, 16), with columns in the order given by `S_NAMES`.
+- `results.jls` and `offsets.i64`: each full result in the binary format of Julia's Serialization standard
+  library, and the byte offset of each, so that any subset of the results can be reconstructed exactly.
+
+`extract_result`, `res2tep` and `res2fresnel` accept a ResultStore (or the path of a store directory) in place
+of the vector of results.
+
+Available classes and functions:
+
+- ResultStore
+- is_store
+"""
+import contextlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from .session import lazy_seval
+
+FORMAT = 'pypssfss-result-store'
+VERSION = 1
+
+# Names of the stored scattering parameters, as @outputs requests:
+S_NAMES = tuple(f's{ij}({a},{b})' for ij in ('11', '12', '21', '22') for a in ('te', 'tm') for b in ('te', 'tm'))
+
+_FLOAT_COLUMNS = ('FGHz', 'theta', 'phi')
+
+# Julia functions serializing results point by point, and deserializing the points at given byte offsets:
+_serialize_points = lazy_seval("""
+    begin
+        import Serialization
+        function (results)
+            io = IOBuffer()
+            offsets = Int64[]
+            for r in results
+                push!(offsets, position(io))
+                Serialization.serialize(io, r)
+            end
+            (take!(io), offsets)
+        end
+    end""")
+
+_deserialize_points = lazy_seval("""
+    begin
+        import Serialization
+        (data, offsets) -> let io = IOBuffer(Vector{UInt8}(data))
+            [(seek(io, o); Serialization.deserialize(io)) for o in offsets]
+        end
+    end""")
+
+
+def is_store(path) -> bool:
+    """Return True if `path` is a ResultStore or the path of a result store directory."""
+    if isinstance(path, ResultStore):
+        return True
+    return isinstance(path, (str, os.PathLike)) and os.path.isfile(os.path.join(path, 'meta.json'))
+
+
+class ResultStore:
+    """
+    A directory of `analyze` results in a compact, memory-mappable binary format.  E.g.
+
+        store = ResultStore('sweep.store')
+        store.append(analyze(strata, flist, steering))
+        f, s21 = store.column('FGHz'), store.column('s21(te,te)')
+        data = extract_result(store, 'FGHz s21dB(te,te)')
+
+    Parameters:
+        path: str
+            The store directory.  It is created if it does not exist.
+        mode: str
+            'a' (the default) to open for reading and appending, or 'r' for reading only.
+    """
+
+    def __init__(self, path: str, mode: str = 'a') -> None:
+        if mode not in ('r', 'a'):
+            raise ValueError(f"mode must be 'r' or 'a', not {mode!r}")
+        self.path = os.fspath(path)
+        self.mode = mode
+        if not os.path.exists(self._file('meta.json')):
+            if mode == 'r':
+                raise FileNotFoundError(f"no result store at {self.path}")
+            os.makedirs(self.path, exist_ok=True)
+            self._write_meta({'format': FORMAT, 'version': VERSION, 'count': 0, 'blob_size': 0,
+                              'S_names': list(S_NAMES)})
+        self.meta = self._read_meta()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.path!r}, mode={self.mode!r})"
+
+    def __len__(self) -> int:
+        return self.meta['count']
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _read_meta(self) -> dict:
+        with open(self._file('meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('format') != FORMAT or meta.get('version') != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} pypssfss result store")
+        return meta
+
+    def _write_meta(self, meta: dict) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._file('meta.json'))
+
+    def _array(self, name: str, dtype, width: int | None = None) -> np.ndarray:
+        """Read-only memory map of a column file, limited to the committed points."""
+        shape = (len(self),) if width is None else (len(self), width)
+        if len(self) == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(self._file(name), dtype=dtype, mode='r', shape=shape)
+
+    def refresh(self) -> None:
+        """Re-read the metadata, to see points appended by another process."""
+        self.meta = self._read_meta()
+
+    @property
+    def S(self) -> np.ndarray:
+        """Memory-mapped complex128 array of shape (points, 16) with the scattering parameters in `S_NAMES` order."""
+        return self._array('S.c128', '<c16', len(S_NAMES))
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Return a stored column as a memory-mapped array: 'FGHz', 'theta', 'phi', or one of the scattering
+        parameters in `S_NAMES` (e.g. 's21(te,te)').  Names are not case-sensitive.
+        """
+        key = name.replace(' ', '').lower()
+        for c in _FLOAT_COLUMNS:
+            if key == c.lower():
+                return self._array(c + '.f64', '<f8')
+        if key in S_NAMES:
+            return self.S[:, S_NAMES.index(key)]
+        raise KeyError(name)
+
+    def has_columns(self, names) -> bool:
+        """Return True if all the named outputs are stored as columns."""
+        stored = {c.lower() for c in _FLOAT_COLUMNS} | set(S_NAMES)
+        return all(name.replace(' ', '').lower() in stored for name in names)
+
+    def append(self, results) -> None:
+        """Append a vector of Julia results, as returned by `analyze`."""
+        if self.mode == 'r':
+            raise PermissionError(f"{self} is read-only")
+        from .pypssfss import _extract
+        columns = _extract(results, ' '.join(_FLOAT_COLUMNS + S_NAMES), columnar=True)
+        data, offsets = _serialize_points(results)
+        data, offsets = np.asarray(data), np.asarray(offsets, dtype='<i8')
+
+        self.refresh()
+        count, blob_size = self.meta['count'], self.meta['blob_size']
+        S = np.stack([columns[name] for name in S_NAMES], axis=1).astype('<c16')
+        chunks = [(c + '.f64', columns[c].astype('<f8'), 8) for c in _FLOAT_COLUMNS]
+        chunks += [('S.c128', S, 16 * len(S_NAMES)),
+                   ('offsets.i64', offsets + blob_size, 8)]
+        for name, a, itemsize in chunks:
+            self._append_bytes(name, count * itemsize, a.tobytes())
+        self._append_bytes('results.jls', blob_size, data.tobytes())
+
+        # Committing the new count makes the points visible to readers:
+        self.meta.update(count=count + len(offsets), blob_size=blob_size + len(data))
+        self._write_meta(self.meta)
+
+    def _append_bytes(self, name: str, committed: int, data: bytes) -> None:
+        # Discard anything beyond the committed size, left by an interrupted append:
+        with open(self._file(name), 'ab') as f:
+            f.truncate(committed)
+            f.write(data)
+
+    def load(self, indices=None):
+        """
+        Return a Julia vector of the stored results (all of them, or those at the given indices), reconstructed
+        exactly from their serialized form.  Only the bytes of the requested results are read.
+        """
+        offsets = self._array('offsets.i64', '<i8')
+        ends = np.append(offsets[1:], self.meta['blob_size']) if len(self) else offsets
+        indices = np.arange(len(self)) if indices is None else np.atleast_1d(np.asarray(indices)).ravel()
+        if len(indices) == 0:
+            return _deserialize_points(np.empty(0, dtype=np.uint8), np.empty(0, dtype=np.int64))
+        blob = np.memmap(self._file('results.jls'), dtype=np.uint8, mode='r', shape=(self.meta['blob_size'],))
+        lo, hi = offsets[indices].min(), ends[indices].max()
+        return _deserialize_points(np.array(blob[lo:hi]), offsets[indices] - lo)
+
+    @contextlib.contextmanager
+    def result_file(self, chunksize: int = 2**24):
+        """
+        Context manager yielding the path of a PSSFSS result file holding the stored results, as read by the
+        Julia `res2tep` and `res2fresnel` functions.  `results.jls` is such a file, and is used directly when it
+        holds only committed results.  Otherwise (while another process is appending) its committed part is
+        copied `chunksize` bytes at a time to a temporary file, which is deleted on exit.
+        """
+        self.refresh()
+        blob_size = self.meta['blob_size']
+        path = self._file('results.jls')
+        if os.path.exists(path) and os.path.getsize(path) == blob_size:
+            yield path
+            return
+        fd, tmp = tempfile.mkstemp(suffix='.res')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                if blob_size:
+                    blob = np.memmap(path, dtype=np.uint8, mode='r', shape=(blob_size,))
+                    for start in range(0, blob_size, chunksize):
+                        out.write(blob[start:start + chunksize].tobytes())
+                    del blob
+            yield tmp
+        finally:
+            os.remove(tmp)
+
+    def extract(self, outreq, columnar: bool = False, chunksize: int = 4096):
+        """
+        Equivalent of `extract_result` applied to the stored results.  If `outreq` is a string naming only
+        stored columns, the values are read from the column files without Julia.  Otherwise the results are
+        reconstructed and processed `chunksize` points at a time.
+        """
+        from .pypssfss import _extract, output_names
+        if isinstance(outreq, str) and self.has_columns(output_names(outreq)):
+            names = output_names(outreq)
+            if columnar:
+                return {name: np.asarray(self.column(name)) for name in names}
+            return np.column_stack([self.column(name) for name in names])
+        parts = [_extract(self.load(range(i, min(i + chunksize, len(self)))), outreq, columnar)
+                 for i in range(0, len(self), chunksize)]
+        if not columnar:
+            return np.concatenate(parts) if parts else np.empty((0, 0))
+        return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]} if parts else {}
@@ -0,0 +1,312 @@
+"""
+This is the surrogate module.
+
+It fits fast models of the scattering parameters of a structure to `analyze` results on a grid of frequencies
+and incidence angles (theta, phi), for evaluation at very many arbitrary points, e.g. by ray tracers.  In
+frequency the model is a rational function in barycentric form, found by the AAA algorithm with support points
+and weights shared by all angles and scattering parameters.  In angle it is a piecewise-cubic (Catmull-Rom)
+interpolation between the fitted angles.
+
+    model = fit_surrogate(strata, np.linspace(8, 12, 41), ThetaPhi(np.linspace(0, 60, 7), [0, 45, 90]),
+                          tol=1e-3)
+    s21 = model(f, theta, phi, 's21(te,te)')     # complex NumPy array, broadcast over f, theta, phi
+    model.save('panel.npz')
+    model = Surrogate.load('panel.npz')
+
+`fit_surrogate` refines the grid where its error estimates exceed the tolerance, analyzing extra frequencies
+and angles as needed.  `Surrogate.from_results` fits a model to existing results.
+
+Available classes and functions:
+
+- Surrogate
+- fit_surrogate
+- aaa
+"""
+import numpy as np
+
+from .store import S_NAMES
+
+FORMAT = 'pypssfss-surrogate'
+VERSION = 1
+
+_COLUMNS = ('FGHz', 'theta', 'phi') + S_NAMES
+
+
+def aaa(z: np.ndarray, F: np.ndarray, tol: float = 1e-3, mmax: int = 100) -> tuple:
+    """
+    Set-valued AAA rational approximation of the columns of `F` (shape (M, K)) sampled at the real points `z`
+    (shape (M,)), with support points and weights shared by all columns.  Support points are added until every
+    sample is matched to within the absolute tolerance `tol`, or `mmax` support points are used.  Returns the
+    support point indices, the weights and the maximum error at the samples.
+    """
+    z = np.asarray(z, dtype=np.float64)
+    F = np.asarray(F, dtype=np.complex128).reshape(len(z), -1)
+    free = np.ones(len(z), dtype=bool)
+    R = np.broadcast_to(F.mean(axis=0), F.shape)
+    support = []
+    w = np.ones(0)
+    for _ in range(min(mmax, len(z) - 1)):
+        err = np.max(np.abs(F - R), axis=1)
+        if err.max() <= tol:
+            break
+        j = int(np.argmax(err))
+        support.append(j)
+        free[j] = False
+        C = 1 / (z[free, None] - z[None, support])
+        # Loewner matrices of all columns, stacked:
+        L = (F[free][:, None, :] - F[support][None, :, :]) * C[:, :, None]
+        A = L.transpose(0, 2, 1).reshape(-1, len(support))
+        _, _, vh = np.linalg.svd(A, full_matrices=A.shape[0] < A.shape[1])
+        w = vh[-1].conj()
+        R = F.copy()
+        R[free] = (C @ (w[:, None] * F[support])) / (C @ w)[:, None]
+    err = np.max(np.abs(F - R), axis=1)
+    return np.array(support, dtype=np.int64), w, float(err.max()) if len(err) else 0.0
+
+
+def _cauchy(f: np.ndarray, z: np.ndarray, w: np.ndarray) -> np.ndarray:
+    """Barycentric basis at frequencies `f`: rows summing to 1, exact at the support points."""
+    d = f[:, None] - z[None, :]
+    exact = d == 0
+    d[exact] = 1
+    C = w / d
+    rows = exact.any(axis=1)
+    C[rows] = exact[rows]
+    return C / C.sum(axis=1, keepdims=True)
+
+
+def _cubic_weights(x: np.ndarray, q: np.ndarray) -> tuple:
+    """
+    Indices (shape (Q, 4)) and weights of the nodes `x` giving the Catmull-Rom interpolant at `q`, which is
+    clamped to the range of `x`.
+    """
+    n = len(x)
+    if n == 1:
+        return np.zeros((len(q), 1), dtype=np.int64), np.ones((len(q), 1))
+    q = np.clip(q, x[0], x[-1])
+    i = np.clip(np.searchsorted(x, q, side='right') - 1, 0, n - 2)
+    h = x[i + 1] - x[i]
+    t = (q - x[i]) / h
+    t2, t3 = t * t, t * t * t
+    im, ip = np.maximum(i - 1, 0), np.minimum(i + 2, n - 1)
+    idx = np.stack([im, i, i + 1, ip], axis=1)
+    w = np.zeros((len(q), 4))
+    w[:, 1] = 2 * t3 - 3 * t2 + 1
+    w[:, 2] = -2 * t3 + 3 * t2
+    # Tangents by central differences (one-sided at the ends), m_i = (y[i+1] - y[im]) / (x[i+1] - x[im]):
+    c = h * (t3 - 2 * t2 + t) / (x[i + 1] - x[im])
+    w[:, 2] += c
+    w[:, 0] -= c
+    c = h * (t3 - t2) / (x[ip] - x[i])
+    w[:, 3] += c
+    w[:, 1] -= c
+    return idx, w
+
+
+def _index(name: str) -> int:
+    key = name.replace(' ', '').lower()
+    for k, s in enumerate(S_NAMES):
+        if s == key:
+            return k
+    raise ValueError(f"unknown scattering parameter {name!r}; expected one of {', '.join(S_NAMES)}")
+
+
+def _grid(columns: dict) -> tuple:
+    """Arrange extracted columns on their (theta, phi, frequency) grid; return the axes and the data."""
+    axes = [np.unique(columns[name]) for name in ('theta', 'phi', 'FGHz')]
+    index = tuple(np.searchsorted(a, columns[name]) for a, name in zip(axes, ('theta', 'phi', 'FGHz')))
+    data = np.full(tuple(len(a) for a in axes) + (len(S_NAMES),), np.nan, dtype=np.complex128)
+    data[index] = np.stack([columns[name] for name in S_NAMES], axis=-1)
+    if np.isnan(data).any():
+        raise ValueError("the results do not cover a full grid of frequencies and (theta, phi) angles")
+    return axes, data
+
+
+class Surrogate:
+    """
+    A model of the 16 scattering parameters (TE/TM basis, in the order of `store.S_NAMES`) as functions of
+    frequency (GHz) and incidence angles theta and phi (degrees).  Angles are clamped to the fitted ranges;
+    frequencies outside the fitted band are extrapolated by the rational model and should be avoided.
+
+    Attributes:
+        theta, phi: the fitted angles.
+        support, weights: support frequencies and weights of the barycentric rational model.
+        values: scattering parameters at the support frequencies, of shape (len(theta), len(phi), m, 16).
+        error: estimated maximum error of the model, where known.
+    """
+
+    def __init__(self, theta, phi, support, weights, values, error: float | None = None) -> None:
+        self.theta = np.asarray(theta, dtype=np.float64)
+        self.phi = np.asarray(phi, dtype=np.float64)
+        self.support = np.asarray(support, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.complex128)
+        self.values = np.asarray(values, dtype=np.complex128)
+        self.error = error
+
+    def __repr__(self) -> str:
+        return (f"<{type(self).__name__}: {len(self.support)} support frequencies "
+                f"{self.support.min():g}-{self.support.max():g} GHz, {len(self.theta)} theta x {len(self.phi)} phi>")
+
+    @classmethod
+    def from_data(cls, FGHz, theta, phi, data, tol: float = 1e-3, mmax: int = 100) -> 'Surrogate':
+        """
+        Fit a model to scattering parameters `data` of shape (len(theta), len(phi), len(FGHz), 16) given on a
+        grid of sorted frequencies and angles.
+        """
+        FGHz = np.asarray(FGHz, dtype=np.float64)
+        F = np.moveaxis(data, 2, 0).reshape(len(FGHz), -1)
+        support, weights, error = aaa(FGHz, F, tol, mmax)
+        return cls(theta, phi, FGHz[support], weights, data[:, :, support, :], error)
+
+    @classmethod
+    def from_results(cls, results, tol: float = 1e-3, mmax: int = 100) -> 'Surrogate':
+        """
+        Fit a model to results returned by `analyze` (or a ResultStore), which must cover a full grid of
+        frequencies and (theta, phi) angles.
+        """
+        from .pypssfss import extract_result
+        axes, data = _grid(extract_result(results, ' '.join(_COLUMNS), columnar=True))
+        return cls.from_data(axes[2], axes[0], axes[1], data, tol, mmax)
+
+    def S(self, f, theta, phi, chunksize: int = 16384) -> np.ndarray:
+        """
+        Return the scattering parameters at frequencies `f` (GHz) and angles `theta`, `phi` (degrees), which
+        are broadcast together, as a complex array with a trailing dimension of 16 (in the order of `S_NAMES`).
+        """
+        f, theta, phi = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (f, theta, phi)))
+        shape = f.shape
+        f = f.reshape(-1)
+        m, nk = self.values.shape[2:]
+        out = np.empty((len(f), nk), dtype=np.complex128)
+        it, wt = _cubic_weights(self.theta, theta.reshape(-1))
+        ip, wp = _cubic_weights(self.phi, phi.reshape(-1))
+        W = (wt[:, :, None] * wp[:, None, :]).reshape(len(f), -1)
+        cell = it[:, it.shape[1] // 2] * len(self.phi) + ip[:, ip.shape[1] // 2]
+        fu, inverse = np.unique(f, return_inverse=True)
+        shared = len(fu) * len(self.theta) * len(self.phi) <= len(f) // 32
+        if shared:
+            # Few distinct frequencies: evaluate the rational model at every fitted angle first, then group the
+            # points by frequency as well as by angle cell.
+            G = np.einsum('fm,tpmk->ftpk', _cauchy(fu, self.support, self.weights), self.values)
+            cell = cell * len(fu) + inverse
+        # Points in the same angle cell share the nodes of the interpolation, so each group is a matrix product
+        # (done in real arithmetic on the complex values):
+        order = np.argsort(cell, kind='stable')
+        starts = np.flatnonzero(np.diff(cell[order], prepend=-1))
+        for lo, hi in zip(starts, np.append(starts[1:], len(f))):
+            for c0 in range(lo, hi, chunksize):
+                rows = order[c0:min(c0 + chunksize, hi)]
+                tn, pn = it[rows[0]], ip[rows[0]]
+                if shared:
+                    B = G[inverse[rows[0]]][tn[:, None], pn[None, :]].reshape(-1, nk)
+                    out[rows] = (W[rows] @ B.view(np.float64)).view(np.complex128)
+                else:
+                    B = self.values[tn[:, None], pn[None, :]].reshape(-1, m * nk)
+                    T = (W[rows] @ B.view(np.float64)).view(np.complex128).reshape(-1, m, nk)
+                    C = _cauchy(f[rows], self.support, self.weights)
+                    out[rows] = np.matmul(C[:, None, :], T)[:, 0]
+        return out.reshape(shape + (nk,))
+
+    def __call__(self, f, theta, phi, output: str | None = None) -> np.ndarray:
+        """Return the scattering parameter named `output` (e.g. 's21(te,te)'), or all of them; see `S`."""
+        S = self.S(f, theta, phi)
+        return S if output is None else S[..., _index(output)]
+
+    def save(self, path: str) -> None:
+        """Save the model to a NumPy `.npz` file."""
+        np.savez(path, format=FORMAT, version=VERSION, theta=self.theta, phi=self.phi, support=self.support,
+                 weights=self.weights, values=self.values, error=np.nan if self.error is None else self.error)
+
+    @classmethod
+    def load(cls, path: str) -> 'Surrogate':
+        """Load a model saved by `save`."""
+        with np.load(path) as z:
+            if str(z['format']) != FORMAT or int(z['version']) > VERSION:
+                raise ValueError(f"{path} is not a pypssfss surrogate model of a supported version")
+            error = float(z['error'])
+            return cls(z['theta'], z['phi'], z['support'], z['weights'], z['values'],
+                       None if np.isnan(error) else error)
+
+
+def _frequency_refinement(FGHz: np.ndarray, data: np.ndarray, tol: float, mmax: int) -> np.ndarray:
+    """
+    Midpoints of the frequency intervals where the model fitted to all samples and one fitted to every other
+    sample disagree by more than `tol`.
+    """
+    if len(FGHz) < 4:
+        return np.empty(0)
+    F = np.moveaxis(data, 2, 0).reshape(len(FGHz), -1)
+    mid = (FGHz[:-1] + FGHz[1:]) / 2
+    fits = []
+    for rows in (slice(None), slice(None, None, 2)):
+        support, w, _ = aaa(FGHz[rows], F[rows], tol / 2, mmax)
+        fits.append(_cauchy(mid, FGHz[rows][support], w) @ F[rows][support])
+    err = np.max(np.abs(fits[0] - fits[1]), axis=1)
+    return mid[err > tol]
+
+
+def _angle_refinement(x: np.ndarray, data: np.ndarray, axis: int, tol: float) -> np.ndarray:
+    """Midpoints of the angle intervals where cubic and linear interpolation differ by more than `tol`."""
+    if len(x) < 3:
+        return np.empty(0)
+    mid = (x[:-1] + x[1:]) / 2
+    idx, w = _cubic_weights(x, mid)
+    y = np.moveaxis(data, axis, 0)
+    cubic = np.einsum('qj,qj...->q...', w, y[idx])
+    linear = (y[:-1] + y[1:]) / 2
+    err = np.abs(cubic - linear).reshape(len(mid), -1).max(axis=1)
+    return mid[err > tol]
+
+
+def fit_surrogate(strata: list, flist, steering, tol: float = 1e-3, max_rounds: int = 4,
+                  max_points: int | None = None, mmax: int = 100, **kwargs) -> Surrogate:
+    """
+    Analyze `strata` on the grid of frequencies `flist` (GHz) and angles `steering` (a ThetaPhi or PhiTheta,
+    with at least 3 values of each angle that is to be refined), fit a Surrogate, and refine the grid until the
+    estimated error is below the absolute tolerance `tol` on the scattering parameters.
+
+    In each of at most `max_rounds` refinement rounds, frequency intervals are bisected where the rational
+    model disagrees with one fitted to every other frequency, and theta and phi intervals are bisected where
+    cubic interpolation differs from linear interpolation.  Only the new points of the grid are analyzed.
+    Refinement also stops before the total number of analyzed points would exceed `max_points`.  The other
+    keyword arguments (e.g. `cache`) are passed to `analyze`; `logfile` and `resultfile` default to `devnull`.
+    """
+    from .pypssfss import analyze, extract_result, jl
+    from .steering import ThetaPhi
+    kwargs.setdefault('logfile', jl.devnull)
+    kwargs.setdefault('resultfile', jl.devnull)
+    kwargs.setdefault('showprogress', False)
+    outreq = ' '.join(_COLUMNS)
+    columns = {name: [] for name in _COLUMNS}
+
+    def run(freqs, thetas, phis):
+        results = analyze(strata, np.asarray(freqs, dtype=np.float64),
+                          ThetaPhi(np.asarray(thetas, dtype=np.float64), np.asarray(phis, dtype=np.float64)),
+                          **kwargs)
+        for name, v in extract_result(results, outreq, columnar=True).items():
+            columns[name].append(np.asarray(v))
+
+    FGHz = np.unique(np.atleast_1d(np.asarray(flist, dtype=np.float64)))
+    theta = np.unique(np.atleast_1d(np.asarray(steering.theta, dtype=np.float64)))
+    phi = np.unique(np.atleast_1d(np.asarray(steering.phi, dtype=np.float64)))
+    run(FGHz, theta, phi)
+    for _ in range(max_rounds):
+        (theta, phi, FGHz), data = _grid({k: np.concatenate(v) for k, v in columns.items()})
+        new_f = _frequency_refinement(FGHz, data, tol, mmax)
+        new_t = _angle_refinement(theta, data, 0, tol)
+        new_p = _angle_refinement(phi, data, 1, tol)
+        if not (len(new_f) or len(new_t) or len(new_p)):
+            break
+        points = (len(FGHz) + len(new_f)) * (len(theta) + len(new_t)) * (len(phi) + len(new_p))
+        if max_points is not None and points > max_points:
+            break
+        # Analyze the new grid points: new frequencies at all angles, then new angles at all frequencies.
+        all_t, all_p = np.concatenate([theta, new_t]), np.concatenate([phi, new_p])
+        if len(new_f):
+            run(new_f, all_t, all_p)
+        if len(new_t):
+            run(FGHz, new_t, all_p)
+        if len(new_p):
+            run(FGHz, theta, new_p)
+    (theta, phi, FGHz), data = _grid({k: np.concatenate(v) for k, v in columns.items()})
+    return Surrogate.from_data(FGHz, theta, phi, data, tol / 2, mmax)
@@ -0,0 +1,311 @@
+"""
+This is the sweep module.
+
+It splits large frequency × steering sweeps into shards that are analyzed by any number of worker processes,
+on one machine or many, and merges the partial results into one result vector in the same order as `analyze`.
+Shards are exchanged through a work queue.  `SQLiteQueue`, a single SQLite database file, is the local
+implementation; other backends (e.g. a database server shared by a cluster) implement the `WorkQueue`
+interface.  Workers lease the shards they take: a shard whose lease expires (a straggler, or a worker that
+died) is handed to another worker, and a failed shard is retried up to `max_attempts` times.
+
+    queue = SQLiteQueue('/shared/sweeps.db')
+    sweep_id = submit_sweep(queue, strata, flist, steering, points_per_shard=50)
+    # On each worker node:  python -m pypssfss worker /shared/sweeps.db
+    results = collect_sweep(queue, sweep_id)
+
+Available classes and functions:
+
+- WorkQueue
+- SQLiteQueue
+- Shard
+- shards
+- submit_sweep
+- run_worker
+- collect_sweep
+- sweep
+"""
+import abc
+import contextlib
+import os
+import pickle
+import socket
+import sqlite3
+import time
+import traceback
+from collections import namedtuple
+
+import numpy as np
+
+from .parallel import portable, _restore
+from .session import JuliaBlob, convert, jl, lazy_seval
+from .steering import points as steering_points
+
+Shard = namedtuple('Shard', ['index', 'flist', 'steering'])
+Shard.__doc__ = """
+A namedtuple describing one shard of a sweep: its position `index` in the canonical order, a chunk `flist` of
+the frequencies, and a single steering point `steering`.
+"""
+
+
+def shards(flist, steering, points_per_shard: int = 100) -> list:
+    """
+    Split the frequency × steering grid of an `analyze` call into shards of at most `points_per_shard`
+    frequencies at a single steering point, listed in the canonical order of `analyze` (the first steering
+    parameter varying slowest and frequency fastest).
+    """
+    freqs = np.atleast_1d(np.asarray(flist, dtype=np.float64)).reshape(-1)
+    chunks = [freqs[i:i + points_per_shard].tolist() for i in range(0, len(freqs), points_per_shard)]
+    return [Shard(i, chunk, point) for i, (point, chunk) in
+            enumerate((p, c) for p in steering_points(steering) for c in chunks)]
+
+
+class WorkQueue(abc.ABC):
+    """
+    Interface of the work queues used by sweeps.  Tasks belong to a sweep, are identified by their index
+    within it, and carry opaque byte payloads and results.
+    """
+
+    @abc.abstractmethod
+    def put(self, sweep: str, tasks: dict) -> None:
+        """Add the tasks (index -> payload bytes) of a sweep, keeping any that already exist."""
+
+    @abc.abstractmethod
+    def claim(self, worker: str, lease: float, sweep: str | None = None) -> tuple | None:
+        """
+        Take a task that is pending, or whose lease has expired, for `lease` seconds.  Return
+        `(sweep, index, payload)`, or None if there is no such task.  Every claim counts as an attempt, and a
+        task whose lease expires on its last attempt is marked as failed instead of being taken again.
+        """
+
+    @abc.abstractmethod
+    def complete(self, sweep: str, index: int, result: bytes) -> None:
+        """Store the result of a task."""
+
+    @abc.abstractmethod
+    def fail(self, sweep: str, index: int, worker: str, error: str) -> None:
+        """
+        Record a failed attempt by `worker`, making the task available again unless it has used all its
+        attempts.  Ignored if the task is no longer leased by `worker` (e.g. its lease expired and another
+        worker has claimed it).
+        """
+
+    @abc.abstractmethod
+    def status(self, sweep: str) -> dict:
+        """Return the number of tasks of a sweep in each state ('pending', 'running', 'done', 'failed')."""
+
+    @abc.abstractmethod
+    def results(self, sweep: str) -> dict:
+        """Return the results (index -> bytes) of the completed tasks of a sweep."""
+
+    @abc.abstractmethod
+    def errors(self, sweep: str) -> dict:
+        """Return the last error message (index -> str) of each failed task of a sweep."""
+
+    @abc.abstractmethod
+    def retry_failed(self, sweep: str) -> None:
+        """Make the failed tasks of a sweep available again, with a fresh set of attempts."""
+
+
+class SQLiteQueue(WorkQueue):
+    """
+    A WorkQueue stored in an SQLite database file, which can be shared by processes on one machine or, on a
+    network filesystem with working file locks, by several machines.
+
+    Parameters:
+        path: str
+            The database file, created if necessary.
+        max_attempts: int
+            Number of times a task is attempted before it is marked as failed.  Both failed attempts and
+            expired leases (e.g. of a worker killed by its shard) count as attempts.
+
+    Workers unpickle the shard payloads read from the database, which can run arbitrary code: the database
+    file must only be writable by trusted users.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3) -> None:
+        self.path = os.fspath(path)
+        self.max_attempts = max_attempts
+        with self._connect() as db:
+            db.execute("""CREATE TABLE IF NOT EXISTS tasks (
+                              sweep TEXT, idx INTEGER, payload BLOB, state TEXT DEFAULT 'pending',
+                              attempts INTEGER DEFAULT 0, worker TEXT, lease_until REAL, result BLOB, error TEXT,
+                              PRIMARY KEY (sweep, idx))""")
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.path!r}, max_attempts={self.max_attempts})"
+
+    def __reduce__(self):
+        return (type(self), (self.path, self.max_attempts))
+
+    @contextlib.contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def put(self, sweep: str, tasks: dict) -> None:
+        with self._connect() as db:
+            db.executemany("INSERT OR IGNORE INTO tasks (sweep, idx, payload) VALUES (?, ?, ?)",
+                           [(sweep, i, payload) for i, payload in tasks.items()])
+
+    def claim(self, worker: str, lease: float, sweep: str | None = None) -> tuple | None:
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("""UPDATE tasks SET state = 'failed', error = 'lease of worker ' || worker || ' expired'
+                          WHERE state = 'running' AND lease_until < ? AND attempts >= ?""",
+                       (now, self.max_attempts))
+            row = db.execute("""SELECT sweep, idx, payload FROM tasks
+                                WHERE (state = 'pending' OR (state = 'running' AND lease_until < ?))
+                                AND (? IS NULL OR sweep = ?) ORDER BY sweep, idx LIMIT 1""",
+                             (now, sweep, sweep)).fetchone()
+            if row is not None:
+                db.execute("""UPDATE tasks SET state = 'running', worker = ?, lease_until = ?,
+                              attempts = attempts + 1 WHERE sweep = ? AND idx = ?""",
+                           (worker, now + lease, row[0], row[1]))
+            db.execute("COMMIT")
+        return row
+
+    def complete(self, sweep: str, index: int, result: bytes) -> None:
+        with self._connect() as db:
+            db.execute("""UPDATE tasks SET state = 'done', result = ?, error = NULL
+                          WHERE sweep = ? AND idx = ? AND state != 'done'""", (result, sweep, index))
+
+    def fail(self, sweep: str, index: int, worker: str, error: str) -> None:
+        with self._connect() as db:
+            db.execute("""UPDATE tasks SET error = ?,
+                          state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END
+                          WHERE sweep = ? AND idx = ? AND state = 'running' AND worker = ?""",
+                       (error, self.max_attempts, sweep, index, worker))
+
+    def status(self, sweep: str) -> dict:
+        counts = dict.fromkeys(('pending', 'running', 'done', 'failed'), 0)
+        with self._connect() as db:
+            for state, n in db.execute("SELECT state, COUNT(*) FROM tasks WHERE sweep = ? GROUP BY state",
+                                       (sweep,)):
+                counts[state] = n
+        return counts
+
+    def results(self, sweep: str) -> dict:
+        with self._connect() as db:
+            return dict(db.execute("SELECT idx, result FROM tasks WHERE sweep = ? AND state = 'done'", (sweep,)))
+
+    def errors(self, sweep: str) -> dict:
+        with self._connect() as db:
+            return dict(db.execute("SELECT idx, error FROM tasks WHERE sweep = ? AND state = 'failed'", (sweep,)))
+
+    def retry_failed(self, sweep: str) -> None:
+        with self._connect() as db:
+            db.execute("UPDATE tasks SET state = 'pending', attempts = 0 WHERE sweep = ? AND state = 'failed'",
+                       (sweep,))
+
+
+def submit_sweep(queue: WorkQueue, strata: list, flist, steering, points_per_shard: int = 100,
+                 **kwargs) -> str:
+    """
+    Split an analysis into shards (see `shards`) and add them to `queue`.  The arguments are those of
+    `analyze`.  Returns the sweep identifier, a digest of the inputs, so submitting the same sweep again
+    does not duplicate its tasks.
+    """
+    from .cache import content_key
+    sweep_id = content_key(list(strata), flist, steering, kwargs, points_per_shard)[:32]
+    common = portable({'strata': list(strata), 'kwargs': kwargs})
+    queue.put(sweep_id, {shard.index: pickle.dumps((common, shard)) for shard in
+                         shards(flist, steering, points_per_shard)})
+    return sweep_id
+
+
+def _run_shard(payload: bytes) -> bytes:
+    from .pypssfss import analyze
+    common, shard = pickle.loads(payload)
+    common = _restore(common)
+    kwargs = {'logfile': jl.devnull, 'resultfile': jl.devnull, 'showprogress': False}
+    kwargs.update(common['kwargs'])
+    results = analyze(common['strata'], shard.flist, shard.steering, **kwargs)
+    return pickle.dumps(JuliaBlob.from_value(results))
+
+
+def run_worker(queue: WorkQueue, sweep: str | None = None, lease: float = 3600.0, max_tasks: int | None = None,
+               idle_timeout: float | None = 0.0, poll: float = 5.0, worker: str | None = None) -> int:
+    """
+    Pull shards from `queue` (of one sweep, or of any) and analyze them until the queue has no available
+    tasks for `idle_timeout` seconds (None to wait forever) or `max_tasks` shards are done.  Failures are
+    recorded in the queue and do not stop the worker.  A shard not finished within `lease` seconds may be
+    given to another worker.  Returns the number of shards completed.  The payloads are unpickled, so the
+    queue must only hold shards submitted by trusted users.
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    done = 0
+    idle_since = time.monotonic()
+    while max_tasks is None or done < max_tasks:
+        task = queue.claim(worker, lease, sweep)
+        if task is None:
+            if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                break
+            time.sleep(poll)
+            continue
+        sweep_id, index, payload = task
+        try:
+            result = _run_shard(payload)
+        except Exception:
+            queue.fail(sweep_id, index, worker, traceback.format_exc(limit=5))
+        else:
+            queue.complete(sweep_id, index, result)
+            done += 1
+        idle_since = time.monotonic()
+    return done
+
+
+# Julia function concatenating the result vectors of the shards:
+_vcat = lazy_seval("parts -> reduce(vcat, parts)")
+
+
+def collect_sweep(queue: WorkQueue, sweep: str, wait: bool = True, timeout: float | None = None,
+                  poll: float = 5.0):
+    """
+    Merge the shard results of a sweep into one Julia vector of results, in the same order as `analyze`.
+    With `wait=True`, wait until all shards are done (or `timeout` seconds have passed).  Raises RuntimeError
+    if shards have failed, or if shards are missing after waiting.
+    """
+    start = time.monotonic()
+    while True:
+        status = queue.status(sweep)
+        if status['failed']:
+            errors = queue.errors(sweep)
+            first = min(errors)
+            raise RuntimeError(f"{status['failed']} shard(s) of sweep {sweep} failed; shard {first}:\n"
+                               f"{errors[first]}")
+        if not (status['pending'] or status['running']):
+            break
+        if not wait or (timeout is not None and time.monotonic() - start > timeout):
+            raise RuntimeError(f"sweep {sweep} is incomplete: {status}")
+        time.sleep(poll)
+    parts = [pickle.loads(data).load() for _, data in sorted(queue.results(sweep).items())]
+    return _vcat(convert(jl.Vector, parts))
+
+
+def sweep(strata: list, flist, steering, queue: WorkQueue | None = None, points_per_shard: int = 100,
+          workers: int | None = None, julia_threads: int | None = None, poll: float = 5.0, **kwargs):
+    """
+    Analyze a large sweep shard by shard and return the merged results, as `analyze` would.  Shards are
+    submitted to `queue` (default: an SQLiteQueue in the pypssfss cache directory) and analyzed by local
+    worker processes from the pool of `analyze_many`, alongside any workers started elsewhere on the same
+    queue.  Shards already done by an earlier, interrupted call are not repeated, and shards leased by
+    workers elsewhere are taken over if their leases expire.  While shards are leased by other workers, the
+    queue is checked every `poll` seconds.
+    """
+    from .parallel import get_pool
+    from .session import cache_dir
+    queue = queue or SQLiteQueue(os.path.join(cache_dir('sweeps'), 'queue.db'))
+    sweep_id = submit_sweep(queue, strata, flist, steering, points_per_shard, **kwargs)
+    pool = get_pool(workers, julia_threads)
+    while True:
+        for future in [pool.apply(run_worker, queue, sweep_id, 3600.0, None, 0.0, poll)
+                       for _ in range(pool.workers)]:
+            future.result()
+        status = queue.status(sweep_id)
+        if not (status['pending'] or status['running']):
+            return collect_sweep(queue, sweep_id, wait=False)
+        time.sleep(poll)
@@ -0,0 +1,177 @@
+"""
+This is the sysimage module.
+
+It builds a custom Julia sysimage containing PSSFSS and the code compiled while running a representative
+pypssfss workload, removing most of the JIT compilation latency from the first `analyze` and sheet
+constructor calls in a fresh process.  Build it from the command line with
+
+    python -m pypssfss build-sysimage
+
+The sysimage is stored in the pypssfss cache directory and picked up automatically by `session.start`
+as long as the Julia executable, project and Manifest.toml it was built against are unchanged.  A stale
+sysimage is ignored (with a warning) and Julia starts with its default sysimage.
+
+Available functions:
+
+- build_sysimage
+- sysimage_path
+- usable_sysimage
+- run_workload
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+from .session import cache_dir, environment_tag, file_signature, file_unchanged
+
+# Bump when run_workload changes materially, so that older sysimages are rebuilt:
+WORKLOAD_VERSION = 2
+
+
+def sysimage_path() -> str:
+    """Return the path of the sysimage for the current Python environment."""
+    ext = {'nt': '.dll'}.get(os.name, '.dylib' if sys.platform == 'darwin' else '.so')
+    return os.path.join(cache_dir('sysimage'), 'pypssfss-' + environment_tag() + ext)
+
+
+def _meta_path() -> str:
+    return os.path.splitext(sysimage_path())[0] + '.json'
+
+
+def usable_sysimage(exepath: str, project: str) -> str | None:
+    """
+    Return the path of the custom sysimage if it exists and was built for the given Julia executable and
+    project, with an unchanged Manifest.toml.  Otherwise return None, warning if the sysimage is stale.
+    """
+    path = sysimage_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(_meta_path()) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        meta = {}
+    manifest = os.path.join(project, 'Manifest.toml')
+    if (meta.get('exepath') == exepath and meta.get('project') == project
+            and meta.get('workload_version') == WORKLOAD_VERSION
+            and file_unchanged(manifest, meta.get('manifest', {'mtime': None, 'size': None, 'sha256': None}))):
+        return path
+    warnings.warn(f"Ignoring stale pypssfss sysimage {path}; "
+                  "rebuild it with 'python -m pypssfss build-sysimage'", stacklevel=3)
+    return None
+
+
+def run_workload() -> None:
+    """
+    Run a small but representative workload through the wrapped functions: each commonly used sheet
+    constructor, `analyze` of a dielectric slab and of FSS stacks at normal and oblique incidence, and
+    result extraction.  Used by `build_sysimage` to record the methods that need precompiling.  Sheet
+    memoization is disabled meanwhile, so that the sheets are triangulated rather than loaded from the cache.
+    """
+    from . import sheets
+    saved = (sheets._sheet_cache, dict(sheets._sheet_cache_config))
+    sheets.configure_sheet_cache(memory=0, disk=0)
+    try:
+        _run_workload()
+    finally:
+        sheets._sheet_cache = saved[0]
+        sheets._sheet_cache_config.clear()
+        sheets._sheet_cache_config.update(saved[1])
+
+
+def _run_workload() -> None:
+    import pypssfss as pf
+    from .session import jl
+
+    devnull = jl.seval('devnull')
+    quiet = dict(logfile=devnull, resultfile=devnull, showprogress=False)
+
+    sheets = {
+        'rectstrip': lambda: pf.rectstrip(Nx=6, Ny=6, Px=10, Py=10, Lx=5, Ly=5, units=pf.mm),
+        'diagstrip': lambda: pf.diagstrip(P=10, w=1, Nl=20, Nw=2, units=pf.mm),
+        'polyring': lambda: pf.polyring(s1=[10, 0], s2=[0, 10], a=[3], b=[4], sides=12, ntri=200,
+                                        units=pf.mm),
+        'splitring': lambda: pf.splitring(s1=[10, 0], s2=[0, 10], a=[3], b=[4], sides=12, ntri=200,
+                                          gapwidth=0.5, gapcenter=0, units=pf.mm),
+        'meander': lambda: pf.meander(a=200, b=200, w1=10, w2=10, h=100, ntri=200, units=pf.mil),
+        'jerusalemcross': lambda: pf.jerusalemcross(P=10, L1=8, L2=4, A=2, B=1, w=0.5, ntri=200,
+                                                    units=pf.mm),
+        'loadedcross': lambda: pf.loadedcross(s1=[10, 0], s2=[0, 10], L1=8, L2=2, w=0.5, ntri=200,
+                                              units=pf.mm),
+    }
+    built = []
+    for name, construct in sheets.items():
+        try:
+            built.append(construct())
+        except Exception as err:  # A failing workload item only costs some precompilation
+            print(f"pypssfss workload: {name} failed: {err}", file=sys.stderr)
+
+    outreq = pf.atoutputs('FGHz theta phi s11dB(te,te) s11ang(te,te) s21dB(tm,tm) s21ang(tm,tm)')
+    slab = [pf.Layer(), pf.Layer(epsr=2.2, tandel=0.001, width=1*pf.mm), pf.Layer()]
+    strata = [slab]
+    if built:
+        strata.append([pf.Layer(), built[0], pf.Layer(epsr=2.2, width=1*pf.mm), pf.Layer()])
+        strata.append([pf.Layer(), built[-1], pf.Layer(epsr=2.2, width=1*pf.mm), built[-1], pf.Layer()])
+    for stack in strata:
+        for steering in (pf.ThetaPhi(0, 0), pf.ThetaPhi(30, [0, 90])):
+            results = pf.analyze(stack, [10, 11], steering, **quiet)
+            pf.extract_result(results, outreq)
+
+
+def build_sysimage(verbose: bool = True) -> str:
+    """
+    Build the custom pypssfss sysimage and return its path.
+
+    The workload in `run_workload` is run in a fresh Python process with Julia's `--trace-compile`
+    option to record precompile statements, after which PackageCompiler (installed into a separate
+    tools environment in the pypssfss cache directory) creates a sysimage containing PSSFSS, PythonCall
+    and those statements.  This takes several minutes.
+    """
+    from . import session
+
+    def log(msg):
+        if verbose:
+            print(msg, file=sys.stderr, flush=True)
+
+    path = sysimage_path()
+    with tempfile.TemporaryDirectory() as tmp:
+        trace = os.path.join(tmp, 'precompile.jl')
+        env = dict(os.environ, PYTHON_JULIACALL_TRACE_COMPILE=trace, PYPSSFSS_SYSIMAGE='no')
+        env.pop('PYTHON_JULIACALL_SYSIMAGE', None)
+        log("Recording precompile statements...")
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'from pypssfss.sysimage import run_workload; run_workload()'],
+                       env=env, check=True)
+        log(f"  done in {time.perf_counter() - t0:.1f} s")
+
+        stamp = session._load_stamp()
+        exepath, project = (stamp['exepath'], stamp['project']) if stamp else session._resolve()
+
+        tools = cache_dir('sysimage', 'tools')
+        log("Installing PackageCompiler...")
+        subprocess.run([exepath, '--project=' + tools, '--startup-file=no', '-e',
+                        'import Pkg; Pkg.add("PackageCompiler")'], check=True)
+
+        log("Building sysimage (this takes a while)...")
+        t0 = time.perf_counter()
+        tmpimage = os.path.join(tmp, os.path.basename(path))
+        script = (f'using PackageCompiler; create_sysimage(["PSSFSS", "PythonCall"]; '
+                  f'sysimage_path=raw"{tmpimage}", precompile_statements_file=raw"{trace}", '
+                  f'project=raw"{project}")')
+        env = dict(os.environ, JULIA_LOAD_PATH=os.pathsep.join(['@', tools, '@stdlib']))
+        subprocess.run([exepath, '--project=' + project, '--startup-file=no', '-e', script],
+                       env=env, check=True)
+        shutil.move(tmpimage, path)
+        log(f"  done in {time.perf_counter() - t0:.1f} s")
+
+    meta = {'exepath': exepath, 'project': project, 'workload_version': WORKLOAD_VERSION,
+            'manifest': file_signature(os.path.join(project, 'Manifest.toml'))}
+    with open(_meta_path(), 'w') as f:
+        json.dump(meta, f)
+    log(f"Sysimage written to {path}")
+    return path
@@ -0,0 +1,164 @@
+"""
+This is the threads module.
+
+It sets how the cores of a machine are shared between Julia threads, BLAS threads inside Julia, and the worker
+processes of `analyze_many` and the other pool-based functions.  By default Julia uses one thread per core,
+which oversubscribes the machine when several pypssfss processes run on it.  Call `configure_threads` before
+Julia starts (i.e. before the first Layer, sheet or analysis) to set the budget of this process:
+
+    configure_threads(processes=4)                 # a quarter of the cores, e.g. for 4 processes per node
+    configure_threads(julia_threads=8, blas_threads=2, workers=4)
+
+`autotune_threads` times a probe workload under several splits and recommends the fastest one.
+
+Available classes and functions:
+
+- ThreadBudget
+- configure_threads
+- thread_budget
+- autotune_threads
+"""
+import os
+import time
+from collections import namedtuple
+
+ThreadBudget = namedtuple('ThreadBudget', ['julia_threads', 'blas_threads', 'workers'])
+ThreadBudget.__doc__ = """
+A namedtuple describing the thread budget of a process: the number of Julia threads and of BLAS threads used
+by an analysis in this process, and the number of worker processes of the pools used by `analyze_many` and
+related functions, between which the Julia and BLAS threads are divided.
+"""
+
+_budget = None
+
+
+def _cores(processes: int) -> int:
+    if hasattr(os, 'sched_getaffinity'):
+        cores = len(os.sched_getaffinity(0))
+    else:
+        cores = os.cpu_count() or 1
+    return max(1, cores // processes)
+
+
+def configure_threads(julia_threads: int | None = None, blas_threads: int | None = None,
+                      workers: int | None = None, processes: int = 1) -> ThreadBudget:
+    """
+    Set the thread budget of this process and return it.
+
+    Parameters:
+        julia_threads: int
+            Number of Julia threads.  Defaults to this process's share of the cores (see `processes`).
+        blas_threads: int
+            Number of BLAS threads inside Julia.  Defaults to 1, since BLAS threads multiply with the Julia
+            threads and the workers that each call BLAS; raise it only for single-threaded, BLAS-bound work.
+        workers: int
+            Number of worker processes in pools, each getting `julia_threads // workers` Julia threads and
+            `blas_threads // workers` BLAS threads (at least 1).  Defaults to `julia_threads`, i.e. single
+            threaded workers.
+        processes: int
+            Number of pypssfss processes sharing the machine, whose cores are divided equally between them.
+
+    The Julia thread count can only be set before Julia starts; a RuntimeError is raised if Julia is already
+    running with a different number of threads.  With several Julia threads, Julia is started with signal
+    handling enabled (see the session module).  Shared worker pools created earlier are shut down, so later
+    calls create pools with the new budget.
+    """
+    global _budget
+    from . import session
+    julia_threads = julia_threads or _cores(processes)
+    budget = ThreadBudget(julia_threads, blas_threads or 1, workers or julia_threads)
+    if session.is_started():
+        running = int(session.jl.seval('Threads.nthreads()'))
+        if running != budget.julia_threads:
+            raise RuntimeError(f"Julia is already running with {running} threads; configure_threads must be "
+                               "called before Julia starts")
+        session.set_blas_threads(budget.blas_threads)
+    os.environ['PYTHON_JULIACALL_THREADS'] = str(budget.julia_threads)
+    if budget.julia_threads > 1:
+        session._request_signal_handling()
+    os.environ['PYPSSFSS_BLAS_THREADS'] = str(budget.blas_threads)
+    from .parallel import shutdown_pools
+    shutdown_pools()
+    _budget = budget
+    return budget
+
+
+def thread_budget() -> ThreadBudget | None:
+    """Return the budget set by `configure_threads`, or None if it has not been called."""
+    return _budget
+
+
+def _probe_strata():
+    """Strata of the default probe workload of `autotune_threads`: a ring FSS on a substrate."""
+    import pypssfss as pf
+    ring = pf.polyring(s1=[10, 0], s2=[0, 10], a=[3], b=[4], sides=12, ntri=1000, units=pf.mm)
+    return [pf.Layer(), ring, pf.Layer(epsr=2.2, width=1 * pf.mm), pf.Layer()]
+
+
+def _splits(cores: int) -> list:
+    """Candidate (workers, julia threads per worker, BLAS threads per worker) splits of `cores` cores."""
+    splits = []
+    workers = 1
+    while workers <= cores:
+        threads = cores // workers
+        splits.extend((workers, threads, blas) for blas in sorted({1, threads}))
+        workers *= 2
+    if splits[-1][0] != cores:
+        splits.append((cores, 1, 1))
+    return splits
+
+
+def autotune_threads(strata=None, flist=None, steering=None, jobs: int | None = None,
+                     processes: int = 1, splits: list | None = None, apply: bool = False,
+                     verbose: bool = True) -> list:
+    """
+    Time a probe workload under several splits of this process's cores between worker processes, Julia
+    threads and BLAS threads, and return a list of `(ThreadBudget, seconds)` pairs sorted from fastest to
+    slowest, so that the first entry is the recommended budget.
+
+    Parameters:
+        strata, flist, steering:
+            The probe analysis, as for `analyze_many` (`strata` may be a picklable callable building the strata
+            in the workers).  Defaults to a ring FSS on a substrate at 3 frequencies and normal incidence.  Use
+            a representative analysis of the intended workload for the best recommendation.
+        jobs: int
+            Number of probe analyses timed for each split.  Defaults to the number of cores, so every split
+            runs the same amount of work.
+        processes: int
+            Number of pypssfss processes that will share the machine; see `configure_threads`.
+        splits: list
+            Candidate `(workers, julia_threads_per_worker, blas_threads_per_worker)` triples.  Defaults to
+            power-of-two numbers of workers, each with one and with all its share of BLAS threads.
+        apply: bool
+            If True, pass the recommended budget to `configure_threads` (which requires that Julia has not
+            yet been started in this process).
+        verbose: bool
+            Print the time of each split as it is measured.
+
+    Each split is timed on a fresh pool of worker processes, after one untimed warm-up analysis per worker, so
+    start-up and compilation are excluded.
+    """
+    from .parallel import AnalysisPool, Design
+    from .steering import ThetaPhi
+    cores = _cores(processes)
+    design = Design(strata or _probe_strata, [10.0, 12.0, 14.0] if flist is None else flist,
+                    ThetaPhi(0, 0) if steering is None else steering)
+    jobs = jobs or cores
+    timings = []
+    for workers, threads, blas in splits or _splits(cores):
+        with AnalysisPool(workers, threads, blas) as pool:
+            for future in [pool.submit(design) for _ in range(workers)]:
+                future.result()
+            start = time.perf_counter()
+            for future in [pool.submit(design) for _ in range(jobs)]:
+                future.result()
+            seconds = time.perf_counter() - start
+        budget = ThreadBudget(workers * threads, workers * blas, workers)
+        timings.append((budget, seconds))
+        if verbose:
+            print(f"workers={workers:<4} julia_threads={threads:<4} blas_threads={blas:<4} {seconds:10.3f} s",
+                  flush=True)
+    timings.sort(key=lambda t: t[1])
+    if apply:
+        configure_threads(*timings[0][0])
+    return timings
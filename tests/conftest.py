@@ -0,0 +1,21 @@
+import types
+
+import pytest
+
+from pypssfss import pypssfss
+
+
+@pytest.fixture
+def fake_julia(monkeypatch):
+    """
+    Replace the Julia session seen by the pypssfss module with a stand-in, for tests of the Python plumbing:
+    `jl.devnull` is 'devnull', `jl.open` returns the file name and `jl.close` records it in `jl.closed`, and
+    `atoutputs` returns its argument unchanged.  Tests add other Julia functions to the returned namespace as
+    needed.  The Julia-backed checks of the same features are in test_pypssfss.py.
+    """
+    jl = types.SimpleNamespace(devnull='devnull', closed=[])
+    jl.open = lambda name, mode: name
+    jl.close = jl.closed.append
+    monkeypatch.setattr(pypssfss, 'jl', jl)
+    monkeypatch.setattr(pypssfss, 'atoutputs', lambda outputs: outputs)
+    return jl
@@ -0,0 +1,88 @@
+import asyncio
+import contextvars
+import threading
+
+import pytest
+
+from pypssfss import session
+from pypssfss.aio import AsyncAnalyzer
+
+
+def test_backpressure_and_cancellation():
+    gate = threading.Event()
+    ran = []
+
+    def job(name):
+        gate.wait(5)
+        ran.append(name)
+        return name
+
+    async def main():
+        analyzer = AsyncAnalyzer(max_pending=2)
+        first = asyncio.create_task(analyzer.run(job, 'first'))
+        queued = asyncio.create_task(analyzer.run(job, 'queued'))
+        blocked = asyncio.create_task(analyzer.run(job, 'blocked'))
+        await asyncio.sleep(0.05)
+        assert analyzer.pending == 2
+        assert not blocked.done()  # Waiting for a free slot
+
+        queued.cancel()  # Not started yet, so it never runs
+        await asyncio.sleep(0.05)
+        gate.set()
+        assert await first == 'first'
+        assert await blocked == 'blocked'
+        assert queued.cancelled()
+        await asyncio.sleep(0.05)
+        assert analyzer.pending == 0
+        analyzer.shutdown()
+
+    asyncio.run(main())
+    assert ran == ['first', 'blocked']
+
+
+def test_jobs_see_the_context(monkeypatch):
+    var = contextvars.ContextVar('var', default=None)
+
+    async def main():
+        var.set('task value')
+        analyzer = AsyncAnalyzer()
+        value = await analyzer.run(var.get)
+        analyzer.shutdown()
+        return value
+
+    assert asyncio.run(main()) == 'task value'
+    monkeypatch.setattr(session, '_signal_handling', False)
+    monkeypatch.delenv('PYTHON_JULIACALL_HANDLE_SIGNALS', raising=False)
+    AsyncAnalyzer().shutdown()
+    assert session._signal_handling  # Julia will be started with signal handling
+    monkeypatch.setenv('PYTHON_JULIACALL_HANDLE_SIGNALS', 'no')
+    with pytest.warns(RuntimeWarning, match='HANDLE_SIGNALS'):
+        AsyncAnalyzer().shutdown()
+
+
+def test_analyzer_survives_its_event_loop():
+    gate = threading.Event()
+    analyzer = AsyncAnalyzer(max_pending=1)
+
+    async def abandon():
+        asyncio.create_task(analyzer.run(gate.wait, 5))
+        await asyncio.sleep(0.05)  # asyncio.run then cancels the task and closes the loop
+
+    asyncio.run(abandon())
+    gate.set()
+
+    async def main():
+        return await asyncio.wait_for(analyzer.run(lambda: 'second loop'), 5)
+
+    # The slot of the first loop's job is not carried over to a new loop:
+    assert asyncio.run(main()) == 'second loop'
+    assert analyzer.pending == 0
+    analyzer.shutdown()
+
+
+@pytest.mark.parametrize('kwargs', [{'outputs': 'FGHz'}, {'checkpoint': 'sweep.ckpt'}, {'chunk_points': 10}])
+def test_analyze_rejects_chunked_arguments(kwargs):
+    analyzer = AsyncAnalyzer()
+    with pytest.raises(TypeError, match=next(iter(kwargs))):
+        asyncio.run(analyzer.analyze([], [10.0], None, **kwargs))
+    analyzer.shutdown()
@@ -0,0 +1,63 @@
+import os
+import time
+
+from pypssfss.cache import DiskCache, MemoryCache, SheetCache
+
+
+def test_disk_cache_roundtrip_and_stats(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    assert cache.get('a' * 64) is None
+    cache.put('a' * 64, b'payload')
+    assert cache.get('a' * 64) == b'payload'
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.entries, info.size) == (1, 1, 1, len(b'payload'))
+    cache.cache_clear()
+    assert cache.cache_info().entries == 0
+
+
+def test_disk_cache_lru_eviction(tmp_path):
+    cache = DiskCache(str(tmp_path), maxsize=30)
+    for i, key in enumerate(('k1', 'k2', 'k3')):
+        cache.put(key, bytes(10))
+        os.utime(cache._path(key), ns=(i * 10**9, i * 10**9))
+    assert cache.get('k1') is not None  # k1 becomes the most recently used
+    time.sleep(0.01)
+    cache.put('k4', bytes(10))
+    assert 'k2' not in cache
+    assert all(k in cache for k in ('k1', 'k3', 'k4'))
+    cache.put('big', bytes(31))  # Larger than maxsize: not stored
+    assert 'big' not in cache
+
+
+def test_disk_cache_tracks_its_size(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path), maxsize=35)
+    scans = []
+    entries = cache._entries
+    monkeypatch.setattr(cache, '_entries', lambda: scans.append(1) or entries())
+    for key in ('k1', 'k2', 'k3', 'k1'):
+        cache.put(key, bytes(10))
+    assert len(scans) == 1  # Only the first put scans the directory
+    assert cache._size == 30
+    cache.put('k4', bytes(10))  # Over the limit: evict
+    assert len(scans) == 2 and cache._size == 30 == cache.cache_info().size
+
+
+def test_memory_cache_lru_eviction():
+    cache = MemoryCache(maxsize=30)
+    for key in ('k1', 'k2', 'k3'):
+        cache.put(key, bytes(10))
+    cache.get('k1')
+    cache.put('k4', bytes(10))
+    assert 'k2' not in cache
+    assert all(k in cache for k in ('k1', 'k3', 'k4'))
+    assert cache.cache_info().size == 30
+
+
+def test_sheet_cache_promotes_from_disk(tmp_path):
+    SheetCache(memory=100, disk=100, directory=str(tmp_path)).put('k', b'mesh')
+    cache = SheetCache(memory=100, disk=100, directory=str(tmp_path))
+    assert 'k' not in cache.memory
+    assert cache.get('k') == b'mesh'
+    assert 'k' in cache.memory
+    assert SheetCache(memory=0, disk=0).get('k') is None
+    assert SheetCache().disk is None  # The disk level is opt-in
@@ -0,0 +1,49 @@
+import numpy as np
+
+from pypssfss.cascade import _floquet_attenuation, cascade, interface_gsm, propagation_gsm
+
+
+def _slab(k0, kt, medium, width):
+    air = (1 + 0j, 1 + 0j)
+    return cascade(cascade(interface_gsm(k0, kt, air, medium), propagation_gsm(k0, kt, medium, width)),
+                   interface_gsm(k0, kt, medium, air))
+
+
+def test_slab_cascade_matches_analytic():
+    k0 = 2 * np.pi * np.linspace(1e9, 20e9, 7) / 299792458.0
+    glass = (4 - 0.04j, 1 + 0j)
+    width = 0.01
+    for theta in (0.0, 40.0):
+        kt = k0 * np.sin(np.radians(theta))
+        s = _slab(k0, kt, glass, width)
+        # Transfer matrix solution for each polarization, with modal admittances y0 (air) and y1 (slab):
+        kz0 = np.sqrt(k0**2 - kt**2 + 0j)
+        kz1 = np.sqrt(k0**2 * glass[0] - kt**2 + 0j)
+        kz1 = np.where(kz1.imag > 0, -kz1, kz1)
+        for mode, (y0, y1) in enumerate(((kz0, kz1), (k0 / kz0, glass[0] * k0 / kz1))):
+            d = kz1 * width
+            t = 1 / (np.cos(d) + 0.5j * (y1 / y0 + y0 / y1) * np.sin(d))
+            r = 0.5j * (y0 / y1 - y1 / y0) * np.sin(d) * t  # Reflection of the transverse electric field
+            assert np.allclose(s[:, 2 + mode, mode], t)
+            assert np.allclose(s[:, mode, mode], r)
+            assert np.allclose(s[:, 2 + mode, 2 + mode], r)
+        assert np.allclose(s[:, 2:, :2], s[:, :2, 2:])  # Reciprocal
+        assert np.allclose(s[:, 0, 1], 0) and np.allclose(s[:, 2, 1], 0)  # No TE/TM coupling
+
+
+def test_slab_cascade_matches_pssfss():
+    # The slab of test_pypssfss: PSSFSS gives s11dB(te,te) = -7.92209513 and s11ang(te,te) = -131.16817847
+    k0 = np.array([2 * np.pi * 10e9 / 299792458.0])
+    s = _slab(k0, 0 * k0, (10 * (1 - 0.02j), 1 + 0j), 0.01)
+    expected = 10**(-7.92209513 / 20) * np.exp(1j * np.radians(-131.16817847))
+    assert np.allclose(s[0, [0, 1], [0, 1]], expected, atol=1e-8)
+
+
+def test_floquet_attenuation():
+    k0 = 2 * np.pi * np.array([10e9, 40e9]) / 299792458.0
+    lattice = np.array([[0.01, 0.0], [0.0, 0.01]])
+    air = (1 + 0j, 1 + 0j)
+    db = _floquet_attenuation(k0, 0 * k0, 0 * k0, lattice, air, 0.001)
+    alpha = np.sqrt((2 * np.pi / 0.01)**2 - k0[0]**2)
+    assert np.isclose(db[0], 20 * np.log10(np.e) * alpha * 0.001)
+    assert db[1] == 0  # 40 GHz: the (±1, 0) modes propagate for a 10 mm period
@@ -0,0 +1,29 @@
+import pytest
+
+from pypssfss.checkpoint import Checkpoint
+
+
+def test_checkpoint_resume(tmp_path):
+    path = tmp_path / 'sweep.ckpt'
+    c = Checkpoint(path, 'abc')
+    assert len(c) == 0
+    c.append(b'first')
+    c.append(b'second chunk')
+    assert Checkpoint(path, 'abc').chunks == [b'first', b'second chunk']
+
+    # A chunk cut short by an interruption is dropped, and appending continues after the last whole chunk:
+    size = path.stat().st_size
+    with open(path, 'ab') as f:
+        f.write(b'\x40\x00\x00\x00\x00\x00\x00\x00partial')
+    c = Checkpoint(path, 'abc')
+    assert path.stat().st_size == size and len(c) == 2
+    c.append(b'third')
+    assert Checkpoint(path, 'abc').chunks == [b'first', b'second chunk', b'third']
+
+
+def test_checkpoint_other_analysis(tmp_path):
+    path = tmp_path / 'sweep.ckpt'
+    Checkpoint(path, 'abc').append(b'first')
+    with pytest.warns(UserWarning, match='different analysis'):
+        c = Checkpoint(path, 'xyz')
+    assert len(c) == 0 and Checkpoint(path, 'xyz').chunks == []
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from pypssfss import pypssfss
+from pypssfss.convergence import converge_mesh
+
+
+@pytest.fixture
+def fake_analysis(monkeypatch, fake_julia):
+    """Stand in for the Julia analysis: the 'result' of a sheet approaches 1 as its ntri grows."""
+    analyzed = []
+
+    def analyze(strata, flist, steering, cache, **kwargs):
+        analyzed.append(strata[1])
+        return strata[1]
+
+    monkeypatch.setattr(pypssfss, 'analyze', analyze)
+    monkeypatch.setattr(pypssfss, 'extract_result',
+                        lambda results, outreq, columnar: {'s21': np.array([1 + 100 / results, 2.0])})
+    return analyzed
+
+
+def test_converge_mesh(fake_analysis):
+    conv = converge_mesh(lambda ntri: ntri, ['air', None, 'air'], [1, 2], None, 's21', rtol=0.02)
+    # 1 + 100/ntri changes by about 14%, 8%, 5%, 2.4% and 1.2% between levels:
+    assert conv.converged and conv.ntri == conv.sheet == 4000
+    assert fake_analysis == [250, 500, 1000, 2000, 4000, 8000]
+    assert conv.history[0] == (250, None) and conv.history[-1][1] <= 1
+
+
+def test_converge_mesh_not_converged(fake_analysis):
+    with pytest.warns(UserWarning, match='did not converge'):
+        conv = converge_mesh(lambda ntri: ntri, lambda sheet: ['air', sheet], [1], None, 's21',
+                             ntri=(100, 200), rtol=1e-3)
+    assert not conv.converged and conv.ntri == 200
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+import time
+
+# Target for the wall-clock cost of `import pypssfss` over and above `import numpy`:
+IMPORT_TIME_TARGET = 0.5  # seconds
+
+# Make the subprocesses see the same pypssfss as this one:
+ENV = {**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)}
+
+
+def _import_time(stmt: str, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, '-c', stmt], check=True, env=ENV)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def test_import_is_lazy():
+    stmt = ('import sys, pypssfss; '
+            'heavy = [m for m in ("juliacall", "juliapkg", "matplotlib", "rich") if m in sys.modules]; '
+            'assert not heavy, heavy; '
+            'assert not pypssfss.session.is_started()')
+    subprocess.run([sys.executable, '-c', stmt], check=True, env=ENV)
+
+
+def test_import_time():
+    baseline = _import_time('import numpy')
+    elapsed = _import_time('import pypssfss')
+    print(f"import pypssfss: {elapsed:.3f} s (numpy alone: {baseline:.3f} s)")
+    assert elapsed - baseline < IMPORT_TIME_TARGET
+
+
+def test_client_is_julia_free():
+    stmt = ('import sys, pypssfss.client; '
+            'heavy = [m for m in ("juliacall", "juliapkg", "matplotlib") if m in sys.modules]; '
+            'assert not heavy, heavy')
+    subprocess.run([sys.executable, '-c', stmt], check=True, env=ENV)
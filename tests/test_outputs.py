@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from pypssfss.pypssfss import output_names
+
+
+def test_output_names():
+    assert output_names('FGHz  theta s21dB(L, v) s11(te,te)') == ['FGHz', 'theta', 's21dB(L,v)', 's11(te,te)']
+    assert output_names(' s21ang( h , te )\n') == ['s21ang(h,te)']
+    assert output_names('') == []
+
+
+def test_analyze_outputs_chunks(monkeypatch, fake_julia):
+    from pypssfss import pypssfss, ThetaPhi
+
+    class Column(list):
+        def to_numpy(self):
+            return np.array(self)
+
+    chunks, written = [], []
+    monkeypatch.setattr(pypssfss, '_analyze', lambda strata, flist, steering, cache, kwargs:
+                        chunks.append(flist) or [(f, steering.theta) for f in flist])
+    monkeypatch.setattr(pypssfss, '_write_result', lambda io, result: written.append(result))
+    monkeypatch.setattr(pypssfss, '_columns', lambda results, outreq: (
+        Column(f for (f, _) in results), Column(complex(f, theta) for (f, theta) in results)))
+
+    data = pypssfss.analyze([], [1, 2, 3], ThetaPhi([0, 10], 0), outputs='FGHz s21(te,te)', chunk_points=2,
+                            resultfile='results.res', logfile='log.txt')
+    assert fake_julia.closed == ['results.res', 'log.txt']
+    assert chunks == [[1, 2], [3], [1, 2], [3]] and len(written) == 6
+    assert list(data) == ['FGHz', 's21(te,te)']
+    np.testing.assert_array_equal(data['FGHz'], [1, 2, 3, 1, 2, 3])
+    assert data['s21(te,te)'].dtype == np.complex128
+    np.testing.assert_array_equal(data['s21(te,te)'].imag, [0, 0, 0, 10, 10, 10])
+    # Without a result file, the full results are not serialized at all:
+    written.clear()
+    pypssfss.analyze([], [1, 2, 3], ThetaPhi(0, 0), outputs='FGHz s21(te,te)', logfile='log.txt')
+    assert written == []
+    with pytest.raises(ValueError):
+        pypssfss.analyze([], [1], ThetaPhi(0, 0), outputs='FGHz', checkpoint='sweep.ckpt')
@@ -0,0 +1,114 @@
+import os
+import pickle
+import time
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
+
+from pypssfss import parallel, ThetaPhi
+from pypssfss.parallel import _default_target, _restore, _sources, AnalysisPool, Design, portable
+
+
+def test_sources_expand_globs(tmp_path):
+    for name in ('b.res', 'a.res', 'c.txt'):
+        (tmp_path / name).write_text('')
+    pattern = str(tmp_path / '*.res')
+    single = str(tmp_path / 'c.txt')
+    assert _sources([pattern, single]) == [(str(tmp_path / 'a.res'),) * 2, (str(tmp_path / 'b.res'),) * 2,
+                                            (single, single)]
+    assert _sources(single) == [(single, single)]
+    missing = str(tmp_path / '*.rse')
+    assert _sources([missing, single]) == [(missing, parallel._UNMATCHED), (single, single)]
+    results = object()
+    assert _sources([results]) == [(0, results)]
+
+
+class SyncPool:
+    """A pool running conversions at once in the calling process."""
+
+    def __init__(self) -> None:
+        self.jobs = []
+
+    def apply(self, fn, *args):
+        self.jobs.append(args)
+        future = futures.Future()
+        future.set_result((1.0, None))
+        return future
+
+
+def test_unmatched_patterns_fail(tmp_path, monkeypatch):
+    pool = SyncPool()
+    monkeypatch.setattr(parallel, 'get_pool', lambda workers, julia_threads: pool)
+    (tmp_path / 'a.res').write_text('')
+    typo = str(tmp_path / '*.rse')
+    reports = parallel.res2tep_many([typo, str(tmp_path / '*.res')], targets=['a.tep'])
+    assert reports[0] == parallel.Conversion(typo, None, 0.0, f"FileNotFoundError: no file matches {typo!r}")
+    assert reports[1] == parallel.Conversion(str(tmp_path / 'a.res'), 'a.tep', 1.0, None)
+    assert [job[2] for job in pool.jobs] == ['a.tep']
+    completed = parallel.res2tep_many([typo, str(tmp_path / '*.res')], as_completed=True)
+    assert [r.error is None for r in completed] == [False, True]
+
+
+def test_default_targets():
+    assert _default_target('res2tep', os.path.join('runs', 'a.res'), None) == os.path.join('runs', 'a.tep')
+    # The output of a store directory goes next to it, also when the path ends with a separator:
+    store = os.path.join('runs', 'sweep.store') + os.sep
+    assert _default_target('res2fresnel', store, None) == os.path.join('runs', 'sweep.rttbl')
+    assert _default_target('res2tep', store, 'out') == os.path.join('out', 'sweep.tep')
+    assert _default_target('res2tep', 2, None) == os.path.join(os.curdir, 'results2.tep')
+
+
+class ThreadPool(AnalysisPool):
+    """An AnalysisPool running a Python job on threads, so that designs finish in reverse order of submission."""
+
+    def __init__(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=4)
+
+    def submit(self, design, outputs=None):
+        def job(d):
+            time.sleep(0.05 * (3 - d.flist))
+            return (d.flist, outputs)
+        return self._executor.submit(job, parallel._as_design(design))
+
+
+def test_analyze_many_order(monkeypatch):
+    pool = ThreadPool()
+    monkeypatch.setattr(parallel, 'get_pool', lambda workers, julia_threads: pool)
+    designs = [Design(None, 0, ThetaPhi(0, 0)), (None, 1, ThetaPhi(0, 0)), {'strata': None, 'flist': 2,
+                                                                              'steering': ThetaPhi(0, 0)}]
+    assert parallel.analyze_many(designs, 'FGHz') == [(0, 'FGHz'), (1, 'FGHz'), (2, 'FGHz')]
+    completed = list(parallel.analyze_many(designs, as_completed=True))
+    assert completed == [(2, (2, None)), (1, (1, None)), (0, (0, None))]
+    pool.shutdown()
+
+
+class Blob:
+    """Stand-in for JuliaBlob, wrapping the fake Julia values of test_portable_round_trip."""
+
+    def __init__(self, value) -> None:
+        self.value = value
+
+    @classmethod
+    def from_value(cls, x):
+        return cls(x.value)
+
+    def load(self):
+        return JuliaValue(self.value)
+
+
+class JuliaValue:
+    def __init__(self, value) -> None:
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, JuliaValue) and other.value == self.value
+
+
+def test_portable_round_trip(monkeypatch):
+    monkeypatch.setattr(parallel, 'JuliaBlob', Blob)
+    monkeypatch.setattr(parallel, 'is_julia', lambda x: isinstance(x, JuliaValue))
+    strata = [JuliaValue('layer'), (JuliaValue('sheet'), 2), {'kwargs': [JuliaValue('x'), 'devnull']},
+              ThetaPhi(0, 45)]
+    sent = pickle.loads(pickle.dumps(portable(strata)))
+    assert isinstance(sent[0], Blob) and isinstance(sent[1][0], Blob) and isinstance(sent[2]['kwargs'][0], Blob)
+    assert sent[3] == ThetaPhi(0, 45)  # Namedtuples are kept as they are
+    assert _restore(sent) == strata
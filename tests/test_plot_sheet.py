@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+from pypssfss.sheets import plot_sheet
+
+
+def two_triangles():
+    rho = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]])
+    return SimpleNamespace(rho=rho, e1=np.array([1, 2, 3, 4, 1]), e2=np.array([2, 3, 4, 1, 3]),
+                           fv=np.array([[1, 1], [2, 3], [3, 4]]), s1=np.array([1.0, 0.0]),
+                           s2=np.array([0.0, 1.0]), units='mm')
+
+
+def test_plot_sheet_collections():
+    plot_sheet(two_triangles(), faces=True, nodes=True, unitcell=True, rep=(3, 2), facenumbers=True)
+    ax = plt.gca()
+    lines, polys, cells = ax.collections[1], ax.collections[0], ax.collections[2]
+    assert len(polys.get_paths()) == 2 * 6
+    assert len(lines.get_segments()) == 5 * 6
+    assert len(cells.get_segments()) == 6
+    assert np.allclose(lines.get_segments()[-1], [[2.0, 1.0], [3.0, 2.0]])
+    assert [t.get_position() for t in ax.texts[:2]] == [(2 / 3, 1 / 3), (1 / 3, 2 / 3)]
+    assert ax.get_xlim()[1] >= 3.0
+    plt.close('all')
+
+
+def test_plot_sheet_decimates_labels():
+    plot_sheet(two_triangles(), nodenumbers=True, rep=(3, 3), maxlabels=10)
+    assert len(plt.gca().texts) == 9  # Every 4th node of each repetition
+    plt.close('all')
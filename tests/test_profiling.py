@@ -0,0 +1,26 @@
+import json
+
+from pypssfss.profiling import phase, profiling, timed_call
+
+
+def test_phases_nest_and_export(tmp_path):
+    with phase('ignored') as record:
+        assert record is None
+    with profiling() as prof:
+        with phase('outer'):
+            with phase('inner') as record:
+                record['julia'] = {'time_julia': 0.5, 'compile': 0.2, 'recompile': 0.0, 'gc': 0.1, 'bytes': 2**20}
+        with phase('inner'):
+            pass
+    assert [(r['name'], r['depth']) for r in prof.records] == [('inner', 1), ('outer', 0), ('inner', 0)]
+    summary = prof.summary()
+    assert summary['inner']['count'] == 2 and summary['inner']['compile'] == 0.2
+    assert 'inner' in prof.report().splitlines()[1]
+    assert json.loads(prof.to_json(str(tmp_path / 'p.json')))['summary']['outer']['count'] == 1
+    trace = prof.to_chrome_trace(str(tmp_path / 't.json'))
+    assert [e['cat'] for e in trace['traceEvents']] == ['julia', 'python', 'python']
+    assert all(e['ph'] == 'X' and e['dur'] >= 0 for e in trace['traceEvents'])
+
+
+def test_timed_call_without_profile():
+    assert timed_call(None, lambda x, y=1: x + y, 1, y=2) == 3
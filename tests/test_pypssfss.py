@@ -1,3 +1,7 @@
+import os
+# Some tests call Julia off the main thread (analyze_async), which needs Julia to handle signals:
+os.environ.setdefault('PYTHON_JULIACALL_HANDLE_SIGNALS', 'yes')
+
 from pypssfss import analyze, atoutputs, extract_result, Layer, mm, ThetaPhi
 import numpy
 import math
@@ -22,3 +26,155 @@ def test_pypssfss():
     assert f[0] == fghz, "Bad frequency"
     assert math.isclose(s11db[0], -7.92209513, abs_tol=1e-8)
     assert math.isclose(s11ang[0], -131.16817847, abs_tol=1e-8)
+
+
+def test_analyze_cascade_two_sheets():
+    from pypssfss import analyze_cascade, polyring
+    devnull = jl.seval("devnull")
+    ring = polyring(s1=[10, 0], s2=[0, 10], a=[3], b=[4], sides=12, ntri=400, units=mm)
+    strata = [Layer(), ring, Layer(epsr=1.5, width=30*mm), ring, Layer()]
+    flist = [8.0, 11.0, 14.0]
+    steer = ThetaPhi([0, 30], 0)
+    results = analyze(strata, flist, steer, logfile=devnull, resultfile=devnull, showprogress=False)
+    expected = extract_result(results, 's11(te,te) s21(te,te) s21(tm,tm)', columnar=True)
+    data = analyze_cascade(strata, flist, steer, cache=False)
+    for name, values in expected.items():
+        assert numpy.allclose(data[name], values, atol=2e-3), name
+
+
+def test_analyze_async_off_main_thread():
+    import asyncio
+    from pypssfss import analyze_async, profiling
+    devnull = jl.seval("devnull")
+    strata = [Layer(), Layer(epsr=10, width=10*mm, tandel=0.02), Layer()]
+
+    async def main():
+        with profiling() as prof:
+            results = await analyze_async(strata, 10, ThetaPhi(0, 0), logfile=devnull, resultfile=devnull,
+                                          showprogress=False)
+        return results, prof
+
+    results, prof = asyncio.run(main())
+    s11db = extract_result(results, 's11db(te,te)', columnar=True)['s11db(te,te)']
+    assert math.isclose(s11db[0], -7.92209513, abs_tol=1e-8)
+    assert prof.summary()['analyze.julia']['count'] == 1
+
+
+def test_analyze_many_and_portable():
+    import pickle
+    from pypssfss import analyze_many
+    from pypssfss.parallel import portable, _restore
+    slab = [Layer(), Layer(epsr=10, width=10*mm, tandel=0.02), Layer()]
+    restored = _restore(pickle.loads(pickle.dumps(portable(slab))))
+    devnull = jl.seval("devnull")
+    results = analyze(restored, 10, ThetaPhi(0, 0), logfile=devnull, resultfile=devnull, showprogress=False)
+    s11db = extract_result(results, 's11db(te,te)', columnar=True)['s11db(te,te)']
+    assert math.isclose(s11db[0], -7.92209513, abs_tol=1e-8)
+
+    designs = [(slab, f, ThetaPhi(0, 0)) for f in (12, 10, 11)]
+    data = analyze_many(designs, outputs='FGHz', workers=2)
+    assert [d[0][0] for d in data] == [12, 10, 11]
+    completed = dict(analyze_many(designs, outputs='FGHz', workers=2, as_completed=True))
+    assert sorted(completed) == [0, 1, 2] and completed[1][0][0] == 10
+
+
+def test_res2tep_from_store(tmp_path):
+    from pypssfss import res2tep, ResultStore
+    devnull = jl.seval("devnull")
+    strata = [Layer(), Layer(epsr=10, width=10*mm, tandel=0.02), Layer()]
+    results = analyze(strata, [10, 11], ThetaPhi([0, 30], [0, 90]), logfile=devnull, resultfile=devnull,
+                      showprogress=False)
+    store = ResultStore(str(tmp_path / 'sweep.store'))
+    store.append(results)
+    res2tep(results, str(tmp_path / 'direct.tep'))
+    res2tep(store, str(tmp_path / 'store.tep'))
+    expected = extract_result(results, 'FGHz s21(tm,tm) s21db(te,te)', columnar=True)
+    stored = extract_result(store, 'FGHz s21(tm,tm) s21db(te,te)', columnar=True)
+    for name in expected:
+        assert numpy.array_equal(stored[name], expected[name]), name
+    assert (tmp_path / 'direct.tep').read_bytes() == (tmp_path / 'store.tep').read_bytes()
+
+
+def test_analyze_outputs_matches_extract_result():
+    devnull = jl.seval("devnull")
+    ring = polyring_sheet()
+    strata = [Layer(), ring, Layer(epsr=2.2, width=1*mm), Layer()]
+    steer = ThetaPhi([0, 30], [0, 90])
+    flist = [9.0, 10.0, 11.0]
+    requests = 'FGHz theta phi s21db(te,te) s11(tm,tm)'
+    results = analyze(strata, flist, steer, logfile=devnull, resultfile=devnull, showprogress=False)
+    expected = extract_result(results, requests, columnar=True)
+    data = analyze(strata, flist, steer, outputs=requests, chunk_points=2, logfile=devnull, resultfile=devnull,
+                   showprogress=False)
+    assert list(data) == list(expected)
+    for name in expected:
+        assert numpy.array_equal(data[name], expected[name]), name
+
+
+def polyring_sheet(ntri=400):
+    from pypssfss import polyring
+    return polyring(s1=[10, 0], s2=[0, 10], a=[3], b=[4], sides=12, ntri=ntri, units=mm)
+
+
+def test_rho_view():
+    sheet = polyring_sheet()
+    rho = sheet.rho
+    points = sheet.jRWGSheet.ρ
+    assert rho.shape == (sheet.nodecount(), 2) and rho.dtype == numpy.float64 and not rho.flags.writeable
+    assert rho[0][0] == points[0][0] and rho[-1][1] == points[len(points) - 1][1]
+    assert not rho.flags.owndata  # Shared with the Julia mesh
+
+
+def test_converge_mesh_polyring():
+    from pypssfss import converge_mesh
+    conv = converge_mesh(polyring_sheet, [Layer(), None, Layer()], [10.0], ThetaPhi(0, 0), 's21db(te,te)',
+                         ntri=(200, 400, 800, 1600), atol=0.1, cache=False)
+    assert conv.history[0] == (200, None) and len(conv.history) >= 2
+    assert conv.ntri in (200, 400, 800, 1600)
+    if conv.converged:
+        assert conv.history[-1][1] <= 1
+
+
+def test_fit_surrogate_slab():
+    from pypssfss import fit_surrogate
+    strata = [Layer(), Layer(epsr=4, width=5*mm, tandel=0.01), Layer()]
+    model = fit_surrogate(strata, numpy.linspace(8, 12, 9), ThetaPhi([0, 20, 40, 60], [0, 90]), tol=1e-4)
+    devnull = jl.seval("devnull")
+    results = analyze(strata, [9.3, 10.7], ThetaPhi(33, 0), logfile=devnull, resultfile=devnull,
+                      showprogress=False)
+    exact = extract_result(results, 's11(te,te) s21(tm,tm)', columnar=True)
+    assert numpy.allclose(model([9.3, 10.7], 33, 0, 's11(te,te)'), exact['s11(te,te)'], atol=2e-3)
+    assert numpy.allclose(model([9.3, 10.7], 33, 0, 's21(tm,tm)'), exact['s21(tm,tm)'], atol=2e-3)
+
+
+def test_server_round_trip(tmp_path):
+    import threading
+    from pypssfss import client as pc
+    from pypssfss.server import Server
+    server = Server(str(tmp_path / 'pypssfss.sock'), workers=0, warmup=False)
+    replies = {}
+
+    def use():
+        with pc.connect(server.address, timeout=600) as client:
+            strata = [pc.Layer(), pc.Layer(epsr=10, width=10*pc.mm, tandel=0.02), pc.Layer()]
+            replies['data'] = client.analyze(strata, [10.0], pc.ThetaPhi(0, 0), 'FGHz s11db(te,te)')
+            client.shutdown()
+
+    thread = threading.Thread(target=use)
+    thread.start()
+    server.serve_forever()  # Julia runs on this (the main) thread
+    thread.join()
+    assert math.isclose(replies['data']['s11db(te,te)'][0], -7.92209513, abs_tol=1e-8)
+
+
+def test_profiling_nested_compile_timing():
+    from pypssfss.profiling import _timed, timed_call
+    # The inner timed call must not switch compile timing off while the outer one is still running:
+    inner_then_compile = jl.seval("""timed -> begin
+        timed(() -> nothing)
+        f = eval(:(x -> x + 1.5))
+        Base.invokelatest(f, 1)
+    end""")
+    record = {}
+    assert timed_call(record, inner_then_compile, _timed.value) == 2.5
+    assert record['julia']['compile'] > 0
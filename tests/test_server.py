@@ -0,0 +1,78 @@
+import os
+import stat
+import threading
+
+import numpy as np
+import pytest
+
+from pypssfss import client as pc
+from pypssfss import server
+
+
+def test_serve_analyze(tmp_path, monkeypatch):
+    jobs = []
+
+    def run_job(job, flist):
+        if job['outputs'] == 'fail':
+            raise ValueError('bad outputs')
+        jobs.append(job)
+        return {'FGHz': flist, 's21db(te,te)': -flist.astype(np.float32)}
+
+    monkeypatch.setattr(server, '_run_job', run_job)
+    address = str(tmp_path / 'pypssfss.sock')
+    srv = server.Server(address, workers=0, warmup=False)
+    thread = threading.Thread(target=srv.serve_forever)
+    thread.start()
+    with pc.connect(address, timeout=10) as client:
+        assert client.ping()['workers'] == 0
+        strata = [pc.Layer(), pc.pixels(pattern=np.eye(2, dtype=bool), units=pc.mm),
+                  pc.Layer(epsr=2.2, width=np.float64(1.5) * pc.mm), pc.Layer()]
+        data = client.analyze(strata, np.arange(3.0), pc.ThetaPhi([0, 10], 0), 'FGHz s21db(te,te)')
+        assert list(data) == ['FGHz', 's21db(te,te)']
+        assert data['s21db(te,te)'].dtype == np.float32
+        np.testing.assert_array_equal(data['s21db(te,te)'], [-0.0, -1.0, -2.0])
+        job = jobs[0]
+        assert job['strata'][1]['kwargs'] == {'pattern': {'array': [[True, False], [False, True]], 'dtype': '|b1'},
+                                              'units': {'units': 'mm'}}
+        assert job['strata'][2]['kwargs']['width'] == {'value': 1.5, 'units': 'mm'}
+        assert job['steering'] == {'type': 'ThetaPhi', 'values': [[0, 10], 0]}
+        with pytest.raises(RuntimeError, match='bad outputs'):
+            client.analyze(strata, [1.0], pc.ThetaPhi(0, 0), 'fail')
+        client.shutdown()
+    thread.join(10)
+    assert not thread.is_alive()
+
+
+@pytest.mark.skipif(not hasattr(server, '_UnixServer'), reason='no Unix sockets')
+def test_socket_is_private_from_the_start(tmp_path, monkeypatch):
+    umasks = []
+
+    class UnixServer(server._UnixServer):
+        def server_bind(self):
+            umasks.append(os.umask(0o022))
+            os.umask(umasks[-1])
+            super().server_bind()
+
+    monkeypatch.setattr(server, '_UnixServer', UnixServer)
+    address = str(tmp_path / 'pypssfss.sock')
+    srv = server.Server(address, workers=0, warmup=False)
+    assert umasks == [0o177]
+    assert stat.S_IMODE(os.stat(address).st_mode) == 0o600
+    srv._server.server_close()
+
+
+def test_tcp_address():
+    assert pc.tcp_address('localhost:8765') == ('localhost', 8765)
+    assert pc.tcp_address('[::1]:8765') == ('::1', 8765)
+    assert pc.tcp_address('/tmp/pypssfss.sock') is None
+    with pytest.raises(ValueError):
+        server.Server('0.0.0.0:8765', workers=0)
+
+
+@pytest.mark.parametrize('kwargs', [{'resultfile': '/tmp/overwritten'}, {'logfile': 'x.log'},
+                                    {'checkpoint': 'x.ckpt'}, {'cache': '/tmp/cache'}])
+def test_run_job_rejects_file_arguments(kwargs):
+    job = {'strata': [], 'steering': {'type': 'ThetaPhi', 'values': [0, 0]}, 'outputs': 'FGHz',
+           'kwargs': kwargs}
+    with pytest.raises(ValueError, match='cannot be set by clients'):
+        server._run_job(job, np.array([10.0]))
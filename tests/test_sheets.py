@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from pypssfss import sheets
+
+
+def test_rwgsheet_is_lazy_and_slotted(monkeypatch):
+    calls = []
+    monkeypatch.setattr(sheets, '_rho_matrix', lambda s: calls.append(s) or np.arange(6.0).reshape(3, 2).T)
+    sheet = sheets.RWGSheet('jlsheet')  # Nothing is read from the Julia sheet until an attribute is used
+    assert not hasattr(sheet, '__dict__')
+    assert calls == []
+    rho = sheet.rho
+    assert sheet.rho is rho and calls == ['jlsheet']
+    assert rho.shape == (3, 2) and rho[1].tolist() == [2.0, 3.0]
+    with pytest.raises(ValueError):
+        rho[0, 0] = 1.0
+
+
+def test_pixels_batch(monkeypatch):
+    built = []
+
+    def build_batch(f, key, patterns, **kwargs):
+        built.append((f, key, patterns.shape, kwargs))
+        return [f'sheet{i}' for i in range(len(patterns))]
+
+    monkeypatch.setattr(sheets, '_build_batch', build_batch)
+    monkeypatch.setattr(sheets, 'jl', type('jl', (), {'pixels': 'jl.pixels'}))
+    patterns = np.zeros((5, 2, 3), dtype=bool)
+    patterns[1, 0, 0] = patterns[3, 0, 0] = patterns[4, 1, 2] = True
+    batch = sheets.pixels_batch(mask=patterns, ntri=100, clas='J')
+    # Repeated candidates are built once (distinct patterns in sorted order):
+    assert built == [('jl.pixels', 'mask', (3, 2, 3), {'ntri': 100, 'class': 'J'})]
+    assert len(batch) == 5
+    assert [s.jRWGSheet for s in batch] == ['sheet0', 'sheet2', 'sheet0', 'sheet2', 'sheet1']
+    assert batch[4].jRWGSheet == 'sheet1' and len(batch[1:3]) == 2
+    designs = batch.designs(['air', None, 'air'], [10.0], None)
+    assert designs[3].strata[1].jRWGSheet == 'sheet2'
+    with pytest.raises(ValueError):
+        sheets.pixels_batch(mask=patterns.astype(int))
+
+
+def test_rho_falls_back_to_a_copy(monkeypatch):
+    class Points:
+        """A Julia vector of points whose memory cannot be shared."""
+
+        def __array__(self, dtype=None, copy=None):
+            raise TypeError('no buffer')
+
+        def to_numpy(self):
+            return np.array([(0.0, 1.0), (2.0, 3.0)])
+
+    def reinterpret(jlsheet):
+        raise RuntimeError('reinterpret failed')
+
+    monkeypatch.setattr(sheets, '_rho_matrix', reinterpret)
+    monkeypatch.setattr(sheets, '_getfield', lambda name: lambda jlsheet: [(0, 1), (2, 3)])
+    rho = sheets.RWGSheet('jlsheet').rho
+    assert rho.dtype == np.float64 and rho.tolist() == [[0.0, 1.0], [2.0, 3.0]]
+    assert not rho.flags.writeable
+    view = sheets._view(Points())
+    assert view.tolist() == [[0.0, 1.0], [2.0, 3.0]] and not view.flags.writeable
@@ -0,0 +1,7 @@
+from pypssfss.steering import points, PhiTheta, ThetaPhi
+
+
+def test_points_canonical_order():
+    assert points(ThetaPhi([0, 30], range(0, 180, 90))) == [
+        ThetaPhi(0.0, 0.0), ThetaPhi(0.0, 90.0), ThetaPhi(30.0, 0.0), ThetaPhi(30.0, 90.0)]
+    assert points(PhiTheta(45, 10)) == [PhiTheta(45.0, 10.0)]
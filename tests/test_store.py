@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pytest
+
+from pypssfss import pypssfss, store
+from pypssfss.store import ResultStore, S_NAMES, is_store
+
+
+def fake_results(monkeypatch, n, f0):
+    """Stand in for the Julia conversions of a vector of n results."""
+    columns = {'FGHz': f0 + np.arange(n, dtype=float), 'theta': np.zeros(n), 'phi': np.full(n, 90.0)}
+    columns.update({name: (k + 1) * (1 + 1j) * np.ones(n) for k, name in enumerate(S_NAMES)})
+    monkeypatch.setattr(pypssfss, '_extract', lambda results, outreq, columnar: columns)
+    monkeypatch.setattr(store, '_serialize_points', lambda results: (np.ones(10 * n, np.uint8), 10 * np.arange(n)))
+
+
+def test_store_append_and_read(tmp_path, monkeypatch):
+    path = str(tmp_path / 'sweep.store')
+    s = ResultStore(path)
+    assert len(s) == 0 and is_store(path) and s.column('FGHz').shape == (0,)
+    fake_results(monkeypatch, 3, 10.0)
+    s.append('results')
+    fake_results(monkeypatch, 2, 20.0)
+    s.append('results')
+
+    r = ResultStore(path, mode='r')
+    assert len(r) == 5
+    assert isinstance(r.column('fghz'), np.memmap)
+    assert r.column('FGHz').tolist() == [10, 11, 12, 20, 21]
+    assert r.column('s21(TE, te)')[0] == 9 * (1 + 1j)
+    assert r.S.shape == (5, 16)
+    assert r._array('offsets.i64', '<i8').tolist() == [0, 10, 20, 30, 40]
+    data = r.extract('FGHz s11(te,te)', columnar=True)
+    assert data['s11(te,te)'].dtype == np.complex128
+    assert r.extract('FGHz phi').shape == (5, 2)
+    with pytest.raises(PermissionError):
+        r.append('results')
+
+
+def test_interrupted_append_is_discarded(tmp_path, monkeypatch):
+    s = ResultStore(str(tmp_path))
+    fake_results(monkeypatch, 2, 1.0)
+    s.append('results')
+    with open(tmp_path / 'FGHz.f64', 'ab') as f:  # Partial write of an append that never committed
+        f.write(bytes(16))
+    s.append('results')
+    assert s.column('FGHz').tolist() == [1, 2, 1, 2]
+    assert (tmp_path / 'FGHz.f64').stat().st_size == 4 * 8
+
+
+def test_result_file_streams_committed_results(tmp_path, monkeypatch, fake_julia):
+    path = str(tmp_path / 'sweep.store')
+    s = ResultStore(path)
+    fake_results(monkeypatch, 3, 10.0)
+    s.append('results')
+    calls = []
+    fake_julia.res2tep = lambda resultfile, tepfile, **kw: calls.append(
+        (resultfile, open(resultfile, 'rb').read()))
+    pypssfss.res2tep(path, 'sweep.tep')
+    assert calls == [(os.path.join(path, 'results.jls'), bytes(30 * [1]))]
+
+    # Bytes of an append in progress in another process are left out of a chunked copy:
+    with open(os.path.join(path, 'results.jls'), 'ab') as f:
+        f.write(b'uncommitted')
+    with s.result_file(chunksize=7) as resultfile:
+        assert resultfile != os.path.join(path, 'results.jls')
+        with open(resultfile, 'rb') as f:
+            assert f.read() == bytes(30 * [1])
+    assert not os.path.exists(resultfile)
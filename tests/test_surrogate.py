@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from pypssfss import pypssfss
+from pypssfss.steering import ThetaPhi
+from pypssfss.store import S_NAMES
+from pypssfss.surrogate import _cubic_weights, aaa, fit_surrogate, Surrogate
+
+
+def S(f, theta, phi):
+    """Synthetic scattering parameters: a resonance whose frequency moves with the angles."""
+    f0 = 10 + 0.02 * theta + 0.005 * phi
+    r = 1 / (1 + 8j * (f / f0 - f0 / f))
+    return np.stack([r * (k + 1) / 16 + 0.01 * k * np.cos(np.radians(theta)) for k in range(16)], axis=-1)
+
+
+def test_aaa_rational():
+    z = np.linspace(-1, 1, 50)
+    F = np.stack([1 / (z - 1.5), (z + 2) / (z + 1.2j)], axis=1)
+    support, w, err = aaa(z, F, tol=1e-12)
+    assert err < 1e-12 and len(support) <= 4
+
+
+def test_cubic_weights():
+    x = np.array([0.0, 1.0, 3.0, 4.0, 7.0])
+    q = np.array([-1.0, 0.0, 0.5, 2.0, 3.5, 6.9, 8.0])
+    idx, w = _cubic_weights(x, q)
+    assert np.allclose(w.sum(axis=1), 1)
+    assert np.allclose((w * (2 * x[idx] + 1)).sum(axis=1), 2 * np.clip(q, 0, 7) + 1)  # Exact for linear data
+
+
+def test_surrogate_from_data(tmp_path):
+    F, T, P = np.linspace(8, 12, 41), np.linspace(0, 60, 13), np.linspace(0, 90, 7)
+    data = S(F[None, None, :], T[:, None, None], P[None, :, None])
+    model = Surrogate.from_data(F, T, P, data, tol=1e-6)
+    assert model.error <= 1e-6 and len(model.support) < 20
+    assert np.allclose(model.S(F[3], T[2], P[1]), data[2, 1, 3])
+
+    rng = np.random.default_rng(0)
+    th, ph = rng.uniform(0, 60, 5000), rng.uniform(0, 90, 5000)
+    f = rng.uniform(8, 12, 5000)
+    assert np.abs(model.S(f, th, ph) - S(f, th, ph)).max() < 0.02
+    # Points sharing a few frequencies take another path, with the same results:
+    f = np.repeat([9.0, 10.5], 2500)
+    assert np.allclose(model.S(f, th, ph), S(f, th, ph), atol=0.02)
+    assert np.allclose(model.S(f, th, ph), model.S(f, th, ph, chunksize=7))
+    assert np.allclose(model.S(f[:3], th[:3], ph[:3]), [model.S(*p) for p in zip(f[:3], th[:3], ph[:3])])
+    assert model(f[:10].reshape(2, 5), 30, 0, 's21(TE, tm)').shape == (2, 5)
+
+    model.save(tmp_path / 'model.npz')
+    loaded = Surrogate.load(tmp_path / 'model.npz')
+    assert np.array_equal(loaded.S(f, th, ph), model.S(f, th, ph)) and loaded.error == model.error
+    with pytest.raises(ValueError):
+        model(10, 0, 0, 's31(te,te)')
+
+
+def test_fit_surrogate_refines(monkeypatch, fake_julia):
+    analyzed = []
+
+    def analyze(strata, flist, steering, **kwargs):
+        grid = np.meshgrid(steering.theta, steering.phi, flist, indexing='ij')
+        analyzed.append(grid[0].size)
+        return [g.reshape(-1) for g in grid]
+
+    def extract_result(results, outreq, columnar):
+        theta, phi, f = results
+        values = S(f, theta, phi)
+        return {'FGHz': f, 'theta': theta, 'phi': phi} | {name: values[:, k] for k, name in enumerate(S_NAMES)}
+
+    monkeypatch.setattr(pypssfss, 'analyze', analyze)
+    monkeypatch.setattr(pypssfss, 'extract_result', extract_result)
+    model = fit_surrogate(None, np.linspace(8, 12, 9), ThetaPhi([0, 30, 60], [0, 45, 90]), tol=1e-3)
+    assert len(analyzed) > 1
+    rng = np.random.default_rng(1)
+    f, th, ph = rng.uniform(8, 12, 2000), rng.uniform(0, 60, 2000), rng.uniform(0, 90, 2000)
+    assert np.abs(model.S(f, th, ph) - S(f, th, ph)).max() < 0.01
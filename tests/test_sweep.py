@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+from pypssfss import ThetaPhi
+from pypssfss.sweep import shards, SQLiteQueue, WorkQueue
+
+
+def test_shards_order():
+    s = shards([1, 2, 3, 4, 5], ThetaPhi([0, 10], 0), points_per_shard=2)
+    assert [sh.index for sh in s] == list(range(6))
+    assert [sh.flist for sh in s] == [[1, 2], [3, 4], [5]] * 2
+    assert [sh.steering.theta for sh in s] == [0, 0, 0, 10, 10, 10]
+
+
+def test_queue_lease_and_retries(tmp_path):
+    q = SQLiteQueue(tmp_path / 'queue.db', max_attempts=3)
+    q.put('a', {0: b'zero', 1: b'one'})
+    q.put('a', {0: b'other'})  # Existing tasks are kept
+    assert q.claim('w1', 60) == ('a', 0, b'zero')
+    assert q.claim('w2', 0.0) == ('a', 1, b'one')
+    time.sleep(0.01)
+    # The lease of task 1 has expired, so it is taken over:
+    assert q.claim('w3', 60) == ('a', 1, b'one')
+    assert q.claim('w3', 60) is None
+    q.complete('a', 0, b'result')
+    q.fail('a', 1, 'w3', 'boom')
+    assert q.status('a') == {'pending': 1, 'running': 0, 'done': 1, 'failed': 0}
+    # The third attempt of task 1 (the expired lease counted as one) exhausts its attempts:
+    assert q.claim('w1', 60, sweep='a')[1] == 1
+    q.fail('a', 1, 'w1', 'boom again')
+    assert q.status('a')['failed'] == 1
+    assert q.errors('a') == {1: 'boom again'} and q.results('a') == {0: b'result'}
+    q.retry_failed('a')
+    assert q.claim('w1', 60, sweep='b') is None
+    assert q.claim('w1', 60)[1] == 1
+
+
+def test_queue_expired_leases_use_attempts(tmp_path):
+    # A shard that kills its worker never calls fail(), so only its expired leases count its attempts:
+    q = SQLiteQueue(tmp_path / 'queue.db', max_attempts=2)
+    q.put('a', {0: b'crash'})
+    assert q.claim('w1', 0.0) == ('a', 0, b'crash')
+    time.sleep(0.01)
+    assert q.claim('w2', 0.0) == ('a', 0, b'crash')
+    time.sleep(0.01)
+    assert q.claim('w3', 60) is None
+    assert q.status('a')['failed'] == 1
+    assert q.errors('a') == {0: 'lease of worker w2 expired'}
+
+
+def test_queue_fail_needs_the_lease(tmp_path):
+    q = SQLiteQueue(tmp_path / 'queue.db', max_attempts=3)
+    q.put('a', {0: b'slow'})
+    assert q.claim('w1', 0.0) == ('a', 0, b'slow')
+    time.sleep(0.01)
+    assert q.claim('w2', 60) == ('a', 0, b'slow')
+    # w1 finally fails after its lease expired; the task stays with w2:
+    q.fail('a', 0, 'w1', 'too late')
+    assert q.status('a')['running'] == 1 and q.claim('w3', 60) is None
+    q.fail('a', 0, 'w2', 'boom')
+    assert q.status('a')['pending'] == 1
+
+
+def test_work_queue_is_abstract():
+    with pytest.raises(TypeError):
+        WorkQueue()
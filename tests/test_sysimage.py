@@ -0,0 +1,62 @@
+import json
+import os
+
+import pytest
+
+import pypssfss
+from pypssfss import session, sheets
+from pypssfss.session import file_signature
+from pypssfss.sysimage import run_workload, sysimage_path, usable_sysimage, WORKLOAD_VERSION
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.setenv('PYPSSFSS_CACHE_DIR', str(tmp_path / 'cache'))
+    project = tmp_path / 'julia_env'
+    project.mkdir()
+    (project / 'Manifest.toml').write_text('# manifest\n')
+    return str(project)
+
+
+def _write_sysimage(project, exepath='julia'):
+    path = sysimage_path()
+    open(path, 'wb').close()
+    meta = {'exepath': exepath, 'project': project, 'workload_version': WORKLOAD_VERSION,
+            'manifest': file_signature(os.path.join(project, 'Manifest.toml'))}
+    with open(os.path.splitext(path)[0] + '.json', 'w') as f:
+        json.dump(meta, f)
+    return path
+
+
+def test_missing_sysimage(project):
+    assert usable_sysimage('julia', project) is None
+
+
+def test_current_sysimage(project):
+    path = _write_sysimage(project)
+    assert usable_sysimage('julia', project) == path
+
+
+def test_stale_sysimage(project):
+    _write_sysimage(project)
+    with open(os.path.join(project, 'Manifest.toml'), 'a') as f:
+        f.write('# updated\n')
+    with pytest.warns(UserWarning, match='stale'):
+        assert usable_sysimage('julia', project) is None
+    with pytest.warns(UserWarning, match='stale'):
+        assert usable_sysimage('/other/julia', project) is None
+
+
+def test_workload_triangulates_sheets(monkeypatch):
+    # The workload must not load sheets from the sheet cache, or their construction is not compiled:
+    seen = []
+    for name in ('rectstrip', 'diagstrip', 'polyring', 'splitring', 'meander', 'jerusalemcross', 'loadedcross'):
+        monkeypatch.setattr(pypssfss, name, lambda **kwargs: seen.append(sheets.sheet_cache()) or 'sheet')
+    monkeypatch.setattr(session, 'jl', type('jl', (), {'seval': staticmethod(lambda code: code)}))
+    for name in ('Layer', 'atoutputs', 'analyze', 'extract_result'):
+        monkeypatch.setattr(pypssfss, name, lambda *args, **kwargs: None)
+    monkeypatch.setattr(pypssfss, 'mm', 1.0)
+    cache = sheets.configure_sheet_cache()
+    run_workload()
+    assert seen == [None] * 7
+    assert sheets.sheet_cache() is cache
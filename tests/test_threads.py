@@ -0,0 +1,33 @@
+import os
+
+from pypssfss import parallel, session, threads
+from pypssfss.threads import configure_threads, ThreadBudget
+
+
+def test_splits():
+    assert threads._splits(1) == [(1, 1, 1)]
+    assert threads._splits(6) == [(1, 6, 1), (1, 6, 6), (2, 3, 1), (2, 3, 3), (4, 1, 1), (6, 1, 1)]
+
+
+def test_configure_threads(monkeypatch):
+    monkeypatch.setattr(threads, '_budget', None)
+    monkeypatch.setattr(threads, '_cores', lambda processes: 16 // processes)
+    monkeypatch.setenv('PYTHON_JULIACALL_THREADS', 'auto')
+    monkeypatch.delenv('PYPSSFSS_BLAS_THREADS', raising=False)
+    monkeypatch.setattr(session, '_signal_handling', False)
+    configure_threads(julia_threads=1)
+    assert not session._signal_handling  # Single-threaded Julia leaves signals to Python
+    assert configure_threads(processes=4) == ThreadBudget(4, 1, 4)
+    budget = configure_threads(julia_threads=8, blas_threads=2, workers=4)
+    assert threads.thread_budget() == budget == ThreadBudget(8, 2, 4)
+    assert os.environ['PYTHON_JULIACALL_THREADS'] == '8' and os.environ['PYPSSFSS_BLAS_THREADS'] == '2'
+    assert session._signal_handling
+
+    pool = parallel.AnalysisPool()
+    assert (pool.workers, pool.julia_threads, pool.blas_threads) == (4, 2, 1)
+    pool.shutdown()
+
+    monkeypatch.setattr(threads, '_budget', None)
+    pool = parallel.AnalysisPool(julia_threads=2)
+    assert pool.blas_threads == 1  # Not the Julia default of one BLAS thread per core in every worker
+    pool.shutdown()
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from pypssfss import sheets
+
+
+def test_array_times_unit_is_one_call(monkeypatch):
+    calls = []
+    monkeypatch.setattr(sheets, '_scale_array', lambda a, u: calls.append((a, u)) or 'quantities')
+    monkeypatch.setattr(sheets.pssfss_units, 'unit', 'mm')
+    widths = np.linspace(0.1, 1.0, 1000, dtype=np.float32)
+    assert widths * sheets.mm == 'quantities'
+    assert sheets.mm * [1, 2] == 'quantities'
+    assert len(calls) == 2
+    assert calls[0][0].dtype == np.float64 and calls[0][0].shape == (1000,)
+
+
+def test_non_numeric_rejected():
+    for other in ('3', None, True, np.array(['a'])):
+        with pytest.raises(TypeError):
+            other * sheets.mm